@@ -0,0 +1,54 @@
+# src/aquecimento.py (Versão 1.0 - Aquecimento do Estado na Inicialização)
+#
+# Depois de um reinício, o primeiro ciclo começaria do zero: saldo e posições sem
+# cache, nenhum metadado de instrumento e os rastreadores de pivôs frios, o que faz a
+# varredura Fibonacci pedir 200-300 candles de cada par. O aquecimento busca tudo
+# isso em paralelo antes do primeiro ciclo, respeitando o limite de requisições do
+# plano de dados, e reporta quanto tempo levou.
+
+import time
+import asyncio
+
+from src.utils import logger
+from src.rastreamento import span
+from src.orcamento_ciclo import OrcamentoCiclo
+from src.dados_mercado import obter_tickers_bybit, obter_instrumentos_bybit
+from src.estrategias import requisitos_fibonacci
+from src.pivos import obter_rastreador
+from src.metricas import duracao_aquecimento
+
+async def aquecer(executor, plano, parametros, prazo_s):
+    """Pré-carrega tickers, instrumentos, saldo/posições e o histórico dos pares
+    mais líquidos. O que não couber em `prazo_s` fica para os ciclos normais.
+    Retorna o resumo do aquecimento."""
+    inicio = time.perf_counter()
+    orcamento = OrcamentoCiclo(prazo_s)
+    with span('aquecimento'):
+        tickers, instrumentos, _ = await asyncio.gather(
+            asyncio.to_thread(obter_tickers_bybit, executor.session),
+            asyncio.to_thread(obter_instrumentos_bybit, executor.session),
+            asyncio.to_thread(executor.equity.sincronizar, True),
+        )
+        executor.instrumentos.update(instrumentos)
+
+        # Sem planejador: todos os (par, timeframe) do top de liquidez, com a janela longa
+        # de rastreador frio; o primeiro ciclo já pede só os candles novos
+        plano.exigir('aquecimento', requisitos_fibonacci(tickers, parametros.num_pares_liquidez,
+                                                         parametros.timeframes_fibonacci))
+        instantaneo = await plano.executar(executor.session, tickers, orcamento)
+        for (par, tf), df in instantaneo.series.items():
+            obter_rastreador(par, tf, periodo=10).atualizar(df)
+
+    resumo = {
+        'duracao_s': round(time.perf_counter() - inicio, 3),
+        'tickers': len(tickers),
+        'instrumentos': len(instrumentos),
+        'posicoes': len(executor.equity.simbolos_abertos()),
+        'series': len(instantaneo.series),
+        'truncadas': sum(orcamento.truncadas.values()),
+    }
+    duracao_aquecimento.set(resumo['duracao_s'])
+    logger.info(f"Aquecimento concluído em {resumo['duracao_s']:.1f}s: {resumo['tickers']} tickers, "
+                f"{resumo['instrumentos']} instrumentos, {resumo['posicoes']} posições, "
+                f"{resumo['series']} séries de klines", extra={'evento': 'aquecimento', **resumo})
+    return resumo
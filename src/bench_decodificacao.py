@@ -0,0 +1,100 @@
+# src/bench_decodificacao.py (Versão 1.0 - Microbenchmark da Decodificação de Respostas)
+#
+# Compara a conversão linha a linha anterior (int()/float() + lista de listas +
+# reverse + DataFrame) com src/decodificacao.py, em CPU por resposta e memória
+# alocada por resposta.
+#   python -m src.bench_decodificacao [--klines 200] [--tickers 500] [--repeticoes 500]
+
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.decodificacao import klines_para_dataframe, tickers_para_dataframe
+
+def _klines_referencia(linhas):
+    klines = []
+    for kline in linhas:
+        klines.append([int(kline[0]), float(kline[1]), float(kline[2]), float(kline[3]),
+                       float(kline[4]), float(kline[5])])
+    klines.reverse()
+    return pd.DataFrame(klines, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+def _tickers_referencia(lista):
+    tickers = []
+    for ticker in lista:
+        if ticker['symbol'].endswith('USDT'):
+            tickers.append({
+                'symbol': ticker['symbol'],
+                'priceChangePercent': float(ticker.get('price24hPcnt', 0)) * 100,
+                'volume': float(ticker.get('volume24h', 0)),
+                'quoteVolume': float(ticker.get('turnover24h', 0)),
+                'lastPrice': float(ticker.get('lastPrice', 0))
+            })
+    return pd.DataFrame(tickers)
+
+def gerar_klines(n, intervalo_ms=300000):
+    """Resposta sintética de get_kline: strings, do mais novo para o mais antigo."""
+    inicio = 1_700_000_000_000
+    linhas, preco = [], 100.0
+    for i in range(n):
+        abertura = preco
+        preco *= 1 + random.gauss(0, 0.002)
+        linhas.append([str(inicio + i * intervalo_ms), f"{abertura:.4f}", f"{max(abertura, preco) * 1.001:.4f}",
+                       f"{min(abertura, preco) * 0.999:.4f}", f"{preco:.4f}",
+                       f"{random.uniform(1e3, 1e6):.2f}", f"{random.uniform(1e5, 1e8):.2f}"])
+    return linhas[::-1]
+
+def gerar_tickers(n):
+    return [{'symbol': f"P{i}USDT" if i % 10 else f"P{i}USDC", 'lastPrice': f"{random.uniform(0.01, 1e4):.4f}",
+             'price24hPcnt': f"{random.gauss(0, 0.05):.4f}", 'volume24h': f"{random.uniform(1e3, 1e9):.2f}",
+             'turnover24h': f"{random.uniform(1e5, 1e9):.2f}", 'bid1Price': '1', 'ask1Price': '1'}
+            for i in range(n)]
+
+def medir(funcao, entrada, repeticoes):
+    """Retorna (µs de CPU por resposta, KiB de pico alocado por resposta)."""
+    funcao(entrada)
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        funcao(entrada)
+    cpu = (time.process_time() - inicio) / repeticoes * 1e6
+    tracemalloc.start()
+    funcao(entrada)
+    pico = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return cpu, pico
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark da decodificação de klines/tickers")
+    parser.add_argument('--klines', type=int, default=200)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--repeticoes', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    klines = gerar_klines(args.klines)
+    tickers = gerar_tickers(args.tickers)
+
+    # Os dois caminhos precisam produzir os mesmos valores
+    esperado, obtido = _klines_referencia(klines), klines_para_dataframe(klines)
+    assert np.array_equal(esperado.to_numpy(dtype=np.float64), obtido.to_numpy()), "klines divergentes"
+    esperado, obtido = _tickers_referencia(tickers), tickers_para_dataframe(tickers)
+    assert esperado.equals(obtido), "tickers divergentes"
+
+    casos = [
+        (f"get_kline ({args.klines} candles)", _klines_referencia, klines_para_dataframe, klines),
+        (f"get_tickers ({args.tickers} tickers)", _tickers_referencia, tickers_para_dataframe, tickers),
+    ]
+    print(f"{'resposta':<28}{'caminho':<12}{'CPU µs/resp':>14}{'pico KiB':>12}")
+    for nome, referencia, vetorizado, entrada in casos:
+        cpu_ref, mem_ref = medir(referencia, entrada, args.repeticoes)
+        cpu_vet, mem_vet = medir(vetorizado, entrada, args.repeticoes)
+        print(f"{nome:<28}{'anterior':<12}{cpu_ref:>14.1f}{mem_ref:>12.1f}")
+        print(f"{'':<28}{'numpy':<12}{cpu_vet:>14.1f}{mem_vet:>12.1f}"
+              f"   ({cpu_ref / cpu_vet:.1f}x CPU, {mem_ref / mem_vet:.1f}x memória)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,22 +1,57 @@
 # src/bybit_executor.py (Versão 21.0 - TP/SL sem interferência de alavancagem)
 
-import time
+import math
+import hashlib
+
 from pybit.unified_trading import HTTP
+from pybit.exceptions import InvalidRequestError
 from src.config import settings
+from src import relogio
 from src.utils import logger
+from src.rastreamento import span, rastrear
+from src.equity import MotorEquity
+from src.registro_execucoes import registrar_execucao
+from src.metricas import reenvios_ordem
+
+# retCode da Bybit para orderLinkId já usado
+CODIGO_ID_DUPLICADO = 110072
+TENTATIVAS_ORDEM = 3
+ESPERA_REENVIO_S = 0.1
+
+def id_ordem(papel, *partes):
+    """orderLinkId determinístico (máx. 36 caracteres): as mesmas `partes` geram sempre o mesmo ID."""
+    resumo = hashlib.sha1('|'.join(str(parte) for parte in partes).encode()).hexdigest()[:32]
+    return f"{papel}-{resumo}"
+
+def id_sinal(papel, sinal):
+    """ID de uma ordem do sinal: estratégia, par e candle que o gerou."""
+    return id_ordem(papel, sinal.get('strategy_name'), sinal['par'], sinal.get('candle_ts'))
 
 class BybitExecutor:
-    def __init__(self):
+    def __init__(self, session=None):
         logger.info("Initializing Bybit Executor...")
+        self.risk_per_trade = settings.risk_per_trade / 100
+        self.leverage = settings.leverage
+        # Metadados dos contratos ({par: qtyStep/minOrderQty/tickSize}), preenchidos no aquecimento
+        self.instrumentos = {}
+        # Ordens enviadas ainda sem confirmação: {orderLinkId: {'symbol', 'desde', 'tentativas'}}
+        self.ordens_em_voo = {}
+        if session is not None:
+            # Sessão injetada (ex.: SessaoSimulada em src/simulador.py)
+            self.session = session
+            self.equity = MotorEquity(self.session)
+            logger.warning(f"Bybit Executor initialized with {type(session).__name__} (no real orders).")
+            return
         self.session = HTTP(
             api_key=settings.bybit_api_key, 
             api_secret=settings.bybit_api_secret, 
             testnet=False
         )
-        self.risk_per_trade = settings.risk_per_trade / 100
-        self.leverage = settings.leverage
+        # Saldo/posições em cache + PnL não realizado (evita um get_wallet_balance por ordem)
+        self.equity = MotorEquity(self.session)
         logger.warning(f"Bybit Executor initialized in PRODUCTION MODE for Unified Trading Account (Cross Margin only).")
 
+    @rastrear('executor_get_margin_balance')
     def get_margin_balance(self):
         """Obtém o saldo da margem unificada"""
         try:
@@ -30,6 +65,7 @@ class BybitExecutor:
             logger.error(f"Erro ao obter saldo: {e}")
             return None
 
+    @rastrear('executor_get_open_positions')
     def get_open_positions(self):
         """Obtém posições abertas"""
         try:
@@ -46,14 +82,68 @@ class BybitExecutor:
             logger.error(f"Erro ao obter posições: {e}")
             return []
 
+    def _buscar_ordem(self, symbol, order_link_id):
+        """Ordem com `order_link_id` (aberta ou no histórico), ou None."""
+        for metodo in (self.session.get_open_orders, self.session.get_order_history):
+            try:
+                response = metodo(category="linear", symbol=symbol, orderLinkId=order_link_id)
+                if response['retCode'] == 0:
+                    for ordem in response['result']['list']:
+                        if ordem.get('orderLinkId') == order_link_id:
+                            return ordem
+            except Exception as e:
+                logger.warning(f"Erro ao consultar ordem {order_link_id} de {symbol}: {e}")
+        return None
+
+    def _enviar_ordem(self, **parametros):
+        """`place_order` idempotente pelo `orderLinkId` de `parametros`.
+
+        Sem resposta da corretora (timeout, conexão), a ordem pode ou não ter
+        chegado: antes de reenviar, ela é procurada pelo ID. Como o ID é o mesmo,
+        um reenvio nunca duplica a ordem; um "ID duplicado" depois de uma tentativa
+        sem resposta significa que a primeira chegou.
+        """
+        symbol, link = parametros['symbol'], parametros['orderLinkId']
+        em_voo = self.ordens_em_voo[link] = {'symbol': symbol, 'desde': relogio.timestamp(), 'tentativas': 0}
+        sem_resposta = False
+        try:
+            for tentativa in range(TENTATIVAS_ORDEM):
+                em_voo['tentativas'] = tentativa + 1
+                try:
+                    response = self.session.place_order(category="linear", **parametros)
+                except InvalidRequestError as e:
+                    # Recusa explícita da corretora (pybit levanta exceção para retCode != 0)
+                    response = {'retCode': e.status_code, 'retMsg': e.message, 'result': {}}
+                except Exception as e:
+                    logger.warning(f"Ordem {link} ({symbol}) sem resposta na tentativa {tentativa + 1}: {e}")
+                    sem_resposta = True
+                    existente = self._buscar_ordem(symbol, link)
+                    if existente is not None:
+                        reenvios_ordem.labels(resultado='encontrada').inc()
+                        logger.warning(f"Ordem {link} ({symbol}) já estava na corretora; não reenviada.",
+                                       extra={'evento': 'ordem_recuperada', 'order_link_id': link, 'symbol': symbol})
+                        return {'retCode': 0, 'retMsg': 'OK', 'result': existente}
+                    reenvios_ordem.labels(resultado='reenviada').inc()
+                    relogio.dormir(ESPERA_REENVIO_S * 2 ** tentativa)
+                    continue
+                if response['retCode'] == CODIGO_ID_DUPLICADO and sem_resposta:
+                    reenvios_ordem.labels(resultado='encontrada').inc()
+                    existente = self._buscar_ordem(symbol, link) or {'orderId': None, 'orderLinkId': link}
+                    return {'retCode': 0, 'retMsg': 'OK', 'result': existente}
+                return response
+            return {'retCode': -1, 'retMsg': f"sem resposta da corretora após {TENTATIVAS_ORDEM} tentativas", 'result': {}}
+        finally:
+            self.ordens_em_voo.pop(link, None)
+
+    @rastrear('executor_place_order')
     def place_order(self, sinal):
         """Executa ordem com TP/SL corretos (sem interferência de alavancagem)"""
         try:
             par = sinal['par']
             preco_atual = sinal['preco_atual']
             
-            # Obter saldo disponível
-            saldo = self.get_margin_balance()
+            # Obter saldo disponível (cache do motor de equity)
+            saldo = self.equity.saldo_para_dimensionamento()
             if not saldo:
                 return "❌ ERRO: Não foi possível obter saldo da conta."
             
@@ -73,8 +163,14 @@ class BybitExecutor:
             else:
                 quantidade = (valor_risco * self.leverage) / preco_atual
             
-            # Arredondar quantidade para precisão adequada
-            if quantidade < 1:
+            # Arredondar quantidade para o passo do contrato; sem metadados, para precisão adequada
+            instrumento = self.instrumentos.get(par)
+            if instrumento and instrumento['qtyStep'] > 0:
+                passo = instrumento['qtyStep']
+                quantidade = round(math.floor(quantidade / passo + 1e-9) * passo, 10)
+                if quantidade < instrumento['minOrderQty']:
+                    return f"❌ ERRO: Quantidade abaixo do mínimo do contrato ({instrumento['minOrderQty']})."
+            elif quantidade < 1:
                 quantidade = round(quantidade, 3)
             else:
                 quantidade = round(quantidade, 1)
@@ -106,45 +202,59 @@ class BybitExecutor:
                 # SL já calculado corretamente (2.5% = preco_atual * 0.975)
                 stop_loss_price = round(sinal['stop_loss'], 6)
             
-            # Executar ordem principal
-            order_response = self.session.place_order(
-                category="linear",
+            # Marcos de tempo para o ledger de latência/slippage
+            marcos = {
+                'fechamento_candle': sinal.get('candle_ts', 0) / 1000 or None,
+                'sinal_detectado': sinal.get('detectado_em'),
+                'ordem_enviada': relogio.timestamp(),
+            }
+            
+            # Executar ordem principal (ID do sinal: reenvios e sinais repetidos não duplicam a posição)
+            link_entrada = id_sinal('ent', sinal)
+            order_response = self._enviar_ordem(
                 symbol=par,
                 side="Buy",
                 orderType="Market",
                 qty=str(quantidade),
-                timeInForce="IOC"
+                timeInForce="IOC",
+                orderLinkId=link_entrada
             )
             
+            if order_response['retCode'] == CODIGO_ID_DUPLICADO:
+                return f"❌ ERRO: Ordem deste sinal já foi enviada anteriormente ({link_entrada})."
             if order_response['retCode'] != 0:
                 return f"❌ ERRO na ordem principal: {order_response['retMsg']}"
             
-            order_id = order_response['result']['orderId']
+            marcos['ordem_confirmada'] = relogio.timestamp()
+            self.equity.invalidar()
             
             # Aguardar execução da ordem principal
-            time.sleep(2)
+            with span('aguardar_execucao'):
+                relogio.dormir(2)
             
             # Verificar se a ordem foi executada
-            order_status = self.session.get_open_orders(category="linear", symbol=par)
+            order_status = self.session.get_open_orders(category="linear", symbol=par, orderLinkId=link_entrada)
             if order_status['retCode'] == 0:
-                open_orders = [o for o in order_status['result']['list'] if o['orderId'] == order_id]
+                open_orders = [o for o in order_status['result']['list'] if o['orderLinkId'] == link_entrada]
                 if open_orders:
                     return f"❌ ERRO: Ordem principal não foi executada completamente."
+            preco_execucao = self._preco_execucao(par, link_entrada)
+            marcos['execucao_confirmada'] = relogio.timestamp()
             
             # Configurar TP/SL se especificados
             tp_sl_results = []
             
             if take_profit_price:
                 try:
-                    tp_response = self.session.place_order(
-                        category="linear",
+                    tp_response = self._enviar_ordem(
                         symbol=par,
                         side="Sell",
                         orderType="Limit",
                         qty=str(quantidade),
                         price=str(take_profit_price),
                         timeInForce="GTC",
-                        reduceOnly=True
+                        reduceOnly=True,
+                        orderLinkId=id_sinal('tp', sinal)
                     )
                     if tp_response['retCode'] == 0:
                         tp_sl_results.append(f"TP: {take_profit_price}")
@@ -155,15 +265,15 @@ class BybitExecutor:
             
             if stop_loss_price:
                 try:
-                    sl_response = self.session.place_order(
-                        category="linear",
+                    sl_response = self._enviar_ordem(
                         symbol=par,
                         side="Sell",
                         orderType="StopMarket",
                         qty=str(quantidade),
                         stopPrice=str(stop_loss_price),
                         timeInForce="GTC",
-                        reduceOnly=True
+                        reduceOnly=True,
+                        orderLinkId=id_sinal('sl', sinal)
                     )
                     if sl_response['retCode'] == 0:
                         tp_sl_results.append(f"SL: {stop_loss_price}")
@@ -172,11 +282,20 @@ class BybitExecutor:
                 except Exception as e:
                     logger.warning(f"Erro ao definir SL: {e}")
             
+            marcos['tp_sl_enviados'] = relogio.timestamp()
+            try:
+                registrar_execucao(sinal, marcos, preco_execucao, quantidade)
+            except Exception as e:
+                logger.warning(f"Falha ao gravar ledger de execução para {par}: {e}")
+            
             # Resultado final
             resultado = f"✅ *ORDEM EXECUTADA*\n"
             resultado += f"Par: *{par}*\n"
             resultado += f"Quantidade: *{quantidade}*\n"
             resultado += f"Preço: *{preco_atual:.6f}*\n"
+            if preco_execucao:
+                slippage_bps = (preco_execucao - preco_atual) / preco_atual * 10000
+                resultado += f"Preço Executado: *{preco_execucao:.6f}* ({slippage_bps:+.1f} bps)\n"
             resultado += f"Alavancagem: *{self.leverage}x*\n"
             
             if tp_sl_results:
@@ -193,6 +312,18 @@ class BybitExecutor:
             logger.error(f"Erro ao executar ordem: {e}")
             return f"❌ ERRO na execução: {str(e)}"
 
+    def _preco_execucao(self, symbol, order_link_id):
+        """Preço médio efetivamente executado da ordem (None se indisponível)."""
+        try:
+            response = self.session.get_order_history(category="linear", symbol=symbol, orderLinkId=order_link_id)
+            if response['retCode'] == 0 and response['result']['list']:
+                preco = float(response['result']['list'][0].get('avgPrice') or 0)
+                return preco or None
+        except Exception as e:
+            logger.debug(f"Erro ao obter preço executado de {symbol}: {e}")
+        return None
+
+    @rastrear('executor_close_position')
     def close_position(self, symbol, side):
         """Fecha uma posição específica"""
         try:
@@ -215,22 +346,23 @@ class BybitExecutor:
             # Cancelar ordens TP/SL pendentes
             try:
                 self.session.cancel_all_orders(category="linear", symbol=symbol)
-                time.sleep(1)
+                relogio.dormir(1)
             except Exception as e:
                 logger.warning(f"Aviso ao cancelar ordens pendentes: {e}")
             
-            # Fechar posição
-            close_response = self.session.place_order(
-                category="linear",
+            # Fechar posição (um ID por posição: o reenvio não fecha duas vezes)
+            close_response = self._enviar_ordem(
                 symbol=symbol,
                 side="Sell",  # Sempre Sell para fechar posição Buy
                 orderType="Market",
                 qty=quantidade,
                 timeInForce="IOC",
-                reduceOnly=True
+                reduceOnly=True,
+                orderLinkId=id_ordem('fch', symbol, position_info.get('createdTime'), position_info['avgPrice'], quantidade)
             )
             
             if close_response['retCode'] == 0:
+                self.equity.invalidar()
                 return f"✅ Posição {symbol} fechada com sucesso. Quantidade: {quantidade}"
             else:
                 return f"❌ Erro ao fechar posição: {close_response['retMsg']}"
@@ -239,6 +371,7 @@ class BybitExecutor:
             logger.error(f"Erro ao fechar posição {symbol}: {e}")
             return f"❌ Erro ao fechar posição: {str(e)}"
 
+    @rastrear('executor_get_position_info')
     def get_position_info(self, symbol):
         """Obtém informações detalhadas de uma posição"""
         try:
@@ -0,0 +1,46 @@
+# src/cache_resultados.py (Versão 1.0 - Cache de Resultados das Estratégias por Candle)
+#
+# O veredito de uma estratégia para um par/intervalo só muda quando fecha um candle,
+# quando o candle em formação muda nos campos que a estratégia usa ou quando os
+# parâmetros mudam. Enquanto nada disso acontece, o resultado anterior é reaproveitado
+# sem recalcular nem enviar nada ao pool de processos.
+
+from src import relogio
+from src.metricas import consultas_cache_estrategias
+
+class CacheResultados:
+    """Um resultado por (estratégia, par, intervalo), válido para uma versão
+    (timestamp do último candle, parâmetros, campos do candle em formação).
+
+    Uma consulta com versão diferente descarta a entrada: candles que rolam e
+    parâmetros trocados nunca deixam resultados velhos para trás.
+    """
+
+    def __init__(self):
+        self.entradas = {}
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def obter(self, estrategia, par, intervalo, candle_ts, parametros, formacao=()):
+        """Retorna o resultado guardado para esta versão ou None."""
+        chave = (estrategia, par, intervalo)
+        entrada = self.entradas.get(chave)
+        if entrada is not None and entrada[0] == (candle_ts, parametros, formacao):
+            consultas_cache_estrategias.labels(estrategia=estrategia, resultado='acerto').inc()
+            return entrada[1]
+        if entrada is not None:
+            del self.entradas[chave]
+        consultas_cache_estrategias.labels(estrategia=estrategia, resultado='falta').inc()
+        return None
+
+    def guardar(self, estrategia, par, intervalo, candle_ts, parametros, formacao, resultado):
+        self.entradas[(estrategia, par, intervalo)] = ((candle_ts, parametros, formacao), resultado)
+
+    def podar(self, idade_max_ms):
+        """Remove entradas cujo último candle é mais velho que `idade_max_ms`."""
+        limite = relogio.timestamp() * 1000 - idade_max_ms
+        antigas = [chave for chave, (versao, _) in self.entradas.items() if versao[0] < limite]
+        for chave in antigas:
+            del self.entradas[chave]
+        return len(antigas)
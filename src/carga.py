@@ -0,0 +1,277 @@
+# src/carga.py (Versão 1.0 - Gerador de Carga Sintética e Curvas de Escalabilidade)
+#
+# Mede como o ciclo do robô escala em três dimensões: pares no universo (varreduras
+# Momentum/Fibonacci), sinais pendentes (monitores de crossover) e posições abertas
+# (TP dinâmico). Tickers e OHLCV sintéticos, com volatilidade e densidade de sinais
+# controláveis, são servidos pela SessaoSimulada e o `executar_ciclo` real roda em
+# cada ponto de cada dimensão, sem prazo, medindo tempo por etapa, CPU, pico de
+# memória e chamadas à API. Onde a curva cresce mais rápido que linear, o ponto é
+# apontado no log e em logs/carga.csv.
+#   python -m src.carga --pares 50,100,200,400,800 --sinais 0,125,250,500,1000 --posicoes 0,6,12,25,50
+
+import gc
+import sys
+import csv
+import math
+import time
+import asyncio
+import argparse
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+from src import relogio
+from src.utils import logger
+from src.orcamento_ciclo import OrcamentoCiclo
+from src.simulador import (SessaoSimulada, SerieKlines, BotSimulado, MINUTOS_POR_INTERVALO, MS_24H,
+                           _preparar_ambiente_simulado)
+
+arquivo_resultados = 'logs/carga.csv'
+cabecalho_resultados = ['dimensao', 'valor', 'ciclo_ms', 'etapas', 'etapas_ms', 'cpu_ms', 'pico_memoria_mb',
+                        'chamadas_api', 'estado_itens', 'expoente_local', 'superlinear']
+
+# Etapas do ciclo que cada dimensão exercita
+ETAPAS_DIMENSAO = {
+    'pares': ('dados_mercado', 'varredura_momentum', 'varredura_fibonacci'),
+    'sinais': ('dados_monitores', 'monitor_5m', 'monitor_15m', 'monitor_4h'),
+    'posicoes': ('dados_monitores', 'monitor_tp'),
+}
+TIMEFRAMES_SINAIS = ('5m', '15m', '4h')
+
+def gerar_universo(n_pares, dias=10, volatilidade=0.002, densidade_sinais=0.2, intervalo_base='5', semente=42):
+    """Séries sintéticas de `n_pares`. Uma fração `densidade_sinais` dos pares sobe
+    forte nas últimas 24h e recua na última hora (valorização acima do mínimo e RSI
+    baixo: candidatos do Momentum); os demais seguem um passeio aleatório com
+    volatilidade em torno de `volatilidade` por candle."""
+    gerador = np.random.default_rng(semente)
+    intervalo_ms = MINUTOS_POR_INTERVALO[intervalo_base] * 60 * 1000
+    candles = int(dias * MS_24H / intervalo_ms)
+    candles_dia = int(MS_24H / intervalo_ms)
+    candles_recuo = max(int(3600_000 / intervalo_ms), 3)
+    timestamp = 1_600_000_000_000 + np.arange(candles, dtype=np.int64) * intervalo_ms
+    series = {}
+    for i in range(n_pares):
+        sigma = volatilidade * gerador.lognormal(0, 0.3)
+        retornos = gerador.normal(0, sigma, candles)
+        if gerador.random() < densidade_sinais:
+            retornos[-candles_dia:] += 0.10 / candles_dia
+            retornos[-candles_recuo:] -= 0.04 / candles_recuo
+        close = gerador.uniform(0.1, 100) * np.exp(np.cumsum(retornos))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        amplitude = np.abs(gerador.normal(0, sigma, candles)) * close
+        series[f"CARGA{i}USDT"] = SerieKlines(
+            timestamp, open_, np.maximum(open_, close) + amplitude, np.minimum(open_, close) - amplitude,
+            close, gerador.uniform(1e3, 1e6, candles))
+    return series
+
+class OrcamentoMedido(OrcamentoCiclo):
+    """Orçamento passado ao `executar_ciclo`: sem prazo efetivo (nada é truncado) e
+    com a duração real de cada etapa (o relógio do robô é virtual)."""
+
+    def __init__(self):
+        super().__init__(1e9)
+        self.reais = {}
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            with super().etapa(nome):
+                yield
+        finally:
+            self.reais[nome] = self.reais.get(nome, 0.0) + time.perf_counter() - inicio
+
+def _preparar_estado(main, sessao, pares, sinais, posicoes, requisicoes_por_minuto):
+    """Zera o estado global do robô e injeta `posicoes` posições e `sinais` sinais pendentes."""
+    from src.priorizacao import PlanejadorVarredura
+    from src.parametros import Parametros
+    from src.pivos import rastreadores_pivos
+
+    for estrutura in (main.sinais_pendentes_5m, main.sinais_pendentes_15m, main.sinais_pendentes_4h,
+                      main.posicoes_momentum, main.historico_operacoes, rastreadores_pivos):
+        estrutura.clear()
+    main.cache_resultados.entradas.clear()
+    # Perdas do ponto anterior não podem pausar o robô no seguinte
+    main.gestor_drawdown.__init__()
+    main.planejador_varredura = PlanejadorVarredura(requisicoes_por_minuto)
+    # O top de liquidez do Fibonacci acompanha o universo (até o máximo aceito)
+    valores = main.gerenciador_parametros.atual.como_dict()
+    valores['num_pares_liquidez'] = min(len(pares), 500)
+    main.gerenciador_parametros.atual = Parametros(valores)
+
+    for par in pares[:posicoes]:
+        preco = sessao.preco_atual(par)
+        sessao.place_order(symbol=par, side='Buy', orderType='Market', qty=str(round(100 / preco, 6)))
+        main.posicoes_momentum[par] = {'timestamp': relogio.agora(), 'preco_entrada': preco,
+                                       'timeframe': '15m', 'tp_tipo': 'dinamico'}
+    livres = pares[posicoes:]
+    destinos = (main.sinais_pendentes_5m, main.sinais_pendentes_15m, main.sinais_pendentes_4h)
+    for indice in range(sinais):
+        timeframe = TIMEFRAMES_SINAIS[indice % 3]
+        destinos[indice % 3][livres[indice // 3]] = {'timestamp': relogio.agora(),
+                                                      'strategy_name': f'Momentum_Crossover_{timeframe}',
+                                                      'timeframe': timeframe}
+
+async def _medir_ponto(main, series, sinais, posicoes, ciclos, requisicoes_por_minuto):
+    from src.bybit_executor import BybitExecutor
+
+    sessao = SessaoSimulada(series, intervalo_base='5', saldo_inicial=1e9)
+    relogio.instalar_relogio(relogio.RelogioAcelerado(sessao.fim_dados() / 1000 - 2 * 3600))
+    executor = BybitExecutor(session=sessao)
+    executor.equity.conectar_gestor(main.gestor_drawdown)
+    bot = BotSimulado()
+    _preparar_estado(main, sessao, sorted(series), sinais, posicoes, requisicoes_por_minuto)
+
+    # Primeiro ciclo aquece rastreadores e caches; os seguintes são medidos; o último mede memória
+    amostras = []
+    for ciclo in range(ciclos + 2):
+        gc.collect()
+        orcamento = OrcamentoMedido()
+        chamadas = sessao.chamadas
+        memoria = ciclo == ciclos + 1
+        if memoria:
+            tracemalloc.start()
+        cpu_inicio, inicio = time.process_time(), time.perf_counter()
+        await main.executar_ciclo(executor, bot, orcamento)
+        duracao, cpu = time.perf_counter() - inicio, time.process_time() - cpu_inicio
+        if memoria:
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        elif ciclo > 0:
+            amostras.append((duracao, cpu, orcamento.reais, sessao.chamadas - chamadas))
+        relogio.dormir(60)
+
+    return {
+        'ciclo_ms': float(np.median([a[0] for a in amostras])) * 1000,
+        'cpu_ms': float(np.median([a[1] for a in amostras])) * 1000,
+        'etapas_ms': {nome: float(np.median([a[2].get(nome, 0.0) for a in amostras])) * 1000
+                      for nome in amostras[-1][2]},
+        'chamadas_api': int(np.median([a[3] for a in amostras])),
+        'pico_memoria_mb': pico / 2**20,
+        'estado_itens': sum(main.estado_em_memoria().values()),
+    }
+
+def expoentes_locais(pontos):
+    """Expoente k de `custo ~ valor^k` entre cada par de pontos vizinhos (valores > 0).
+    k ≈ 1 é linear; k bem acima de 1, superlinear."""
+    validos = [(valor, custo) for valor, custo in pontos if valor > 0 and custo > 0]
+    expoentes = {}
+    for (x1, c1), (x2, c2) in zip(validos, validos[1:]):
+        if x2 > x1:
+            expoentes[x2] = math.log(c2 / c1) / math.log(x2 / x1)
+    return expoentes
+
+def avaliar_curva(dimensao, resultados, limiar):
+    """Marca os pontos em que o custo das etapas da dimensão cresce com expoente acima de `limiar`."""
+    pontos = [(valor, resultado['etapas_dimensao_ms']) for valor, resultado in resultados]
+    expoentes = expoentes_locais(pontos)
+    superlineares = [valor for valor, expoente in expoentes.items() if expoente > limiar]
+    for valor, resultado in resultados:
+        resultado['expoente_local'] = expoentes.get(valor)
+        resultado['superlinear'] = valor in superlineares
+    validos = [(valor, custo) for valor, custo in pontos if valor > 0 and custo > 0]
+    global_ = (float(np.polyfit(np.log([v for v, _ in validos]), np.log([c for _, c in validos]), 1)[0])
+               if len(validos) >= 2 else None)
+    resumo = {
+        'dimensao': dimensao,
+        'expoente_global': round(global_, 2) if global_ is not None else None,
+        'superlinear_a_partir_de': superlineares[0] if superlineares else None,
+        'curva_ms': {valor: round(custo, 1) for valor, custo in pontos},
+    }
+    nivel = logger.warning if superlineares else logger.info
+    nivel(f"Carga {dimensao}: expoente {resumo['expoente_global']} | "
+          + (f"SUPERLINEAR a partir de {resumo['superlinear_a_partir_de']}" if superlineares else "sem trecho superlinear")
+          + f" | {resumo['curva_ms']}", extra={'evento': 'curva_carga', **resumo})
+    return resumo
+
+def _gravar(dimensao, resultados):
+    with open(arquivo_resultados, 'a', newline='') as f:
+        writer = csv.writer(f)
+        for valor, resultado in resultados:
+            expoente = resultado['expoente_local']
+            writer.writerow([dimensao, valor, round(resultado['ciclo_ms'], 2), '+'.join(ETAPAS_DIMENSAO[dimensao]),
+                             round(resultado['etapas_dimensao_ms'], 2), round(resultado['cpu_ms'], 2),
+                             round(resultado['pico_memoria_mb'], 2), resultado['chamadas_api'],
+                             resultado['estado_itens'], '' if expoente is None else round(expoente, 3),
+                             resultado['superlinear']])
+
+def executar_carga(dimensoes, base_pares, ciclos=2, dias=10, volatilidade=0.002, densidade_sinais=0.2,
+                   requisicoes_por_minuto=None, limiar_superlinear=1.3, semente=42):
+    """`dimensoes` = {'pares': [...], 'sinais': [...], 'posicoes': [...]}. Cada dimensão
+    varia sozinha; nas de sinais e posições o universo tem `base_pares` pares (ou o
+    necessário para caber todos os sinais). Retorna o resumo de cada curva."""
+    _preparar_ambiente_simulado()
+    from src import main
+    from src.config import settings
+    if requisicoes_por_minuto is None:
+        requisicoes_por_minuto = settings.scan_requests_per_minute
+
+    with open(arquivo_resultados, 'w', newline='') as f:
+        csv.writer(f).writerow(cabecalho_resultados)
+
+    universos = {}
+    def universo(n_pares):
+        if n_pares not in universos:
+            universos.clear()
+            universos[n_pares] = gerar_universo(n_pares, dias, volatilidade, densidade_sinais, semente=semente)
+        return universos[n_pares]
+
+    resumos = []
+    try:
+        for dimensao, valores in dimensoes.items():
+            if not valores:
+                continue
+            resultados = []
+            for valor in valores:
+                if dimensao == 'pares':
+                    n_pares, sinais, posicoes = valor, 0, 0
+                else:
+                    sinais = valor if dimensao == 'sinais' else 0
+                    posicoes = valor if dimensao == 'posicoes' else 0
+                    n_pares = max(base_pares, posicoes + math.ceil(sinais / 3))
+                resultado = asyncio.run(_medir_ponto(main, universo(n_pares), sinais, posicoes, ciclos,
+                                                     requisicoes_por_minuto))
+                resultado['etapas_dimensao_ms'] = sum(resultado['etapas_ms'].get(etapa, 0.0)
+                                                      for etapa in ETAPAS_DIMENSAO[dimensao])
+                logger.info(f"Carga {dimensao}={valor}: ciclo {resultado['ciclo_ms']:.0f} ms, etapas da dimensão "
+                            f"{resultado['etapas_dimensao_ms']:.0f} ms, {resultado['chamadas_api']} chamadas, "
+                            f"pico {resultado['pico_memoria_mb']:.1f} MB",
+                            extra={'evento': 'ponto_carga', 'dimensao': dimensao, 'valor': valor,
+                                   **{k: v for k, v in resultado.items() if k != 'etapas_ms'}})
+                resultados.append((valor, resultado))
+            resumos.append(avaliar_curva(dimensao, resultados, limiar_superlinear))
+            _gravar(dimensao, resultados)
+    finally:
+        main.pool_calculo.encerrar()
+        relogio.instalar_relogio(relogio.Relogio())
+    return resumos
+
+def _lista(texto):
+    return [int(valor) for valor in texto.split(',') if valor.strip()] if texto else []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Curvas de escalabilidade do ciclo com universo sintético")
+    parser.add_argument('--pares', default='50,100,200,400,800', help="Tamanhos do universo (vazio: pula)")
+    parser.add_argument('--sinais', default='0,125,250,500,1000', help="Sinais pendentes (vazio: pula)")
+    parser.add_argument('--posicoes', default='0,6,12,25,50', help="Posições abertas (vazio: pula)")
+    parser.add_argument('--base-pares', type=int, default=200, help="Universo das curvas de sinais e posições")
+    parser.add_argument('--ciclos', type=int, default=2, choices=range(1, 101), metavar='1-100', help="Ciclos medidos por ponto (após um de aquecimento)")
+    parser.add_argument('--dias', type=float, default=10)
+    parser.add_argument('--volatilidade', type=float, default=0.002, help="Desvio típico do retorno por candle de 5m")
+    parser.add_argument('--densidade-sinais', type=float, default=0.2, help="Fração dos pares candidata ao Momentum")
+    parser.add_argument('--requisicoes-por-minuto', type=int, default=None,
+                        help="Orçamento do planejador de varredura (padrão: SCAN_REQUESTS_PER_MINUTE)")
+    parser.add_argument('--limiar-superlinear', type=float, default=1.3)
+    parser.add_argument('--falhar-superlinear', action='store_true', help="Sai com código 1 se alguma curva for superlinear")
+    args = parser.parse_args(argv)
+
+    resumos = executar_carga({'pares': _lista(args.pares), 'sinais': _lista(args.sinais),
+                              'posicoes': _lista(args.posicoes)},
+                             args.base_pares, args.ciclos, args.dias, args.volatilidade, args.densidade_sinais,
+                             args.requisicoes_por_minuto, args.limiar_superlinear)
+    superlinear = any(resumo['superlinear_a_partir_de'] is not None for resumo in resumos)
+    return 1 if superlinear and args.falhar_superlinear else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -14,6 +14,21 @@ class Config:
         try:
             self.risk_per_trade = float(os.getenv('RISK_PER_TRADE_PERCENT', '5.0'))
             self.leverage = int(os.getenv('LEVERAGE', '10'))
+            # Soma máxima do risco das posições abertas + ordens em voo (em % do saldo)
+            self.max_risk_total = float(os.getenv('MAX_RISK_TOTAL_PERCENT', '50.0'))
+            self.max_concurrent_orders = int(os.getenv('MAX_CONCURRENT_ORDERS', '4'))
+            # Orçamento de requisições de kline das varreduras e intervalo máximo (em ciclos) entre varreduras de um par frio
+            self.scan_requests_per_minute = int(os.getenv('SCAN_REQUESTS_PER_MINUTE', '300'))
+            self.scan_max_interval_cycles = int(os.getenv('SCAN_MAX_INTERVAL_CYCLES', '6'))
+            # Prazo de cada ciclo (s): varreduras de novos candidatos são interrompidas ao estourá-lo
+            self.cycle_deadline = float(os.getenv('CYCLE_DEADLINE_SECONDS', '45'))
+            # Buscas de klines do plano de dados do ciclo: paralelismo e limite de requisições por segundo
+            self.data_fetch_concurrency = int(os.getenv('DATA_FETCH_CONCURRENCY', '8'))
+            self.data_requests_per_second = float(os.getenv('DATA_REQUESTS_PER_SECOND', '20'))
+            # Processos para o cálculo das estratégias (RSI, pivôs, Golden Zone); 0 = no próprio processo
+            self.strategy_workers = int(os.getenv('STRATEGY_WORKERS', '2'))
+            # Prazo do aquecimento na inicialização (s); o que faltar fica para os ciclos normais
+            self.warmup_deadline = float(os.getenv('WARMUP_DEADLINE_SECONDS', '120'))
         except (ValueError, TypeError) as e:
             logger.error(f"Invalid numeric configuration: {e}. Exiting.")
             raise SystemExit(f"Error: Invalid numeric configuration for risk or leverage.")
@@ -0,0 +1,216 @@
+# src/dados_mercado.py (Versão 1.1 - Planejamento Declarativo de Dados de Mercado)
+#
+# Cada estratégia/monitor declara os dados de que precisa (par, intervalo, lookback).
+# O PlanoDados junta tudo, busca cada (par, intervalo) uma única vez com o maior
+# lookback pedido, em paralelo e fora do event loop, e entrega um instantâneo do
+# qual cada consumidor recebe a sua fatia.
+
+import asyncio
+import contextvars
+import functools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.utils import logger
+from src.limitador import LimitadorTaxa
+from src.disjuntor import disjuntor_simbolos
+from src.rastreamento import span, rastrear
+from src.decodificacao import klines_para_dataframe, tickers_para_dataframe
+
+Requisito = namedtuple('Requisito', ['symbol', 'interval', 'lookback'])
+
+# Erros da API que não dizem nada sobre o par (timeout, limite de requisições, erro interno)
+CODIGOS_TRANSITORIOS = (10000, 10006, 10016, 10018)
+
+@rastrear('rest_get_tickers')
+def obter_tickers_bybit(client):
+    """Obtém todos os tickers da Bybit com dados de valorização 24h"""
+    try:
+        response = client.get_tickers(category="linear")
+        if response['retCode'] == 0 and response['result']['list']:
+            # Valorização 24h já convertida para percentual
+            tickers = tickers_para_dataframe(response['result']['list'])
+            logger.info(f"Obtidos {len(tickers)} tickers USDT da Bybit")
+            return tickers
+        else:
+            logger.error(f"Erro ao obter tickers da Bybit: {response}")
+            return pd.DataFrame()
+    except Exception as e:
+        logger.error(f"Erro ao buscar tickers da Bybit: {e}")
+        return pd.DataFrame()
+
+@rastrear('rest_get_kline')
+def obter_klines_bybit(client, symbol, interval='5', limit=20):
+    """Obtém dados de klines da Bybit"""
+    try:
+        response = client.get_kline(
+            category="linear",
+            symbol=symbol,
+            interval=interval,
+            limit=limit
+        )
+        if response['retCode'] == 0 and response['result']['list']:
+            disjuntor_simbolos.registrar(symbol, True)
+            # Bybit retorna em ordem decrescente; o decodificador já entrega em ordem crescente
+            return klines_para_dataframe(response['result']['list'])
+        else:
+            logger.debug(f"Erro ao obter klines para {symbol}: {response}")
+            if response['retCode'] not in CODIGOS_TRANSITORIOS:
+                disjuntor_simbolos.registrar(symbol, False, response['retMsg'] if response['retCode'] else 'sem candles')
+            return pd.DataFrame()
+    except Exception as e:
+        # Falhas de rede atingem todos os pares e não contam para o disjuntor
+        logger.debug(f"Erro ao obter klines para {symbol}: {e}")
+        return pd.DataFrame()
+
+@rastrear('rest_get_instruments_info')
+def obter_instrumentos_bybit(client):
+    """Passo e mínimo de quantidade e tick de preço de todos os contratos lineares: {par: {...}}"""
+    instrumentos = {}
+    cursor = None
+    try:
+        while True:
+            parametros = {'category': 'linear', 'limit': 1000}
+            if cursor:
+                parametros['cursor'] = cursor
+            response = client.get_instruments_info(**parametros)
+            if response['retCode'] != 0:
+                logger.error(f"Erro ao obter instrumentos da Bybit: {response}")
+                break
+            for item in response['result']['list']:
+                lote, preco = item.get('lotSizeFilter', {}), item.get('priceFilter', {})
+                instrumentos[item['symbol']] = {
+                    'qtyStep': float(lote.get('qtyStep') or 0),
+                    'minOrderQty': float(lote.get('minOrderQty') or 0),
+                    'tickSize': float(preco.get('tickSize') or 0),
+                }
+            cursor = response['result'].get('nextPageCursor')
+            if not cursor:
+                break
+    except Exception as e:
+        logger.error(f"Erro ao buscar instrumentos da Bybit: {e}")
+    return instrumentos
+
+class InstantaneoMercado:
+    """Dados de mercado de um ciclo: tickers e klines por (par, intervalo).
+
+    `klines(par, intervalo, n)` devolve uma cópia dos `n` candles mais recentes,
+    idêntica a um `get_kline(limit=n)` feito no mesmo instante. Um pedido que não
+    estava no plano (ex.: par promovido de timeframe durante o ciclo) é buscado na
+    hora. Sem `client`, o instantâneo só serve o que foi buscado (ex.: modo sombra).
+    """
+
+    def __init__(self, client, tickers, series, requisitos):
+        self.client = client
+        self.tickers = tickers
+        self.series = series
+        self._requisitos = requisitos
+        self.fora_do_plano = 0
+
+    def requisitos(self, consumidor):
+        return self._requisitos.get(consumidor, [])
+
+    def somente_leitura(self):
+        """Mesmo instantâneo, servindo apenas o que já foi buscado (sem acessar a API)."""
+        return InstantaneoMercado(None, self.tickers, self.series, self._requisitos)
+
+    def klines(self, symbol, interval, limit):
+        df = self.series.get((symbol, interval))
+        if df is None or len(df) < limit:
+            if self.client is None or not disjuntor_simbolos.permitir(symbol):
+                return df.copy() if df is not None else pd.DataFrame()
+            self.fora_do_plano += 1
+            df = obter_klines_bybit(self.client, symbol, interval=interval, limit=limit)
+            if not df.empty:
+                self.series[(symbol, interval)] = df
+            return df.copy()
+        return df.iloc[-limit:].reset_index(drop=True).copy()
+
+class PlanoDados:
+    """Junta os requisitos declarados no ciclo e os busca numa única passada."""
+
+    def __init__(self, concorrencia=8, requisicoes_por_segundo=20):
+        self.concorrencia = concorrencia
+        self.limitador = LimitadorTaxa(requisicoes_por_segundo)
+        self._pool = ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='dados')
+        self.requisitos = {}
+
+    def exigir(self, consumidor, requisitos):
+        """Registra os `requisitos` (lista de Requisito) de `consumidor`, em ordem de prioridade."""
+        self.requisitos.setdefault(consumidor, []).extend(requisitos)
+
+    def uniao(self):
+        """{(par, intervalo): maior lookback}, na ordem em que foram exigidos."""
+        lookbacks = {}
+        for requisitos in self.requisitos.values():
+            for requisito in requisitos:
+                chave = (requisito.symbol, requisito.interval)
+                lookbacks[chave] = max(lookbacks.get(chave, 0), requisito.lookback)
+        return lookbacks
+
+    def _buscar(self, client, chave, lookback):
+        self.limitador.aguardar()
+        return obter_klines_bybit(client, chave[0], interval=chave[1], limit=lookback)
+
+    async def executar(self, client, tickers, orcamento=None, consumidores=None, anterior=None, etapa='dados_mercado'):
+        """Busca a união dos requisitos em paralelo e retorna o InstantaneoMercado.
+
+        Com `orcamento`, o que não tiver sido buscado quando o prazo do ciclo acabar
+        é cancelado (os consumidores de menor prioridade vêm por último no plano).
+        Pares com o disjuntor aberto ficam de fora.
+
+        Para atender primeiro os consumidores prioritários, a busca pode ser feita em
+        passadas: `consumidores` restringe esta passada às chaves deles (ainda com o
+        maior lookback pedido por qualquer consumidor) e mantém o plano; a passada
+        seguinte recebe o instantâneo em `anterior` e só busca o que ainda falta.
+        """
+        lookbacks = self.uniao()
+        incluidos = self.requisitos if consumidores is None else \
+            {consumidor: self.requisitos.get(consumidor, []) for consumidor in consumidores}
+        if consumidores is not None:
+            chaves = {(requisito.symbol, requisito.interval) for requisitos in incluidos.values() for requisito in requisitos}
+            lookbacks = {chave: lookback for chave, lookback in lookbacks.items() if chave in chaves}
+        series = dict(anterior.series) if anterior is not None else {}
+        # A passada anterior já buscou suas chaves com o maior lookback do plano
+        reaproveitadas = [chave for chave in lookbacks if chave in series]
+        for chave in reaproveitadas:
+            del lookbacks[chave]
+        liberados = {}
+        for symbol, _ in lookbacks:
+            if symbol not in liberados:
+                liberados[symbol] = disjuntor_simbolos.permitir(symbol)
+        bloqueadas = [chave for chave in lookbacks if not liberados[chave[0]]]
+        for chave in bloqueadas:
+            del lookbacks[chave]
+        pedidos = sum(len(requisitos) for requisitos in incluidos.values())
+        loop = asyncio.get_running_loop()
+        obtidas = 0
+        with span(etapa):
+            tarefas = {
+                loop.run_in_executor(self._pool, functools.partial(
+                    contextvars.copy_context().run, self._buscar, client, chave, lookback)): chave
+                for chave, lookback in lookbacks.items()
+            }
+            pendentes = set()
+            if tarefas:
+                prazo = max(orcamento.restante(), 0.0) if orcamento is not None else None
+                concluidas, pendentes = await asyncio.wait(tarefas, timeout=prazo)
+                for tarefa in pendentes:
+                    tarefa.cancel()
+                for tarefa in concluidas:
+                    if tarefa.exception() is None and not tarefa.result().empty:
+                        series[tarefas[tarefa]] = tarefa.result()
+                        obtidas += 1
+        if pendentes and orcamento is not None:
+            orcamento.truncar(etapa, len(pendentes))
+        logger.info(f"Dados do ciclo ({etapa}): {obtidas}/{len(lookbacks)} séries obtidas para {pedidos} pedidos "
+                    f"({pedidos - len(lookbacks) - len(bloqueadas) - len(reaproveitadas)} repetidos evitados, "
+                    f"{len(reaproveitadas)} reaproveitadas da passada anterior, {len(bloqueadas)} com disjuntor aberto)",
+                    extra={'evento': 'plano_dados', 'etapa': etapa, 'series': len(lookbacks), 'obtidas': obtidas,
+                           'pedidos': pedidos, 'reaproveitadas': len(reaproveitadas), 'disjuntor_aberto': len(bloqueadas)})
+        requisitos = dict(self.requisitos)
+        if consumidores is None:
+            self.requisitos = {}
+        return InstantaneoMercado(client, tickers, series, requisitos)
@@ -0,0 +1,42 @@
+# src/decodificacao.py (Versão 1.0 - Decodificação Vetorizada de Respostas da Bybit)
+#
+# As respostas da Bybit trazem números como strings. Em vez de converter campo a
+# campo com int()/float() e montar listas de listas, cada resposta é convertida de
+# uma vez só (em C, pelo NumPy) para um bloco float64 já na ordem cronológica, que
+# vira um DataFrame de bloco único sem cópia adicional.
+# Benchmark: python -m src.bench_decodificacao
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_KLINE = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+CAMPOS_TICKER = ('price24hPcnt', 'volume24h', 'turnover24h', 'lastPrice')
+
+def decodificar_klines(linhas, colunas=len(COLUNAS_KLINE)):
+    """Converte `result.list` de get_kline (strings, do mais novo para o mais antigo)
+    num array float64 (n, colunas) em ordem crescente de tempo.
+
+    O timestamp em ms fica exato em float64 (até 2**53).
+    """
+    if not linhas:
+        return np.empty((0, colunas))
+    return np.array(linhas, dtype=np.float64)[::-1, :colunas]
+
+def klines_para_dataframe(linhas):
+    return pd.DataFrame(decodificar_klines(linhas), columns=COLUNAS_KLINE, copy=False)
+
+def tickers_para_dataframe(lista, sufixo='USDT'):
+    """Converte `result.list` de get_tickers num DataFrame com as colunas usadas
+    pelas estratégias (symbol, priceChangePercent, volume, quoteVolume, lastPrice)."""
+    selecionados = [t for t in lista if t['symbol'].endswith(sufixo)]
+    if not selecionados:
+        return pd.DataFrame()
+    # Campos vazios ('') viram 0, como no `get(..., 0)` anterior
+    valores = np.array([[t.get(campo) or 0 for campo in CAMPOS_TICKER] for t in selecionados], dtype=np.float64)
+    return pd.DataFrame({
+        'symbol': [t['symbol'] for t in selecionados],
+        'priceChangePercent': valores[:, 0] * 100,
+        'volume': valores[:, 1],
+        'quoteVolume': valores[:, 2],
+        'lastPrice': valores[:, 3],
+    })
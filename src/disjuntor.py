@@ -0,0 +1,94 @@
+# src/disjuntor.py (Versão 1.0 - Disjuntor por Símbolo)
+#
+# Pares deslistados, suspensos ou com dados quebrados falham em todo ciclo e gastam
+# requisições do limite da API. Cada par tem um disjuntor: após `limiar` falhas
+# seguidas ele abre e o par deixa de ser consultado por `espera_s`; depois disso uma
+# única consulta de teste (meio-aberto) decide se ele volta (fechado) ou se a espera
+# dobra, até `espera_max_s`.
+
+import os
+import threading
+
+from src import relogio
+from src.utils import logger
+from src.metricas import simbolos_disjuntor, pulos_disjuntor
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio_aberto'
+
+class DisjuntorSimbolos:
+    """Estados por símbolo; só guarda símbolos com falhas recentes. Thread-safe
+    (as buscas do plano de dados rodam em várias threads)."""
+
+    def __init__(self, limiar=3, espera_s=300, espera_max_s=3600):
+        self.limiar = limiar
+        self.espera_s = espera_s
+        self.espera_max_s = espera_max_s
+        self.simbolos = {}  # symbol -> {'estado', 'falhas', 'espera_s', 'desde'}
+        self._trava = threading.Lock()
+
+    def _transicao(self, symbol, saude, estado, motivo=''):
+        anterior = saude['estado']
+        saude['estado'] = estado
+        saude['desde'] = relogio.timestamp()
+        if anterior != estado:
+            nivel = logger.info if estado == FECHADO else logger.warning
+            nivel(f"Disjuntor de {symbol}: {anterior} → {estado}"
+                  + (f" por {saude['espera_s']:.0f}s ({motivo})" if estado == ABERTO else ''),
+                  extra={'evento': 'disjuntor', 'symbol': symbol, 'estado': estado, 'falhas': saude['falhas']})
+            self._atualizar_metricas()
+
+    def _atualizar_metricas(self):
+        contagem = {ABERTO: 0, MEIO_ABERTO: 0}
+        for saude in self.simbolos.values():
+            if saude['estado'] in contagem:
+                contagem[saude['estado']] += 1
+        for estado, quantidade in contagem.items():
+            simbolos_disjuntor.labels(estado=estado).set(quantidade)
+
+    def estado(self, symbol):
+        saude = self.simbolos.get(symbol)
+        return saude['estado'] if saude else FECHADO
+
+    def permitir(self, symbol):
+        """Indica se `symbol` pode ser consultado agora. Com o disjuntor aberto e a
+        espera vencida, libera uma única consulta de teste."""
+        with self._trava:
+            saude = self.simbolos.get(symbol)
+            if saude is None or saude['estado'] == FECHADO:
+                return True
+            # Um teste sem resultado (ex.: cancelado pelo prazo do ciclo) não prende o par
+            if relogio.timestamp() - saude['desde'] >= saude['espera_s']:
+                self._transicao(symbol, saude, MEIO_ABERTO)
+                return True
+            pulos_disjuntor.inc()
+            return False
+
+    def registrar(self, symbol, sucesso, motivo=''):
+        """Resultado de uma consulta a `symbol`."""
+        with self._trava:
+            saude = self.simbolos.get(symbol)
+            if sucesso:
+                if saude is not None:
+                    self.simbolos.pop(symbol)
+                    self._transicao(symbol, saude, FECHADO)
+                return
+            if saude is None:
+                saude = self.simbolos[symbol] = {'estado': FECHADO, 'falhas': 0, 'espera_s': self.espera_s,
+                                                 'desde': relogio.timestamp()}
+            saude['falhas'] += 1
+            if saude['estado'] == MEIO_ABERTO:
+                saude['espera_s'] = min(saude['espera_s'] * 2, self.espera_max_s)
+                self._transicao(symbol, saude, ABERTO, motivo)
+            elif saude['estado'] == FECHADO and saude['falhas'] >= self.limiar:
+                self._transicao(symbol, saude, ABERTO, motivo)
+
+    def __len__(self):
+        return len(self.simbolos)
+
+disjuntor_simbolos = DisjuntorSimbolos(
+    limiar=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3')),
+    espera_s=float(os.getenv('CIRCUIT_OPEN_SECONDS', '300')),
+    espera_max_s=float(os.getenv('CIRCUIT_MAX_OPEN_SECONDS', '3600')),
+)
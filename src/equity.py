@@ -0,0 +1,168 @@
+# src/equity.py (Versão 1.0 - Motor de Equity e Drawdown em Tempo Real)
+
+import os
+import threading
+from src import relogio
+from src.utils import logger
+from src.metricas import equity_usdt, drawdown_atual
+
+class MotorEquity:
+    """Equity = saldo da carteira em cache + PnL não realizado das posições abertas.
+
+    O saldo e as posições são sincronizados via REST no máximo a cada
+    `max_idade_s` segundos (ou quando invalidados após uma ordem). Entre as
+    sincronizações, cada atualização de preço ajusta a equity em O(1) e repassa o
+    valor ao `GestorDrawdown`, que pausa o robô assim que o limite é violado.
+    Pode ser alimentado por callbacks de WebSocket (outra thread), por isso usa lock.
+    """
+
+    def __init__(self, session, max_idade_s=60):
+        self.session = session
+        self.max_idade_s = max_idade_s
+        self.gestor = None
+        self.saldo_carteira = None
+        self.posicoes = {}  # symbol -> {'size', 'avgPrice', 'markPrice'}
+        self.pnl_aberto = 0.0
+        self.alerta_pendente = None
+        self._sincronizado_em = None
+        self._lock = threading.RLock()
+
+    def conectar_gestor(self, gestor):
+        self.gestor = gestor
+
+    # --- Sincronização via REST ---
+
+    def invalidar(self):
+        """Força nova sincronização (ex.: após abrir ou fechar uma posição)."""
+        self._sincronizado_em = None
+
+    def precisa_sincronizar(self):
+        return self._sincronizado_em is None or relogio.timestamp() - self._sincronizado_em > self.max_idade_s
+
+    def sincronizar(self, forcar=False):
+        """Atualiza saldo e posições via REST se o cache estiver velho. Retorna a equity."""
+        if not forcar and not self.precisa_sincronizar():
+            return self.equity()
+        try:
+            resposta_saldo = self.session.get_wallet_balance(accountType="UNIFIED")
+            resposta_posicoes = self.session.get_positions(category="linear", settleCoin="USDT")
+        except Exception as e:
+            logger.error(f"Erro ao sincronizar equity: {e}")
+            return self.equity()
+
+        saldo = None
+        if resposta_saldo['retCode'] == 0:
+            for coin in resposta_saldo['result']['list'][0]['coin']:
+                if coin['coin'] == 'USDT':
+                    saldo = float(coin['walletBalance'])
+
+        posicoes = {}
+        if resposta_posicoes['retCode'] == 0:
+            for pos in resposta_posicoes['result']['list']:
+                if float(pos['size']) > 0:
+                    posicoes[pos['symbol']] = {
+                        'size': float(pos['size']),
+                        'avgPrice': float(pos['avgPrice']),
+                        'markPrice': float(pos['markPrice']),
+                    }
+
+        with self._lock:
+            if saldo is not None:
+                self.saldo_carteira = saldo
+            if resposta_posicoes['retCode'] == 0:
+                self.posicoes = posicoes
+                self.pnl_aberto = sum(p['size'] * (p['markPrice'] - p['avgPrice']) for p in posicoes.values())
+            self._sincronizado_em = relogio.timestamp()
+            return self._avaliar()
+
+    # --- Atualização incremental por tick ---
+
+    def atualizar_preco(self, symbol, preco):
+        """Aplica um novo mark price. Custo O(1); ignora símbolos sem posição."""
+        with self._lock:
+            posicao = self.posicoes.get(symbol)
+            if posicao is None or preco <= 0:
+                return None
+            self.pnl_aberto += posicao['size'] * (preco - posicao['markPrice'])
+            posicao['markPrice'] = preco
+            return self._avaliar()
+
+    def atualizar_tickers(self, tickers):
+        """Aplica a lista `result.list` de `get_tickers` (uma chamada cobre todas as posições)."""
+        for ticker in tickers:
+            if ticker['symbol'] in self.posicoes:
+                self.atualizar_preco(ticker['symbol'], float(ticker.get('markPrice') or ticker['lastPrice']))
+
+    def _avaliar(self):
+        equity = self.equity()
+        if equity is None:
+            return None
+        equity_usdt.set(equity)
+        if self.gestor is not None:
+            alerta = self.gestor.atualizar_saldo(equity)
+            drawdown_atual.set(self.gestor.drawdown_atual)
+            if alerta:
+                logger.warning(alerta, extra={'evento': 'drawdown', 'equity': equity})
+                self.alerta_pendente = alerta
+        return equity
+
+    # --- Consultas ---
+
+    def equity(self):
+        if self.saldo_carteira is None:
+            return None
+        return self.saldo_carteira + self.pnl_aberto
+
+    def saldo_para_dimensionamento(self):
+        """Saldo da carteira para cálculo de tamanho de posição, servido do cache."""
+        if self.saldo_carteira is None or self.precisa_sincronizar():
+            self.sincronizar(forcar=True)
+        return self.saldo_carteira
+
+    def simbolos_abertos(self):
+        return list(self.posicoes)
+
+    def consumir_alerta(self):
+        alerta, self.alerta_pendente = self.alerta_pendente, None
+        return alerta
+
+class StreamPrecos:
+    """Assinatura do stream de tickers da Bybit (pybit WebSocket) para as posições abertas.
+
+    Desativado com EQUITY_WEBSOCKET=false ou se o WebSocket não puder ser aberto;
+    nesse caso o robô usa apenas a consulta periódica de tickers em `acompanhar_equity`.
+    """
+
+    def __init__(self, motor, ativar=True):
+        self.motor = motor
+        self.ws = None
+        self.assinados = set()
+        if not ativar or os.getenv('EQUITY_WEBSOCKET', 'true').lower() != 'true':
+            return
+        try:
+            from pybit.unified_trading import WebSocket
+            self.ws = WebSocket(testnet=False, channel_type="linear")
+        except Exception as e:
+            logger.warning(f"WebSocket de preços indisponível, usando consulta periódica: {e}")
+
+    @property
+    def ativo(self):
+        return self.ws is not None
+
+    def _callback(self, mensagem):
+        dados = mensagem.get('data', {})
+        preco = dados.get('markPrice') or dados.get('lastPrice')
+        if preco:
+            self.motor.atualizar_preco(dados.get('symbol'), float(preco))
+
+    def assinar(self, simbolos):
+        if not self.ativo:
+            return
+        for symbol in simbolos:
+            if symbol in self.assinados:
+                continue
+            try:
+                self.ws.ticker_stream(symbol=symbol, callback=self._callback)
+                self.assinados.add(symbol)
+            except Exception as e:
+                logger.warning(f"Falha ao assinar ticker de {symbol}: {e}")
@@ -1,121 +1,285 @@
-# src/estrategias.py (Versão 20.0 - Apenas API Bybit + DEBUG + TP Corrigido)
+# src/estrategias.py (Versão 29.0 - Golden Zone Vetorizada)
 
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from datetime import datetime
-import time
-from src.utils import logger
+from src import relogio
+from src.utils import logger, ResumoVarredura
+from src.pivos import obter_rastreador, rastreadores_pivos, janela_historico
+from src.rastreamento import rastrear
+from src.pool_calculo import PoolCalculo
+from src.cache_resultados import CacheResultados
+from src.priorizacao import pontuacao_rsi, pontuacao_golden_zone
+from src.dados_mercado import Requisito, InstantaneoMercado, obter_tickers_bybit
 
-def obter_tickers_bybit(client):
-    """Obtém todos os tickers da Bybit com dados de valorização 24h"""
-    try:
-        response = client.get_tickers(category="linear")
-        if response['retCode'] == 0 and response['result']['list']:
-            tickers = []
-            for ticker in response['result']['list']:
-                if ticker['symbol'].endswith('USDT'):
-                    # Calcular valorização percentual
-                    price_24h_pcnt = float(ticker.get('price24hPcnt', 0)) * 100
-                    tickers.append({
-                        'symbol': ticker['symbol'],
-                        'priceChangePercent': price_24h_pcnt,
-                        'volume': float(ticker.get('volume24h', 0)),
-                        'quoteVolume': float(ticker.get('turnover24h', 0)),
-                        'lastPrice': float(ticker.get('lastPrice', 0))
-                    })
-            logger.info(f"Obtidos {len(tickers)} tickers USDT da Bybit")
-            return pd.DataFrame(tickers)
+# Último resultado de cada estratégia por (par, timeframe), válido até o candle mudar
+cache_resultados = CacheResultados()
+
+def _pares_elegiveis(tickers):
+    # Remover pares alavancados e tokens especiais
+    return tickers[~tickers.symbol.str.contains('UP|DOWN|BEAR|BULL')]
+
+def requisitos_momentum(tickers, valorizacao_minima_percent=3.0, planejador=None):
+    """Dados da varredura Momentum: 20 candles de 5m de cada par com valorização acima do mínimo."""
+    if tickers.empty:
+        return []
+    top_performers = _pares_elegiveis(tickers)
+    top_performers = top_performers[top_performers.priceChangePercent > valorizacao_minima_percent]
+    pares = list(top_performers['symbol'])
+    logger.info(f"Analisando {len(pares)} pares com valorização > {valorizacao_minima_percent}%")
+
+    # Pares longe do RSI limite são revarridos com menos frequência
+    if planejador is not None and pares:
+        pares = [par for _, par in planejador.selecionar('momentum', [('momentum', par) for par in pares])]
+    return [Requisito(par, '5', 20) for par in pares]
+
+def requisitos_fibonacci(tickers, num_pares_liquidez=100, timeframes=['60', '240'], planejador=None):
+    """Dados da varredura Fibonacci para cada (par, timeframe) dos pares mais líquidos."""
+    if tickers.empty:
+        return []
+    # Selecionar os pares com maior liquidez (quoteVolume)
+    top_pares = _pares_elegiveis(tickers).sort_values(by='quoteVolume', ascending=False).head(num_pares_liquidez)
+    logger.info(f"Analisando {len(top_pares)} pares com maior liquidez")
+
+    # Cada (par, timeframe) é varrido com frequência proporcional à proximidade da
+    # Golden Zone, repontuada a cada ciclo com o preço do ticker (sem custo de API)
+    chaves = [('fibonacci', par, tf) for par in top_pares['symbol'] for tf in timeframes]
+    if planejador is not None and chaves:
+        ultimo_preco = dict(zip(top_pares['symbol'], top_pares['lastPrice']))
+        precos = {chave: ultimo_preco[chave[1]] for chave in chaves}
+        chaves = planejador.selecionar('fibonacci', chaves, precos=precos)
+
+    requisitos = []
+    for _, par, tf in chaves:
+        # Com o rastreador de pivôs já aquecido, basta uma janela curta para
+        # alimentar os candles novos
+        if not obter_rastreador(par, tf, periodo=10).precisa_historico(50):
+            limit = 50
         else:
-            logger.error(f"Erro ao obter tickers da Bybit: {response}")
-            return pd.DataFrame()
-    except Exception as e:
-        logger.error(f"Erro ao buscar tickers da Bybit: {e}")
-        return pd.DataFrame()
+            limit = janela_historico(tf)
+        requisitos.append(Requisito(par, tf, limit))
+    return requisitos
+
+# --- Funções puras: rodam no pool de processos (src/pool_calculo.py) ---
+
+def calcular_rsi(lote, length=14):
+    """Cada item é o array de fechamentos de um par. Retorna, por item, (RSI do último candle, erro)."""
+    resultados = []
+    for fechamentos in lote:
+        try:
+            rsi = ta.rsi(pd.Series(fechamentos), length=length)
+            resultados.append((float(rsi.iloc[-1]), None))
+        except Exception as e:
+            resultados.append((float('nan'), str(e)))
+    return resultados
+
+def _matriz_minimas(minimas, n):
+    """Alinha as mínimas de cada item numa matriz (n, k); itens com menos candles
+    são completados com NaN, que nunca conta como toque."""
+    if isinstance(minimas, np.ndarray) and minimas.ndim == 2:
+        return minimas.astype(float, copy=False)
+    larguras = {len(linha) for linha in minimas}
+    if len(larguras) == 1:
+        # Caso comum: todos os itens com as mesmas 10 mínimas
+        return np.array(minimas, dtype=float).reshape(n, -1)
+    largura = max(larguras, default=0)
+    matriz = np.full((n, largura), np.nan)
+    for i, linha in enumerate(minimas):
+        if len(linha):
+            matriz[i, largura - len(linha):] = linha
+    return matriz
+
+def _montar_avaliacoes(padroes, fundos, topos, niveis_618, niveis_500, confiancas, precos,
+                       confianca_minima, extensao_tp):
+    """Parte da Golden Zone que depende do fechamento do candle em formação: entrada
+    na zona e SL/TP (com fallback), sobre níveis e toques já calculados."""
+    fundo_topo = np.array([padrao == 'fundo_topo' for padrao in padroes], dtype=bool)
+    diferencas = topos - fundos
+
+    # Na Golden Zone com confiança suficiente; TP em 61.8% (extensao_tp) da pernada
+    entradas = fundo_topo & (niveis_618 <= precos) & (precos <= niveis_500) & (confiancas >= confianca_minima)
+    stops = fundos
+    takes = precos + diferencas * extensao_tp
+    fallbacks = entradas & ((stops <= 0) | (takes <= 0) | (stops >= precos))
+    stops = np.where(fallbacks, precos * 0.98, stops)
+    takes = np.where(fallbacks, precos * 1.04, takes)
+    sl_mode = f"Fundo do Pivô + Fib {extensao_tp * 100:.1f}%"
 
-def obter_klines_bybit(client, symbol, interval='5', limit=20):
-    """Obtém dados de klines da Bybit"""
+    avaliacoes = []
+    for i, padrao in enumerate(padroes):
+        if padrao != 'fundo_topo':
+            avaliacoes.append({'padrao': padrao})
+            continue
+        avaliacao = {'padrao': padrao, 'nivel_618': float(niveis_618[i]), 'nivel_500': float(niveis_500[i]),
+                     'confianca': int(confiancas[i]), 'fundo': float(fundos[i]), 'topo': float(topos[i]),
+                     'sinal': None}
+        if entradas[i]:
+            fallback = bool(fallbacks[i])
+            avaliacao['sinal'] = {'stop_loss': float(stops[i]), 'take_profit': float(takes[i]),
+                                  'sl_mode': "Fallback 2%" if fallback else sl_mode, 'fallback': fallback}
+        avaliacoes.append(avaliacao)
+    return avaliacoes
+
+def avaliar_golden_zone_lote(pivos, minimas, precos_atuais, confianca_minima, extensao_tp):
+    """Avalia a Golden Zone (0.5-0.618) da última pernada fundo -> topo de vários
+    pares/timeframes de uma vez.
+
+    Entradas alinhadas por item: `pivos` são os dois últimos pivôs de cada um
+    (`RastreadorPivos.ultimos(2)`), `minimas` as mínimas dos últimos candles (até 10,
+    incluindo o em formação; matriz (n, k) ou lista de arrays) usadas para contar os
+    toques na zona e `precos_atuais` o fechamento do candle em formação. Retorna, por
+    item, um dict com `padrao` ('sem_pivos', 'outro', 'invalido' ou 'fundo_topo'); no
+    último caso também os níveis, a confiança, o fundo/topo da pernada e o `sinal`
+    (stop_loss/take_profit/sl_mode) se houver entrada.
+    """
+    n = len(pivos)
+    if n == 0:
+        return []
+    padroes = ['sem_pivos'] * n
+    fundos = np.full(n, np.nan)
+    topos = np.full(n, np.nan)
+    for i, par_pivos in enumerate(pivos):
+        if len(par_pivos) < 2:
+            continue
+        penultimo_pivo, ultimo_pivo = par_pivos
+        if penultimo_pivo['tipo'] != 'fundo' or ultimo_pivo['tipo'] != 'topo':
+            padroes[i] = 'outro'
+            continue
+        padroes[i] = 'fundo_topo'
+        fundos[i], topos[i] = penultimo_pivo['preco'], ultimo_pivo['preco']
+    minimas = _matriz_minimas(minimas, n)
+
+    diferencas = topos - fundos
+    for i in np.flatnonzero(diferencas <= 0):
+        padroes[i] = 'invalido'
+
+    # Níveis de Fibonacci e toques na zona
+    niveis_618 = topos - diferencas * 0.618
+    niveis_500 = topos - diferencas * 0.500
+    confiancas = ((niveis_618[:, None] <= minimas) & (minimas <= niveis_500[:, None])).sum(axis=1)
+    return _montar_avaliacoes(padroes, fundos, topos, niveis_618, niveis_500, confiancas,
+                              np.asarray(precos_atuais, dtype=float), confianca_minima, extensao_tp)
+
+def reavaliar_golden_zone(avaliacoes, precos_atuais, confianca_minima, extensao_tp):
+    """Refaz só a parte de `avaliacoes` anteriores que depende do fechamento atual
+    (zona e SL/TP), mantendo pivôs, níveis e toques. Retorna novas avaliações,
+    idênticas às de `avaliar_golden_zone_lote` com o mesmo candle e o novo fechamento."""
+    if not avaliacoes:
+        return []
+
+    def campo(nome):
+        return np.array([avaliacao.get(nome, np.nan) for avaliacao in avaliacoes], dtype=float)
+
+    return _montar_avaliacoes([avaliacao['padrao'] for avaliacao in avaliacoes], campo('fundo'), campo('topo'),
+                              campo('nivel_618'), campo('nivel_500'), campo('confianca'),
+                              np.asarray(precos_atuais, dtype=float), confianca_minima, extensao_tp)
+
+def avaliar_golden_zone(pivos, minimas, preco_atual, confianca_minima, extensao_tp):
+    """Avalia a Golden Zone de um único par; ver `avaliar_golden_zone_lote`."""
+    return avaliar_golden_zone_lote([pivos], [minimas], [preco_atual], confianca_minima, extensao_tp)[0]
+
+def calcular_fibonacci(lote, confianca_minima, extensao_tp):
+    """Cada item é (rastreador de pivôs, candles), com `candles` um array (n, 4) de
+    timestamp/high/low/close cujo último candle está em formação. Atualiza o
+    rastreador com os candles fechados e avalia a Golden Zone do lote inteiro de uma
+    vez. Retorna, por item, (rastreador atualizado, avaliação, erro)."""
+    resultados = [None] * len(lote)
+    indices, pivos, minimas, precos = [], [], [], []
+    for i, (rastreador, candles) in enumerate(lote):
+        try:
+            rastreador.atualizar_arrays(candles[:-1, 0], candles[:-1, 1], candles[:-1, 2])
+            pivos.append(rastreador.ultimos(2))
+            minimas.append(candles[-10:, 2])
+            precos.append(candles[-1, 3])
+            indices.append(i)
+        except Exception as e:
+            resultados[i] = (rastreador, None, str(e))
     try:
-        response = client.get_kline(
-            category="linear",
-            symbol=symbol,
-            interval=interval,
-            limit=limit
-        )
-        if response['retCode'] == 0 and response['result']['list']:
-            klines = []
-            for kline in response['result']['list']:
-                klines.append([
-                    int(kline[0]),      # timestamp
-                    float(kline[1]),    # open
-                    float(kline[2]),    # high
-                    float(kline[3]),    # low
-                    float(kline[4]),    # close
-                    float(kline[5]),    # volume
-                ])
-            # Bybit retorna em ordem decrescente, precisamos inverter
-            klines.reverse()
-            return pd.DataFrame(klines, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        else:
-            logger.debug(f"Erro ao obter klines para {symbol}: {response}")
-            return pd.DataFrame()
+        avaliacoes = avaliar_golden_zone_lote(pivos, minimas, precos, confianca_minima, extensao_tp)
     except Exception as e:
-        logger.debug(f"Erro ao obter klines para {symbol}: {e}")
-        return pd.DataFrame()
+        avaliacoes = [None] * len(indices)
+        erro = str(e)
+    for i, avaliacao in zip(indices, avaliacoes):
+        resultados[i] = (lote[i][0], avaliacao, None if avaliacao is not None else erro)
+    return resultados
+
+# Sem pool informado, o cálculo roda no próprio processo
+_pool_local = PoolCalculo(workers=0)
 
-def analisar_momentum_pullback(bybit_client, rsi_limite=30, valorizacao_minima_percent=3.0):
+@rastrear()
+async def analisar_momentum_pullback(bybit_client, rsi_limite=30, valorizacao_minima_percent=3.0, planejador=None, orcamento=None,
+                                     instantaneo=None, pool=None, cache=None):
+    cache = cache_resultados if cache is None else cache
     logger.info(f"--- Buscando Candidatos Momentum (RSI < {rsi_limite}) - APENAS BYBIT ---")
     try:
-        # Obter todos os tickers da Bybit
-        all_tickers = obter_tickers_bybit(bybit_client)
-        if all_tickers.empty:
+        # Sem o instantâneo do ciclo, busca tickers e klines diretamente
+        direto = instantaneo is None
+        if direto:
+            instantaneo = InstantaneoMercado(bybit_client, obter_tickers_bybit(bybit_client), {}, {})
+            requisitos = requisitos_momentum(instantaneo.tickers, valorizacao_minima_percent, planejador)
+        else:
+            requisitos = instantaneo.requisitos('momentum')
+        if instantaneo.tickers.empty:
             logger.error("Nenhum ticker obtido da Bybit")
             return []
-
-        # Filtrar apenas pares USDT (já filtrado na função obter_tickers_bybit)
-        usdt_pairs = all_tickers.copy()
-        
-        # Remover pares alavancados e tokens especiais
-        usdt_pairs = usdt_pairs[~usdt_pairs.symbol.str.contains('UP|DOWN|BEAR|BULL')]
-        
-        # Filtrar pares com valorização acima do mínimo
-        top_performers = usdt_pairs[usdt_pairs.priceChangePercent > valorizacao_minima_percent]
-        
-        if top_performers.empty:
-            logger.info("Nenhum par com valorização suficiente encontrado")
+        if not requisitos:
+            logger.info("Nenhum par com valorização suficiente a varrer neste ciclo")
             return []
+        valorizacoes = dict(zip(instantaneo.tickers['symbol'], instantaneo.tickers['priceChangePercent']))
+
+        # Coleta dos fechamentos de 5 minutos; o RSI é calculado fora do event loop,
+        # exceto quando o candle e o fechamento são os mesmos da varredura anterior
+        pares, resultados, calcular = [], [], []
+        for posicao, requisito in enumerate(requisitos):
+            if orcamento is not None and orcamento.esgotado():
+                _devolver_momentum(requisitos[posicao:], orcamento, planejador)
+                break
+            df_5m = instantaneo.klines(requisito.symbol, requisito.interval, requisito.lookback)
+            if direto:
+                relogio.dormir(0.05)  # Reduzir pausa já que é uma API só
+            # Verificar se temos dados suficientes
+            if df_5m.empty or len(df_5m) < 15:
+                continue
+            versao = (int(df_5m['timestamp'].iloc[-1]), (), (df_5m['close'].iloc[-1],))
+            pares.append((requisito, versao))
+            resultados.append(cache.obter('momentum', requisito.symbol, requisito.interval, *versao))
+            if resultados[-1] is None:
+                calcular.append((len(resultados) - 1, df_5m['close'].to_numpy()))
 
-        logger.info(f"Analisando {len(top_performers)} pares com valorização > {valorizacao_minima_percent}%")
+        calculados = await (pool or _pool_local).mapear('momentum', calcular_rsi, [fechamentos for _, fechamentos in calcular],
+                                                        orcamento=orcamento)
+        for (indice, _), resultado in zip(calcular, calculados):
+            resultados[indice] = resultado
+            if resultado is not None and resultado[1] is None:
+                requisito, versao = pares[indice]
+                cache.guardar('momentum', requisito.symbol, requisito.interval, *versao, resultado)
 
         sinais_pendentes = []
-        for _, row in top_performers.iterrows():
-            par = row['symbol']
-            try:
-                # Obter dados de 5 minutos da Bybit
-                df_5m = obter_klines_bybit(bybit_client, par, interval='5', limit=20)
-                if df_5m.empty:
-                    continue
-                
-                # Verificar se temos dados suficientes
-                if len(df_5m) < 15:
-                    continue
-                
-                # Calcular RSI
-                df_5m.ta.rsi(length=14, append=True)
-                rsi_atual = df_5m['RSI_14'].iloc[-1]
-                
-                # DEBUG: Mostrar RSI de cada par analisado
-                logger.info(f"🔍 {par}: RSI={rsi_atual:.2f}, Valorização={row['priceChangePercent']:.1f}%")
-
-                if pd.notna(rsi_atual) and rsi_atual < rsi_limite:
-                    logger.warning(f"🎯 CANDIDATO ENCONTRADO: {par} RSI={rsi_atual:.2f} < {rsi_limite}")
-                    logger.info(f"CANDIDATO A SINAL ENCONTRADO: {par} está sobrevendido (RSI: {rsi_atual:.2f}). Adicionando ao monitoramento.")
-                    sinais_pendentes.append({'par': par, 'strategy_name': 'Momentum_Crossover'})
-                    
-            except Exception as e:
-                logger.debug(f"Erro ao analisar {par}: {e}")
+        resumo = ResumoVarredura('momentum', 'rsi')
+        _devolver_momentum([requisito for (requisito, _), resultado in zip(pares, resultados) if resultado is None],
+                           orcamento, planejador)
+        for (requisito, _), resultado in zip(pares, resultados):
+            par = requisito.symbol
+            if resultado is None:
                 continue
-            time.sleep(0.05)  # Reduzir pausa já que é uma API só
+            rsi_atual, erro = resultado
+            if erro is not None:
+                logger.debug(f"Erro ao analisar {par}: {erro}")
+                continue
+                
+            # DEBUG: RSI de cada par analisado (agregado em um resumo por varredura)
+            resumo.registrar(par, rsi=rsi_atual, valorizacao=float(valorizacoes[par]))
+            if planejador is not None and pd.notna(rsi_atual):
+                planejador.pontuar(('momentum', par), pontuacao_rsi(rsi_atual, rsi_limite))
+
+            if pd.notna(rsi_atual) and rsi_atual < rsi_limite:
+                logger.warning(f"🎯 CANDIDATO ENCONTRADO: {par} RSI={rsi_atual:.2f} < {rsi_limite}",
+                               extra={'evento': 'candidato_momentum', 'par': par, 'rsi': rsi_atual})
+                logger.info(f"CANDIDATO A SINAL ENCONTRADO: {par} está sobrevendido (RSI: {rsi_atual:.2f}). Adicionando ao monitoramento.")
+                sinais_pendentes.append({'par': par, 'strategy_name': 'Momentum_Crossover'})
             
+        resumo.emitir(candidatos=len(sinais_pendentes))
         logger.info(f"Estratégia Momentum: {len(sinais_pendentes)} candidatos encontrados")
         return sinais_pendentes
         
@@ -123,96 +287,134 @@ def analisar_momentum_pullback(bybit_client, rsi_limite=30, valorizacao_minima_p
         logger.error(f"ERRO ao buscar candidatos Momentum: {e}", exc_info=True)
         return []
 
-def analisar_fibonacci(bybit_client, num_pares_liquidez=100, timeframes=['60', '240'], confianca_minima=8):
+def _devolver_momentum(requisitos, orcamento, planejador):
+    """Registra a truncagem e devolve ao planejador os pares não analisados."""
+    if not requisitos:
+        return
+    if orcamento is not None:
+        orcamento.truncar('varredura_momentum', len(requisitos))
+    if planejador is not None:
+        planejador.devolver([('momentum', requisito.symbol) for requisito in requisitos])
+
+def _devolver_fibonacci(requisitos, orcamento, planejador):
+    if not requisitos:
+        return
+    if orcamento is not None:
+        orcamento.truncar('varredura_fibonacci', len(requisitos))
+    if planejador is not None:
+        planejador.devolver([('fibonacci', requisito.symbol, requisito.interval) for requisito in requisitos])
+
+@rastrear()
+async def analisar_fibonacci(bybit_client, num_pares_liquidez=100, timeframes=['60', '240'], confianca_minima=8, planejador=None, orcamento=None,
+                             extensao_tp=0.618, instantaneo=None, pool=None, cache=None, rastreadores=None):
+    cache = cache_resultados if cache is None else cache
+    rastreadores = rastreadores_pivos if rastreadores is None else rastreadores
     logger.info(f"--- Iniciando Estratégia: Fibonacci Retraction (Confiança Mínima: {confianca_minima}) - APENAS BYBIT ---")
     try:
-        # Obter todos os tickers da Bybit
-        all_tickers = obter_tickers_bybit(bybit_client)
-        if all_tickers.empty:
+        # Sem o instantâneo do ciclo, busca tickers e klines diretamente
+        direto = instantaneo is None
+        if direto:
+            instantaneo = InstantaneoMercado(bybit_client, obter_tickers_bybit(bybit_client), {}, {})
+            requisitos = requisitos_fibonacci(instantaneo.tickers, num_pares_liquidez, timeframes, planejador)
+        else:
+            requisitos = instantaneo.requisitos('fibonacci')
+        if instantaneo.tickers.empty:
             logger.error("Nenhum ticker obtido da Bybit")
             return []
 
-        # Filtrar apenas pares USDT e remover alavancados
-        usdt_pairs = all_tickers.copy()
-        usdt_pairs = usdt_pairs[~usdt_pairs.symbol.str.contains('UP|DOWN|BEAR|BULL')]
-        
-        # Selecionar os pares com maior liquidez (quoteVolume)
-        top_pares = usdt_pairs.sort_values(by='quoteVolume', ascending=False).head(num_pares_liquidez)
-        
-        logger.info(f"Analisando {len(top_pares)} pares com maior liquidez")
-        
-        sinais = []
-        for _, row in top_pares.iterrows():
-            par = row['symbol']
-            for tf in timeframes:
-                try:
-                    # Obter dados históricos da Bybit
-                    limit = 300 if tf == '240' else 200  # 240 = 4h, 60 = 1h
-                    df = obter_klines_bybit(bybit_client, par, interval=tf, limit=limit)
-                    if df.empty or len(df) < 50:
-                        continue
-                    
-                    # Encontrar pivôs
-                    pivos = encontrar_topos_fundos(df, 10)
-                    if len(pivos) < 2:
-                        continue
-                        
-                    ultimo_pivo, penultimo_pivo = pivos.iloc[-1], pivos.iloc[-2]
-                    preco_atual = df['close'].iloc[-1]
-                    
-                    # Verificar padrão fundo -> topo
-                    if penultimo_pivo['tipo'] == 'fundo' and ultimo_pivo['tipo'] == 'topo':
-                        fundo, topo = penultimo_pivo['preco'], ultimo_pivo['preco']
-                        diferenca = topo - fundo
-                        if diferenca <= 0:
-                            continue
-                            
-                        # Calcular níveis de Fibonacci
-                        nivel_618 = topo - diferenca * 0.618
-                        nivel_500 = topo - diferenca * 0.500
-                        
-                        # Contar toques na zona
-                        confianca = 0
-                        for i in range(-10, 0):
-                            if i < -len(df):
-                                continue
-                            if nivel_618 <= df['low'].iloc[i] <= nivel_500:
-                                confianca += 1
-                        
-                        # Verificar se está na Golden Zone e tem confiança suficiente
-                        if (nivel_618 <= preco_atual <= nivel_500) and (confianca >= confianca_minima):
-                            stop_loss = fundo
-                            
-                            # CORREÇÃO: Take Profit usando 61.8% em vez de 161.8%
-                            extensao_fib = diferenca * 0.618
-                            take_profit = preco_atual + extensao_fib
-                            
-                            sl_mode = "Fundo do Pivô + Fib 61.8%"
-                            
-                            # Validar SL/TP
-                            if stop_loss <= 0 or take_profit <= 0 or stop_loss >= preco_atual:
-                                logger.warning(f"SL/TP de Fibonacci inválido para {par}. Usando fallback.")
-                                stop_loss = preco_atual * 0.98
-                                take_profit = preco_atual * 1.04
-                                sl_mode = "Fallback 2%"
-                            
-                            logger.info(f"SINAL FIBONACCI VÁLIDO! {par} ({tf}min) com Confiança: {confianca}, SL Mode: {sl_mode}")
-                            
-                            sinais.append({
-                                'strategy_name': 'Fibonacci',
-                                'par': par,
-                                'preco_atual': preco_atual,
-                                'stop_loss': stop_loss,
-                                'take_profit': take_profit,
-                                'confianca': f"{confianca} toques",
-                                'sl_mode': sl_mode
-                            })
-                            
-                except Exception as e:
-                    logger.debug(f"Erro na estratégia Fibonacci para {par} ({tf}min): {e}")
+        # Coleta dos candles; pivôs e Golden Zone são calculados fora do event loop
+        parametros = (confianca_minima, extensao_tp)
+        sinais, coletados, itens, acertos = [], [], [], []
+        for posicao, requisito in enumerate(requisitos):
+            if orcamento is not None and orcamento.esgotado():
+                _devolver_fibonacci(requisitos[posicao:], orcamento, planejador)
+                break
+            df = instantaneo.klines(requisito.symbol, requisito.interval, requisito.lookback)
+            if direto:
+                relogio.dormir(0.05)
+            if df.empty or len(df) < 50:
+                continue
+            rastreador = obter_rastreador(requisito.symbol, requisito.interval, periodo=10, rastreadores=rastreadores)
+            candle_ts = int(df['timestamp'].iloc[-1])
+            # Pivôs, níveis e toques só mudam com pivô ou candle novo, se a mínima do candle
+            # em formação mudou ou se os parâmetros mudaram; o fechamento (zona e TP) muda
+            # quase todo ciclo e é reavaliado sobre a avaliação guardada
+            formacao = (df['low'].iloc[-1],)
+            preco_atual = df['close'].iloc[-1]
+            if rastreador.ultimo_timestamp == int(df['timestamp'].iloc[-2]):
+                anterior = cache.obter('fibonacci', requisito.symbol, requisito.interval,
+                                                  candle_ts, parametros, formacao)
+                if anterior is not None:
+                    acertos.append(((requisito, candle_ts, preco_atual), anterior))
                     continue
-                time.sleep(0.05)
+            coletados.append((requisito, candle_ts, formacao, preco_atual))
+            itens.append((rastreador, df[['timestamp', 'high', 'low', 'close']].to_numpy()))
+
+        resultados = await (pool or _pool_local).mapear('fibonacci', calcular_fibonacci, itens,
+                                                        confianca_minima, extensao_tp, orcamento=orcamento)
+        _devolver_fibonacci([coletado[0] for coletado, resultado in zip(coletados, resultados) if resultado is None],
+                            orcamento, planejador)
         
+        avaliados = []
+        for (requisito, candle_ts, formacao, preco_atual), resultado in zip(coletados, resultados):
+            if resultado is None:
+                continue
+            rastreador, avaliacao, erro = resultado
+            # O worker devolve uma cópia atualizada do rastreador
+            rastreadores[(requisito.symbol, requisito.interval)] = rastreador
+            if erro is not None:
+                logger.debug(f"Erro na estratégia Fibonacci para {requisito.symbol} ({requisito.interval}min): {erro}")
+                continue
+            cache.guardar('fibonacci', requisito.symbol, requisito.interval, candle_ts, parametros, formacao, avaliacao)
+            avaliados.append(((requisito, candle_ts, preco_atual), avaliacao))
+        if acertos:
+            reavaliacoes = reavaliar_golden_zone([avaliacao for _, avaliacao in acertos],
+                                                 [coletado[2] for coletado, _ in acertos], confianca_minima, extensao_tp)
+            avaliados.extend(zip([coletado for coletado, _ in acertos], reavaliacoes))
+
+        for (requisito, candle_ts, preco_atual), avaliacao in avaliados:
+            par, tf = requisito.symbol, requisito.interval
+            chave = ('fibonacci', par, tf)
+            if avaliacao['padrao'] == 'sem_pivos':
+                if planejador is not None:
+                    planejador.pontuar(chave, 0.0)
+                continue
+
+            if avaliacao['padrao'] == 'outro':
+                # Sem pernada fundo -> topo não há zona a observar até surgir novo pivô
+                if planejador is not None:
+                    planejador.descartar_zona(chave)
+                    planejador.pontuar(chave, 0.0)
+                continue
+            if avaliacao['padrao'] != 'fundo_topo':
+                continue
+            if planejador is not None:
+                planejador.registrar_zona(chave, avaliacao['nivel_618'], avaliacao['nivel_500'])
+                planejador.pontuar(chave, pontuacao_golden_zone(preco_atual, avaliacao['nivel_618'], avaliacao['nivel_500']))
+
+            entrada = avaliacao['sinal']
+            if entrada is None:
+                continue
+            if entrada['fallback']:
+                logger.warning(f"SL/TP de Fibonacci inválido para {par}. Usando fallback.")
+            confianca = avaliacao['confianca']
+            logger.info(f"SINAL FIBONACCI VÁLIDO! {par} ({tf}min) com Confiança: {confianca}, SL Mode: {entrada['sl_mode']}",
+                        extra={'evento': 'sinal_fibonacci', 'par': par, 'timeframe': tf, 'confianca': confianca})
+            
+            sinal = {
+                'strategy_name': 'Fibonacci',
+                'par': par,
+                'preco_atual': preco_atual,
+                'stop_loss': entrada['stop_loss'],
+                'take_profit': entrada['take_profit'],
+                'confianca': f"{confianca} toques",
+                'sl_mode': entrada['sl_mode'],
+                'timeframe': tf,
+                'candle_ts': candle_ts,
+                'detectado_em': relogio.timestamp()
+            }
+            sinais.append(sinal)
+    
         logger.info(f"Estratégia Fibonacci: {len(sinais)} sinais encontrados")
         return sinais
         
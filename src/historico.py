@@ -0,0 +1,207 @@
+# src/historico.py (Versão 1.0 - Download de Histórico em Colunas Memory-Mapped)
+#
+# Baixa o histórico completo de klines (paginando `get_kline` para frente) e grava
+# cada (símbolo, intervalo) como arquivos de coluna contíguos, legíveis com numpy.memmap:
+#   <destino>/<SYMBOL>/<intervalo>/timestamp.i8, open.f8, high.f8, low.f8, close.f8,
+#   volume.f8, turnover.f8 e checkpoint.json (linhas gravadas e último timestamp).
+# O download retoma do checkpoint e respeita um limite global de requisições/segundo.
+#
+# Uso:
+#   python -m src.historico --pares BTCUSDT,ETHUSDT --intervalos 60,240 --desde 2021-01-01
+#   python -m src.historico --top 100 --intervalos 240 --workers 6 --rps 15
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from src.utils import logger
+from src.limitador import LimitadorTaxa
+
+DIRETORIO_HISTORICO = 'dados/historico'
+COLUNAS = (('timestamp', np.int64), ('open', np.float64), ('high', np.float64), ('low', np.float64),
+           ('close', np.float64), ('volume', np.float64), ('turnover', np.float64))
+MINUTOS_POR_INTERVALO = {
+    '1': 1, '3': 3, '5': 5, '15': 15, '30': 30, '60': 60, '120': 120,
+    '240': 240, '360': 360, '720': 720, 'D': 1440
+}
+CANDLES_POR_PAGINA = 1000
+
+def _extensao(dtype):
+    return 'i8' if np.dtype(dtype).kind == 'i' else 'f8'
+
+def _caminho_coluna(pasta, nome, dtype):
+    return os.path.join(pasta, f"{nome}.{_extensao(dtype)}")
+
+def _ler_checkpoint(pasta):
+    try:
+        with open(os.path.join(pasta, 'checkpoint.json')) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'linhas': 0, 'ultimo_timestamp': None}
+
+def _gravar_checkpoint(pasta, checkpoint):
+    temporario = os.path.join(pasta, 'checkpoint.json.tmp')
+    with open(temporario, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporario, os.path.join(pasta, 'checkpoint.json'))
+
+def _alinhar_colunas(pasta, linhas):
+    """Descarta bytes gravados após o último checkpoint (download interrompido no meio)."""
+    for nome, dtype in COLUNAS:
+        caminho = _caminho_coluna(pasta, nome, dtype)
+        tamanho = linhas * np.dtype(dtype).itemsize
+        if os.path.exists(caminho) and os.path.getsize(caminho) != tamanho:
+            with open(caminho, 'r+b') as f:
+                f.truncate(tamanho)
+
+def abrir_historico(symbol, interval, diretorio=DIRETORIO_HISTORICO):
+    """Abre as colunas de (symbol, interval) como numpy.memmap somente leitura.
+
+    Nada é carregado para a RAM: fatias como `h['close'][-5000:]` leem só as páginas
+    necessárias do disco. Retorna {} se não houver histórico.
+    """
+    pasta = os.path.join(diretorio, symbol, str(interval))
+    linhas = _ler_checkpoint(pasta)['linhas']
+    if not linhas:
+        return {}
+    return {nome: np.memmap(_caminho_coluna(pasta, nome, dtype), dtype=dtype, mode='r', shape=(linhas,))
+            for nome, dtype in COLUNAS}
+
+class BaixadorHistorico:
+    """Baixa várias séries em paralelo, com limite global de requisições por segundo."""
+
+    def __init__(self, criar_sessao, diretorio=DIRETORIO_HISTORICO, workers=4, requisicoes_por_segundo=10):
+        self.criar_sessao = criar_sessao
+        self.diretorio = diretorio
+        self.workers = workers
+        self.limitador = LimitadorTaxa(requisicoes_por_segundo)
+        self._sessoes = threading.local()
+
+    def _sessao(self):
+        # Uma sessão HTTP por thread
+        if not hasattr(self._sessoes, 'sessao'):
+            self._sessoes.sessao = self.criar_sessao()
+        return self._sessoes.sessao
+
+    def _chamar(self, metodo, **parametros):
+        for tentativa in range(5):
+            self.limitador.aguardar()
+            try:
+                resposta = getattr(self._sessao(), metodo)(**parametros)
+                if resposta['retCode'] == 0:
+                    return resposta['result']
+                if resposta['retCode'] == 10006:  # Too many visits
+                    time.sleep(2 ** tentativa)
+                    continue
+                logger.warning(f"{metodo} {parametros.get('symbol')} retornou {resposta['retCode']}: {resposta['retMsg']}")
+                return None
+            except Exception as e:
+                logger.warning(f"Erro em {metodo} {parametros.get('symbol')} (tentativa {tentativa + 1}): {e}")
+                time.sleep(2 ** tentativa)
+        return None
+
+    def _inicio_listagem(self, symbol):
+        resultado = self._chamar('get_instruments_info', category='linear', symbol=symbol)
+        if resultado and resultado.get('list'):
+            return int(resultado['list'][0].get('launchTime') or 0)
+        return 0
+
+    def baixar_serie(self, symbol, interval, desde_ms):
+        """Baixa (symbol, interval) do checkpoint (ou `desde_ms`) até o último candle fechado."""
+        pasta = os.path.join(self.diretorio, symbol, str(interval))
+        os.makedirs(pasta, exist_ok=True)
+        checkpoint = _ler_checkpoint(pasta)
+        _alinhar_colunas(pasta, checkpoint['linhas'])
+
+        intervalo_ms = MINUTOS_POR_INTERVALO[str(interval)] * 60 * 1000
+        if checkpoint['ultimo_timestamp'] is not None:
+            cursor = checkpoint['ultimo_timestamp'] + intervalo_ms
+        else:
+            cursor = max(desde_ms, self._inicio_listagem(symbol)) // intervalo_ms * intervalo_ms
+        # Último candle já fechado (o candle em formação nunca é gravado)
+        limite = int(time.time() * 1000) // intervalo_ms * intervalo_ms - intervalo_ms
+
+        novas = 0
+        arquivos = {nome: open(_caminho_coluna(pasta, nome, dtype), 'ab') for nome, dtype in COLUNAS}
+        try:
+            while cursor <= limite:
+                fim = min(cursor + (CANDLES_POR_PAGINA - 1) * intervalo_ms, limite)
+                resultado = self._chamar('get_kline', category='linear', symbol=symbol, interval=str(interval),
+                                         start=cursor, end=fim, limit=CANDLES_POR_PAGINA)
+                if resultado is None:
+                    logger.error(f"Download de {symbol} ({interval}) interrompido; retoma do checkpoint na próxima execução.")
+                    break
+                pagina = [linha for linha in resultado.get('list', []) if cursor <= int(linha[0]) <= fim]
+                if pagina:
+                    # Bybit devolve do mais novo para o mais antigo
+                    dados = np.array(pagina[::-1], dtype=np.float64)
+                    for indice, (nome, dtype) in enumerate(COLUNAS):
+                        arquivos[nome].write(dados[:, indice].astype(dtype).tobytes())
+                    for arquivo in arquivos.values():
+                        arquivo.flush()
+                    checkpoint['linhas'] += len(pagina)
+                    checkpoint['ultimo_timestamp'] = int(dados[-1, 0])
+                    _gravar_checkpoint(pasta, checkpoint)
+                    novas += len(pagina)
+                cursor = fim + intervalo_ms
+        finally:
+            for arquivo in arquivos.values():
+                arquivo.close()
+
+        logger.info(f"Histórico {symbol} ({interval}): +{novas} candles, total {checkpoint['linhas']}")
+        return novas
+
+    def baixar(self, pares, intervalos, desde_ms):
+        tarefas = [(par, intervalo) for par in pares for intervalo in intervalos]
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='historico') as pool:
+            futuros = {pool.submit(self.baixar_serie, par, intervalo, desde_ms): (par, intervalo)
+                       for par, intervalo in tarefas}
+            for futuro in as_completed(futuros):
+                par, intervalo = futuros[futuro]
+                try:
+                    total += futuro.result()
+                except Exception as e:
+                    logger.error(f"Falha no download de {par} ({intervalo}): {e}", exc_info=True)
+        return total
+
+def _pares_mais_liquidos(sessao, n):
+    resposta = sessao.get_tickers(category="linear")
+    tickers = [t for t in resposta['result']['list'] if t['symbol'].endswith('USDT')]
+    tickers.sort(key=lambda t: float(t.get('turnover24h', 0)), reverse=True)
+    return [t['symbol'] for t in tickers[:n]]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download de histórico de klines em colunas memory-mapped")
+    parser.add_argument('--pares', help="Lista separada por vírgula (ex.: BTCUSDT,ETHUSDT)")
+    parser.add_argument('--top', type=int, help="Usar os N pares USDT de maior liquidez")
+    parser.add_argument('--intervalos', default='60,240')
+    parser.add_argument('--desde', default='2020-01-01', help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument('--destino', default=DIRETORIO_HISTORICO)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rps', type=float, default=10, help="Limite global de requisições por segundo")
+    args = parser.parse_args(argv)
+
+    from pybit.unified_trading import HTTP
+    if args.pares:
+        pares = args.pares.split(',')
+    elif args.top:
+        pares = _pares_mais_liquidos(HTTP(testnet=False), args.top)
+    else:
+        parser.error("Informe --pares ou --top")
+
+    desde_ms = int(datetime.strptime(args.desde, '%Y-%m-%d').timestamp() * 1000)
+    baixador = BaixadorHistorico(lambda: HTTP(testnet=False), args.destino, args.workers, args.rps)
+    inicio = time.perf_counter()
+    total = baixador.baixar(pares, args.intervalos.split(','), desde_ms)
+    logger.info(f"Download concluído: {total} candles novos em {time.perf_counter() - inicio:.1f}s")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
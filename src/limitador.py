@@ -0,0 +1,44 @@
+# src/limitador.py (Versão 1.1 - Limitador de Taxa de Requisições)
+
+import time
+import threading
+
+class LimitadorTaxa:
+    """Token bucket thread-safe: no máximo `por_segundo` requisições por segundo,
+    com rajadas de até `rajada` requisições. `tempo` permite usar outro relógio
+    (ex.: `relogio.timestamp`, para que o orçamento acompanhe o tempo simulado)."""
+
+    def __init__(self, por_segundo, rajada=None, tempo=time.monotonic):
+        self.por_segundo = float(por_segundo)
+        self.capacidade = float(rajada or max(por_segundo, 1))
+        self.tokens = self.capacidade
+        self._tempo = tempo
+        self._ultimo = tempo()
+        self._trava = threading.Lock()
+
+    def _repor(self):
+        agora = self._tempo()
+        # Um relógio que volta (ex.: relógio simulado instalado depois da criação) não
+        # gera dívida de tokens: só recomeça a contagem a partir de agora
+        decorrido = max(agora - self._ultimo, 0.0)
+        self.tokens = min(self.capacidade, self.tokens + decorrido * self.por_segundo)
+        self._ultimo = agora
+
+    def tentar(self, custo=1):
+        """Consome `custo` tokens se houver saldo. Não bloqueia."""
+        with self._trava:
+            self._repor()
+            if self.tokens >= custo:
+                self.tokens -= custo
+                return True
+            return False
+
+    def espera_necessaria(self, custo=1):
+        with self._trava:
+            self._repor()
+            return max(custo - self.tokens, 0.0) / self.por_segundo
+
+    def aguardar(self, custo=1):
+        """Bloqueia a thread atual até haver tokens disponíveis."""
+        while not self.tentar(custo):
+            time.sleep(max(self.espera_necessaria(custo), 0.001))
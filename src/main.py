@@ -1,16 +1,37 @@
 # src/main.py (Versão 21.0 - TP/SL Fixo para 5min + Timeframes Escalonados)
 
+import os
+import signal
 import asyncio
+from collections import deque
 import telegram
 from telegram import constants
 import pandas as pd
 import pandas_ta as ta
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from src.config import settings
-from src.utils import logger, log_trade
+from src import relogio
+from src.utils import logger, log_trade, ResumoVarredura
 from src.bybit_executor import BybitExecutor
-from src.estrategias import analisar_momentum_pullback, analisar_fibonacci
+from src.estrategias import (analisar_momentum_pullback, analisar_fibonacci, requisitos_momentum, requisitos_fibonacci,
+                             cache_resultados)
+from src.dados_mercado import PlanoDados, Requisito, obter_tickers_bybit, obter_klines_bybit
+from src.pivos import podar_rastreadores, rastreadores_pivos
+from src.disjuntor import disjuntor_simbolos
+from src.memoria import MonitorMemoria
+from src.parametros import GerenciadorParametros
+from src.metricas import iniciar_servidor_metricas
+from src.equity import StreamPrecos
+from src.pipeline_ordens import PipelineOrdens
+from src.priorizacao import PlanejadorVarredura
+from src.pool_calculo import PoolCalculo
+from src.sombra import ModoSombra
+from src.sincronizacao_pnl import SincronizadorPnl
+from src.aquecimento import aquecer
+from src.vigia_loop import VigiaLoop
+from src.orcamento_ciclo import OrcamentoCiclo
+from src.rastreamento import span, solicitar_captura, iniciar_ciclo, finalizar_ciclo
 
 # === ESTRUTURAS DE DADOS GLOBAIS ===
 sinais_pendentes_5m = {}
@@ -19,6 +40,11 @@ sinais_pendentes_4h = {}
 posicoes_momentum = {}
 historico_operacoes = {}
 
+# Retenção do estado em memória: últimas operações por par e idade máxima do que não é mais usado
+MAX_OPERACOES_POR_PAR = 50
+RETENCAO_HISTORICO = timedelta(days=7)
+RETENCAO_CACHES_MS = 24 * 60 * 60 * 1000
+
 class GestorDrawdown:
     def __init__(self, drawdown_maximo=0.15, perdas_consecutivas_max=5):
         self.drawdown_maximo = drawdown_maximo
@@ -27,8 +53,11 @@ class GestorDrawdown:
         self.saldo_pico = None
         self.perdas_consecutivas = 0
         self.bot_pausado = False
+        self.drawdown_atual = 0.0
         
     def atualizar_saldo(self, saldo_atual):
+        """Recebe a equity (saldo + PnL não realizado) a cada tick; custo O(1).
+        Retorna o alerta apenas na transição para pausado."""
         if self.saldo_inicial is None:
             self.saldo_inicial = saldo_atual
             self.saldo_pico = saldo_atual
@@ -38,8 +67,9 @@ class GestorDrawdown:
             self.perdas_consecutivas = 0
             
         drawdown_atual = (self.saldo_pico - saldo_atual) / self.saldo_pico
+        self.drawdown_atual = drawdown_atual
         
-        if drawdown_atual > self.drawdown_maximo:
+        if drawdown_atual > self.drawdown_maximo and not self.bot_pausado:
             self.bot_pausado = True
             return f"🚨 ALERTA CRÍTICO: Drawdown de {drawdown_atual*100:.1f}% excede limite de {self.drawdown_maximo*100:.1f}%! Bot pausado."
             
@@ -59,6 +89,20 @@ class GestorDrawdown:
         return not self.bot_pausado
 
 gestor_drawdown = GestorDrawdown()
+pipeline_ordens = PipelineOrdens(gestor_drawdown, settings.risk_per_trade, settings.max_risk_total,
+                                 max_simultaneas=settings.max_concurrent_orders)
+gerenciador_parametros = GerenciadorParametros(padroes={'risk_per_trade_percent': settings.risk_per_trade})
+planejador_varredura = PlanejadorVarredura(settings.scan_requests_per_minute,
+                                           max_intervalo=settings.scan_max_interval_cycles)
+plano_dados = PlanoDados(settings.data_fetch_concurrency, settings.data_requests_per_second)
+pool_calculo = PoolCalculo(settings.strategy_workers)
+modo_sombra = ModoSombra()
+sincronizador_pnl = SincronizadorPnl(gestor_drawdown)
+
+# Intervalo da Bybit de cada timeframe escalonado
+INTERVALOS_MONITOR = {'5m': '5', '15m': '15', '4h': '240'}
+# Consumidores do plano de dados atendidos antes das varreduras
+CONSUMIDORES_MONITOR = ('monitor_tp', 'monitor_5m', 'monitor_15m', 'monitor_4h')
 
 async def enviar_alerta_telegram(bot, chat_id, mensagem):
     try:
@@ -67,38 +111,9 @@ async def enviar_alerta_telegram(bot, chat_id, mensagem):
     except Exception as e:
         logger.error(f"Falha ao enviar mensagem Telegram: {e}")
 
-def obter_klines_bybit_para_rsi(client, symbol, interval='5', limit=50):
-    """Função auxiliar para obter klines da Bybit para cálculo de RSI"""
-    try:
-        response = client.get_kline(
-            category="linear",
-            symbol=symbol,
-            interval=interval,
-            limit=limit
-        )
-        if response['retCode'] == 0 and response['result']['list']:
-            klines = []
-            for kline in response['result']['list']:
-                klines.append([
-                    int(kline[0]),      # timestamp
-                    float(kline[1]),    # open
-                    float(kline[2]),    # high
-                    float(kline[3]),    # low
-                    float(kline[4]),    # close
-                    float(kline[5]),    # volume
-                ])
-            # Bybit retorna em ordem decrescente, precisamos inverter
-            klines.reverse()
-            return pd.DataFrame(klines, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        else:
-            return pd.DataFrame()
-    except Exception as e:
-        logger.debug(f"Erro ao obter klines para RSI {symbol}: {e}")
-        return pd.DataFrame()
-
 def verificar_reset_timeframe(par, primeira_operacao_timestamp):
     """Verifica se deve resetar o ciclo de timeframes"""
-    agora = datetime.now()
+    agora = relogio.agora()
     tempo_decorrido = agora - primeira_operacao_timestamp
     
     # Reset após 24h
@@ -115,7 +130,7 @@ def promover_para_proximo_timeframe(par, timeframe_atual):
         if par in sinais_pendentes_5m:
             sinais_pendentes_15m[par] = sinais_pendentes_5m[par].copy()
             sinais_pendentes_15m[par]['timeframe'] = '15m'
-            sinais_pendentes_15m[par]['promovido_em'] = datetime.now()
+            sinais_pendentes_15m[par]['promovido_em'] = relogio.agora()
             del sinais_pendentes_5m[par]
             logger.info(f"Par {par} promovido de 5m para 15m")
             
@@ -124,11 +139,11 @@ def promover_para_proximo_timeframe(par, timeframe_atual):
         if par in sinais_pendentes_15m:
             sinais_pendentes_4h[par] = sinais_pendentes_15m[par].copy()
             sinais_pendentes_4h[par]['timeframe'] = '4h'
-            sinais_pendentes_4h[par]['promovido_em'] = datetime.now()
+            sinais_pendentes_4h[par]['promovido_em'] = relogio.agora()
             del sinais_pendentes_15m[par]
             logger.info(f"Par {par} promovido de 15m para 4h")
 
-async def monitorar_tp_dinamico(executor, bot):
+async def monitorar_tp_dinamico(executor, bot, instantaneo=None):
     """Monitora TP dinâmico apenas para posições de 15m e 4h"""
     if not posicoes_momentum:
         return
@@ -140,7 +155,8 @@ async def monitorar_tp_dinamico(executor, bot):
     if not posicoes_tp_dinamico:
         return
     
-    logger.info(f"--- Monitorando {len(posicoes_tp_dinamico)} posições para TP Dinâmico (RSI >= 70) ---")
+    rsi_tp = gerenciador_parametros.atual.rsi_tp_dinamico
+    logger.info(f"--- Monitorando {len(posicoes_tp_dinamico)} posições para TP Dinâmico (RSI >= {rsi_tp:.0f}) ---")
     
     for par, info in list(posicoes_tp_dinamico.items()):
         try:
@@ -154,13 +170,17 @@ async def monitorar_tp_dinamico(executor, bot):
                 continue
             
             # Obter dados de 5min para RSI usando Bybit
-            df_5m = obter_klines_bybit_para_rsi(executor.session, par, interval='5', limit=20)
+            if instantaneo is not None:
+                df_5m = instantaneo.klines(par, '5', 20)
+            else:
+                df_5m = obter_klines_bybit(executor.session, par, interval='5', limit=20)
             if df_5m.empty or len(df_5m) < 15:
                 continue
             
             # Calcular RSI
             try:
-                df_5m.ta.rsi(length=14, append=True)
+                with span('indicador_rsi'):
+                    df_5m.ta.rsi(length=14, append=True)
                 rsi_atual = df_5m['RSI_14'].iloc[-1]
             except:
                 continue
@@ -168,7 +188,7 @@ async def monitorar_tp_dinamico(executor, bot):
             logger.info(f"Monitorando TP para {par} ({info.get('timeframe', 'N/A')}): RSI atual é {rsi_atual:.2f}")
             
             # Verificar condição de TP dinâmico
-            if pd.notna(rsi_atual) and rsi_atual >= 70:
+            if pd.notna(rsi_atual) and rsi_atual >= rsi_tp:
                 logger.warning(f"🎯 TP DINÂMICO ATIVADO PARA {par}! RSI: {rsi_atual:.2f}")
                 
                 resultado_fechamento = executor.close_position(par, "Buy")
@@ -189,16 +209,27 @@ async def monitorar_tp_dinamico(executor, bot):
         except Exception as e:
             logger.error(f"Erro ao monitorar TP dinâmico para {par}: {e}")
 
-async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posicoes_abertas):
+async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posicoes_abertas, orcamento=None,
+                                     instantaneo=None):
     """Monitora sinais de um timeframe específico usando apenas Bybit"""
     if not sinais_dict:
         return
         
     logger.info(f"--- Monitorando {len(sinais_dict)} sinais pendentes em {timeframe} ---")
     
+    parametros = gerenciador_parametros.atual
     sinais_para_processar = list(sinais_dict.items())
+    resumo = ResumoVarredura(f'monitor_{timeframe}', 'rsi')
+    sinais_para_executar = []
     
-    for par, info in sinais_para_processar:
+    for posicao, (par, info) in enumerate(sinais_para_processar):
+        if orcamento is not None and orcamento.esgotado():
+            # Os pares já verificados vão para o fim da fila: os pendentes saem na frente no próximo ciclo
+            for par_verificado, _ in sinais_para_processar[:posicao]:
+                if par_verificado in sinais_dict:
+                    sinais_dict[par_verificado] = sinais_dict.pop(par_verificado)
+            orcamento.truncar(f'monitor_{timeframe}', len(sinais_para_processar) - posicao)
+            break
         try:
             # Verificar se já existe posição
             if par in posicoes_abertas:
@@ -210,7 +241,7 @@ async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posi
             timeout_map = {'5m': 900, '15m': 1800, '4h': 7200}  # 15min, 30min, 2h
             timeout = timeout_map.get(timeframe, 900)
             
-            if (datetime.now() - info['timestamp']).total_seconds() > timeout:
+            if (relogio.agora() - info['timestamp']).total_seconds() > timeout:
                 logger.info(f"Sinal {par} ({timeframe}) expirou após {timeout}s.")
                 del sinais_dict[par]
                 continue
@@ -226,34 +257,38 @@ async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posi
                     continue
                 
             # Mapear timeframe para intervalo da Bybit
-            interval_map = {'5m': '5', '15m': '15', '4h': '240'}
-            interval = interval_map.get(timeframe, '5')
+            interval = INTERVALOS_MONITOR.get(timeframe, '5')
             
             # Obter dados do timeframe apropriado da Bybit
-            df = obter_klines_bybit_para_rsi(executor.session, par, interval=interval, limit=50)
+            if instantaneo is not None:
+                df = instantaneo.klines(par, interval, 50)
+            else:
+                df = obter_klines_bybit(executor.session, par, interval=interval, limit=50)
             if df.empty or len(df) < 15:
                 continue
             
             # Calcular RSI
             try:
-                df.ta.rsi(length=14, append=True)
+                with span('indicador_rsi'):
+                    df.ta.rsi(length=14, append=True)
                 rsi_atual = df['RSI_14'].iloc[-1]
                 rsi_anterior = df['RSI_14'].iloc[-2]
             except:
                 continue
             
-            logger.info(f"Monitorando {par} ({timeframe}): RSI {rsi_anterior:.2f} → {rsi_atual:.2f}")
+            resumo.registrar(par, rsi_anterior=float(rsi_anterior), rsi=float(rsi_atual))
             
             # Verificar crossover (saída de sobrevenda)
             crossover_confirmado = (
                 pd.notna(rsi_anterior) and pd.notna(rsi_atual) and
-                rsi_anterior <= 30 and
-                rsi_atual > 30 and
+                rsi_anterior <= parametros.rsi_limite and
+                rsi_atual > parametros.rsi_limite and
                 rsi_atual > rsi_anterior
             )
             
             if crossover_confirmado:
-                logger.warning(f"🚀 CROSSOVER CONFIRMADO PARA {par} ({timeframe})! RSI: {rsi_anterior:.2f} → {rsi_atual:.2f}")
+                logger.warning(f"🚀 CROSSOVER CONFIRMADO PARA {par} ({timeframe})! RSI: {rsi_anterior:.2f} → {rsi_atual:.2f}",
+                               extra={'evento': 'crossover', 'par': par, 'timeframe': timeframe, 'rsi': float(rsi_atual)})
                 
                 if not gestor_drawdown.pode_operar():
                     logger.warning("Bot pausado pelo gestor de drawdown. Operação cancelada.")
@@ -263,10 +298,10 @@ async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posi
                 
                 # AJUSTE: TP/SL específico por timeframe
                 if timeframe == '5m':
-                    # PRIMEIRO CICLO: TP fixo 5% e SL fixo 2.5%
-                    take_profit = preco_atual * 1.05  # +5%
-                    stop_loss = preco_atual * 0.975   # -2.5%
-                    sl_mode = f'TP Fixo 5% / SL Fixo 2.5% ({timeframe})'
+                    # PRIMEIRO CICLO: TP fixo (padrão 5%) e SL fixo (padrão 2.5%)
+                    take_profit = preco_atual * (1 + parametros.tp_fixo_5m_percent / 100)
+                    stop_loss = preco_atual * (1 - parametros.sl_fixo_5m_percent / 100)
+                    sl_mode = f'TP Fixo {parametros.tp_fixo_5m_percent:g}% / SL Fixo {parametros.sl_fixo_5m_percent:g}% ({timeframe})'
                     
                     sinal_final = {
                         'strategy_name': f'Momentum_Crossover_{timeframe}', 
@@ -275,15 +310,18 @@ async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posi
                         'stop_loss': stop_loss,
                         'take_profit': take_profit,  # TP fixo para 5m
                         'sl_mode': sl_mode,
-                        'timeframe': timeframe
+                        'timeframe': timeframe,
+                        'candle_ts': int(df['timestamp'].iloc[-1]),
+                        'detectado_em': relogio.timestamp()
                     }
                     
                 else:
                     # OUTROS CICLOS: TP dinâmico (RSI >= 70) e SL baseado em ATR
                     try:
-                        df.ta.atr(length=14, append=True)
+                        with span('indicador_atr'):
+                            df.ta.atr(length=14, append=True)
                         atr = df['ATR_14'].iloc[-1]
-                        stop_loss = preco_atual - (atr * 2) if pd.notna(atr) else preco_atual * 0.98
+                        stop_loss = preco_atual - (atr * parametros.sl_atr_multiplicador) if pd.notna(atr) else preco_atual * 0.98
                     except:
                         stop_loss = preco_atual * 0.98
                     
@@ -292,344 +330,339 @@ async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posi
                         'par': par, 
                         'preco_atual': preco_atual, 
                         'stop_loss': stop_loss,
-                        'sl_mode': f'ATR 2x ({timeframe})',
+                        'sl_mode': f'ATR {parametros.sl_atr_multiplicador:g}x ({timeframe})',
                         'timeframe': timeframe,
-                        'take_profit': 0  # TP dinâmico para 15m e 4h
+                        'take_profit': 0,  # TP dinâmico para 15m e 4h
+                        'candle_ts': int(df['timestamp'].iloc[-1]),
+                        'detectado_em': relogio.timestamp()
                     }
                 
-                resultado_ordem = executor.place_order(sinal_final)
-                
-                if resultado_ordem and "✅" in resultado_ordem:
-                    # Registrar posição para monitoramento
-                    posicoes_momentum[par] = {
-                        'timestamp': datetime.now(),
-                        'preco_entrada': preco_atual,
-                        'timeframe': timeframe,
-                        'tp_tipo': 'fixo' if timeframe == '5m' else 'dinamico'
-                    }
-                    
-                    # Registrar no histórico
-                    if par not in historico_operacoes:
-                        historico_operacoes[par] = {
-                            'primeira_operacao': datetime.now(),
-                            'operacoes': []
-                        }
-                    
-                    historico_operacoes[par]['operacoes'].append({
-                        'timestamp': datetime.now(),
-                        'timeframe': timeframe,
-                        'preco': preco_atual
-                    })
-                    
-                    del sinais_dict[par]
-                    
-                    cabecalho = f"*[Estratégia: {sinal_final['strategy_name']}]*\n"
-                    if sinal_final.get('sl_mode'): 
-                        cabecalho += f"Método SL/TP: *{sinal_final['sl_mode']}*\n"
-                    alerta_final = cabecalho + resultado_ordem
-                    await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta_final)
-                    
-                    logger.info(f"Ordem executada para {par} ({timeframe})")
-                else:
-                    logger.error(f"FALHA na execução da ordem para {par} ({timeframe}).")
+                sinais_para_executar.append(sinal_final)
                         
         except Exception as e:
             logger.error(f"Erro ao monitorar sinal {par} ({timeframe}): {e}")
+    
+    resumo.emitir(timeframe=timeframe)
+    
+    # Crossovers do mesmo ciclo são enviados em paralelo (um par por vez em cada símbolo)
+    for sinal_final, resultado_ordem in await pipeline_ordens.executar(executor, sinais_para_executar, posicoes_abertas):
+        par, preco_atual = sinal_final['par'], sinal_final['preco_atual']
+        if resultado_ordem and "✅" in resultado_ordem:
+            sincronizador_pnl.registrar_abertura(par, sinal_final['strategy_name'])
+            # Registrar posição para monitoramento
+            posicoes_momentum[par] = {
+                'timestamp': relogio.agora(),
+                'preco_entrada': preco_atual,
+                'timeframe': timeframe,
+                'tp_tipo': 'fixo' if timeframe == '5m' else 'dinamico'
+            }
+            
+            # Registrar no histórico
+            if par not in historico_operacoes:
+                historico_operacoes[par] = {
+                    'primeira_operacao': relogio.agora(),
+                    'operacoes': deque(maxlen=MAX_OPERACOES_POR_PAR)
+                }
+            
+            historico_operacoes[par]['operacoes'].append({
+                'timestamp': relogio.agora(),
+                'timeframe': timeframe,
+                'preco': preco_atual
+            })
+            
+            sinais_dict.pop(par, None)
+            
+            cabecalho = f"*[Estratégia: {sinal_final['strategy_name']}]*\n"
+            if sinal_final.get('sl_mode'): 
+                cabecalho += f"Método SL/TP: *{sinal_final['sl_mode']}*\n"
+            alerta_final = cabecalho + resultado_ordem
+            await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta_final)
+            
+            logger.info(f"Ordem executada para {par} ({timeframe})")
+        else:
+            logger.error(f"FALHA na execução da ordem para {par} ({timeframe}).")
 
-async def monitorar_tp_dinamico(executor, bot):
-    """Monitora TP dinâmico apenas para posições de 15m e 4h"""
-    if not posicoes_momentum:
-        return
+async def executar_ciclo(executor, bot, orcamento=None):
+    """Executa um ciclo completo do robô. Retorna quantos segundos aguardar até o próximo.
+
+    Etapas em ordem de prioridade dentro do prazo do ciclo: saldo, posições e TP
+    dinâmico sempre completos; crossovers pendentes; por fim as varreduras de novos
+    candidatos, que param no prazo e retomam no ciclo seguinte. `orcamento` substitui
+    o prazo padrão (ex.: src/carga.py mede cada etapa sem prazo).
+    """
+    if orcamento is None:
+        orcamento = OrcamentoCiclo(settings.cycle_deadline)
+    parametros = gerenciador_parametros.atual
+    # Verificar equity e drawdown (REST apenas se o cache do motor estiver velho)
+    with orcamento.etapa('saldo'):
+        try:
+            executor.equity.sincronizar()
+            alerta_drawdown = executor.equity.consumir_alerta()
+            if alerta_drawdown:
+                await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta_drawdown)
+        except Exception as e:
+            logger.debug(f"Erro ao verificar saldo: {e}")
     
-    # Filtrar apenas posições que NÃO são de 5m (que têm TP fixo)
-    posicoes_tp_dinamico = {par: info for par, info in posicoes_momentum.items() 
-                           if info.get('timeframe') != '5m'}
+    # TPs, SLs e fechamentos desde o último ciclo: diário de trades e sequência de perdas
+    with orcamento.etapa('sincronizar_pnl'):
+        for alerta in sincronizador_pnl.sincronizar(executor.session):
+            await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta)
     
-    if not posicoes_tp_dinamico:
-        return
+    if not gestor_drawdown.pode_operar():
+        logger.warning("Bot pausado pelo gestor de drawdown.")
+        return 300  # Aguardar 5 minutos
     
-    logger.info(f"--- Monitorando {len(posicoes_tp_dinamico)} posições para TP Dinâmico (RSI >= 70) ---")
+    # Obter posições abertas
+    with orcamento.etapa('posicoes'):
+        posicoes_abertas = executor.get_open_positions()
     
-    for par, info in list(posicoes_tp_dinamico.items()):
-        try:
-            # Verificar se posição ainda existe na exchange
-            posicoes_abertas = executor.get_open_positions()
-            posicao_existe = any(pos == par for pos in posicoes_abertas)
-            
-            if not posicao_existe:
-                logger.warning(f"Posição {par} não encontrada na exchange. Removendo do monitoramento.")
-                del posicoes_momentum[par]
-                continue
-            
-            # Obter dados de 5min para RSI usando Bybit
-            df_5m = obter_klines_bybit_para_rsi(executor.session, par, interval='5', limit=20)
-            if df_5m.empty or len(df_5m) < 15:
-                continue
-            
-            # Calcular RSI
-            try:
-                df_5m.ta.rsi(length=14, append=True)
-                rsi_atual = df_5m['RSI_14'].iloc[-1]
-            except:
-                continue
-            
-            logger.info(f"Monitorando TP para {par} ({info.get('timeframe', 'N/A')}): RSI atual é {rsi_atual:.2f}")
-            
-            # Verificar condição de TP dinâmico
-            if pd.notna(rsi_atual) and rsi_atual >= 70:
-                logger.warning(f"🎯 TP DINÂMICO ATIVADO PARA {par}! RSI: {rsi_atual:.2f}")
-                
-                resultado_fechamento = executor.close_position(par, "Buy")
-                
-                if resultado_fechamento and "sucesso" in resultado_fechamento.lower():
-                    await enviar_alerta_telegram(bot, settings.telegram_chat_id, 
-                        f"🎯 *TP DINÂMICO EXECUTADO*\n{resultado_fechamento}")
-                    
-                    # Promover para próximo timeframe após TP bem-sucedido
-                    timeframe_atual = info.get('timeframe', '5m')
-                    promover_para_proximo_timeframe(par, timeframe_atual)
-                    
-                    del posicoes_momentum[par]
-                    logger.info(f"Posição {par} fechada com sucesso e promovida para próximo timeframe.")
-                else:
-                    logger.error(f"FALHA ao fechar posição {par}. Mantendo no monitoramento.")
-                        
-        except Exception as e:
-            logger.error(f"Erro ao monitorar TP dinâmico para {par}: {e}")
-
-async def monitorar_sinais_timeframe(executor, bot, sinais_dict, timeframe, posicoes_abertas):
-    """Monitora sinais de um timeframe específico usando apenas Bybit"""
-    if not sinais_dict:
-        return
-        
-    logger.info(f"--- Monitorando {len(sinais_dict)} sinais pendentes em {timeframe} ---")
+    # Cada etapa declara os klines de que precisa, em ordem de prioridade; cada
+    # (par, intervalo) é buscado uma única vez, com o maior lookback pedido. Os
+    # monitores recebem os seus antes; as varreduras são buscadas depois deles
+    with orcamento.etapa('dados_monitores'):
+        tickers = obter_tickers_bybit(executor.session)
+        plano_dados.exigir('monitor_tp', [Requisito(par, '5', 20) for par, info in posicoes_momentum.items()
+                                          if info.get('timeframe') != '5m'])
+        for sinais_dict, timeframe in ((sinais_pendentes_5m, '5m'), (sinais_pendentes_15m, '15m'), (sinais_pendentes_4h, '4h')):
+            plano_dados.exigir(f'monitor_{timeframe}', [Requisito(par, INTERVALOS_MONITOR[timeframe], 50)
+                                                        for par in sinais_dict if par not in posicoes_abertas])
+        plano_dados.exigir('momentum', requisitos_momentum(tickers, parametros.valorizacao_minima_percent,
+                                                           planejador_varredura))
+        plano_dados.exigir('fibonacci', requisitos_fibonacci(tickers, parametros.num_pares_liquidez,
+                                                             parametros.timeframes_fibonacci, planejador_varredura))
+        instantaneo = await plano_dados.executar(executor.session, tickers, orcamento,
+                                                 consumidores=CONSUMIDORES_MONITOR, etapa='dados_monitores')
     
-    sinais_para_processar = list(sinais_dict.items())
+    # Monitorar TP dinâmico (apenas para 15m e 4h)
+    with orcamento.etapa('monitor_tp'):
+        await monitorar_tp_dinamico(executor, bot, instantaneo)
     
-    for par, info in sinais_para_processar:
-        try:
-            # Verificar se já existe posição
-            if par in posicoes_abertas:
-                logger.info(f"Sinal {par} ({timeframe}) removido - posição já existe.")
-                del sinais_dict[par]
-                continue
-            
-            # Verificar timeout baseado no timeframe
-            timeout_map = {'5m': 900, '15m': 1800, '4h': 7200}  # 15min, 30min, 2h
-            timeout = timeout_map.get(timeframe, 900)
-            
-            if (datetime.now() - info['timestamp']).total_seconds() > timeout:
-                logger.info(f"Sinal {par} ({timeframe}) expirou após {timeout}s.")
-                del sinais_dict[par]
-                continue
-            
-            # Verificar reset de 24h
-            if 'primeira_operacao' in info:
-                if verificar_reset_timeframe(par, info['primeira_operacao']):
-                    logger.info(f"Reset de 24h para {par}. Removendo de todos os timeframes.")
-                    # Remover de todos os timeframes
-                    sinais_pendentes_5m.pop(par, None)
-                    sinais_pendentes_15m.pop(par, None)
-                    sinais_pendentes_4h.pop(par, None)
-                    continue
-                
-            # Mapear timeframe para intervalo da Bybit
-            interval_map = {'5m': '5', '15m': '15', '4h': '240'}
-            interval = interval_map.get(timeframe, '5')
-            
-            # Obter dados do timeframe apropriado da Bybit
-            df = obter_klines_bybit_para_rsi(executor.session, par, interval=interval, limit=50)
-            if df.empty or len(df) < 15:
-                continue
-            
-            # Calcular RSI
-            try:
-                df.ta.rsi(length=14, append=True)
-                rsi_atual = df['RSI_14'].iloc[-1]
-                rsi_anterior = df['RSI_14'].iloc[-2]
-            except:
-                continue
-            
-            logger.info(f"Monitorando {par} ({timeframe}): RSI {rsi_anterior:.2f} → {rsi_atual:.2f}")
-            
-            # Verificar crossover (saída de sobrevenda)
-            crossover_confirmado = (
-                pd.notna(rsi_anterior) and pd.notna(rsi_atual) and
-                rsi_anterior <= 30 and
-                rsi_atual > 30 and
-                rsi_atual > rsi_anterior
-            )
-            
-            if crossover_confirmado:
-                logger.warning(f"🚀 CROSSOVER CONFIRMADO PARA {par} ({timeframe})! RSI: {rsi_anterior:.2f} → {rsi_atual:.2f}")
-                
-                if not gestor_drawdown.pode_operar():
-                    logger.warning("Bot pausado pelo gestor de drawdown. Operação cancelada.")
-                    continue
-                
-                preco_atual = df['close'].iloc[-1]
-                
-                # AJUSTE: TP/SL específico por timeframe
-                if timeframe == '5m':
-                    # PRIMEIRO CICLO: TP fixo 5% e SL fixo 2.5%
-                    take_profit = preco_atual * 1.05  # +5%
-                    stop_loss = preco_atual * 0.975   # -2.5%
-                    sl_mode = f'TP Fixo 5% / SL Fixo 2.5% ({timeframe})'
-                    
-                    sinal_final = {
-                        'strategy_name': f'Momentum_Crossover_{timeframe}', 
-                        'par': par, 
-                        'preco_atual': preco_atual, 
-                        'stop_loss': stop_loss,
-                        'take_profit': take_profit,  # TP fixo para 5m
-                        'sl_mode': sl_mode,
-                        'timeframe': timeframe
-                    }
-                    
-                else:
-                    # OUTROS CICLOS: TP dinâmico (RSI >= 70) e SL baseado em ATR
-                    try:
-                        df.ta.atr(length=14, append=True)
-                        atr = df['ATR_14'].iloc[-1]
-                        stop_loss = preco_atual - (atr * 2) if pd.notna(atr) else preco_atual * 0.98
-                    except:
-                        stop_loss = preco_atual * 0.98
-                    
-                    sinal_final = {
-                        'strategy_name': f'Momentum_Crossover_{timeframe}', 
-                        'par': par, 
-                        'preco_atual': preco_atual, 
-                        'stop_loss': stop_loss,
-                        'sl_mode': f'ATR 2x ({timeframe})',
-                        'timeframe': timeframe,
-                        'take_profit': 0  # TP dinâmico para 15m e 4h
-                    }
+    # Monitorar sinais pendentes em todos os timeframes
+    with orcamento.etapa('monitor_5m'):
+        await monitorar_sinais_timeframe(executor, bot, 
+            sinais_pendentes_5m, '5m', posicoes_abertas, orcamento, instantaneo)
+    with orcamento.etapa('monitor_15m'):
+        await monitorar_sinais_timeframe(executor, bot, 
+            sinais_pendentes_15m, '15m', posicoes_abertas, orcamento, instantaneo)
+    with orcamento.etapa('monitor_4h'):
+        await monitorar_sinais_timeframe(executor, bot, 
+            sinais_pendentes_4h, '4h', posicoes_abertas, orcamento, instantaneo)
+    
+    # Klines das varreduras, reaproveitando o que os monitores já buscaram
+    with orcamento.etapa('dados_mercado'):
+        instantaneo = await plano_dados.executar(executor.session, tickers, orcamento, anterior=instantaneo)
+    
+    # Argumentos das estratégias, repassados também às versões em modo sombra
+    argumentos = {
+        'momentum': {'rsi_limite': parametros.rsi_limite,
+                     'valorizacao_minima_percent': parametros.valorizacao_minima_percent},
+        'fibonacci': {'num_pares_liquidez': parametros.num_pares_liquidez,
+                      'timeframes': parametros.timeframes_fibonacci,
+                      'confianca_minima': parametros.confianca_minima,
+                      'extensao_tp': parametros.extensao_tp_fibonacci},
+    }
+    novos_sinais_momentum, novos_sinais_fibonacci = [], []
+    
+    # Buscar novos candidatos (apenas para 5m - início do ciclo), com no máximo
+    # metade do prazo restante para não deixar o Fibonacci sem tempo
+    try:
+        with orcamento.etapa('varredura_momentum'):
+            novos_sinais_momentum = await analisar_momentum_pullback(executor.session, planejador=planejador_varredura,
+                                                                      orcamento=orcamento.fatia(0.5), instantaneo=instantaneo,
+                                                                      pool=pool_calculo, **argumentos['momentum'])
+        for sinal in novos_sinais_momentum:
+            par = sinal['par']
+            if (par not in sinais_pendentes_5m and 
+                par not in sinais_pendentes_15m and 
+                par not in sinais_pendentes_4h and 
+                par not in posicoes_abertas):
                 
-                resultado_ordem = executor.place_order(sinal_final)
+                sinais_pendentes_5m[par] = {
+                    'timestamp': relogio.agora(),
+                    'strategy_name': 'Momentum_Crossover_5m',
+                    'timeframe': '5m'
+                }
+                logger.info(f"🔍 NOVO CANDIDATO: {par} sobrevendido em 5m. Aguardando crossover.")
                 
+    except Exception as e:
+        logger.error(f"Erro ao buscar candidatos Momentum: {e}")
+    
+    # Executar estratégia Fibonacci (independente dos timeframes escalonados)
+    try:
+        with orcamento.etapa('varredura_fibonacci'):
+            novos_sinais_fibonacci = await analisar_fibonacci(executor.session, planejador=planejador_varredura,
+                                                               orcamento=orcamento, instantaneo=instantaneo,
+                                                               pool=pool_calculo, **argumentos['fibonacci'])
+        # Sinais já encontrados são enviados mesmo com o prazo vencido
+        with orcamento.etapa('ordens_fibonacci'):
+            sinais_novos = [sinal for sinal in novos_sinais_fibonacci if sinal['par'] not in posicoes_abertas]
+            for sinal, resultado_ordem in await pipeline_ordens.executar(executor, sinais_novos, posicoes_abertas):
                 if resultado_ordem and "✅" in resultado_ordem:
-                    # Registrar posição para monitoramento
-                    posicoes_momentum[par] = {
-                        'timestamp': datetime.now(),
-                        'preco_entrada': preco_atual,
-                        'timeframe': timeframe,
-                        'tp_tipo': 'fixo' if timeframe == '5m' else 'dinamico'
-                    }
-                    
-                    # Registrar no histórico
-                    if par not in historico_operacoes:
-                        historico_operacoes[par] = {
-                            'primeira_operacao': datetime.now(),
-                            'operacoes': []
-                        }
-                    
-                    historico_operacoes[par]['operacoes'].append({
-                        'timestamp': datetime.now(),
-                        'timeframe': timeframe,
-                        'preco': preco_atual
-                    })
-                    
-                    del sinais_dict[par]
-                    
-                    cabecalho = f"*[Estratégia: {sinal_final['strategy_name']}]*\n"
-                    if sinal_final.get('sl_mode'): 
-                        cabecalho += f"Método SL/TP: *{sinal_final['sl_mode']}*\n"
+                    sincronizador_pnl.registrar_abertura(sinal['par'], sinal['strategy_name'])
+                    cabecalho = f"*[Estratégia: {sinal['strategy_name']}]*\n"
+                    if sinal.get('confianca'): 
+                        cabecalho += f"Confiança: *{sinal['confianca']}*\n"
+                    if sinal.get('sl_mode'): 
+                        cabecalho += f"Método SL/TP: *{sinal['sl_mode']}*\n"
                     alerta_final = cabecalho + resultado_ordem
                     await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta_final)
                     
-                    logger.info(f"Ordem executada para {par} ({timeframe})")
-                else:
-                    logger.error(f"FALHA na execução da ordem para {par} ({timeframe}).")
-                        
+    except Exception as e:
+        logger.error(f"Erro ao executar estratégia Fibonacci: {e}")
+    
+    # Versões candidatas sobre o mesmo instantâneo, sem enviar ordens
+    if modo_sombra.ativo:
+        with orcamento.etapa('sombra'):
+            await modo_sombra.executar(instantaneo, {'momentum': novos_sinais_momentum,
+                                                     'fibonacci': novos_sinais_fibonacci}, argumentos, orcamento)
+    
+    orcamento.encerrar()
+    logger.info(f"📊 Status: 5m({len(sinais_pendentes_5m)}) | 15m({len(sinais_pendentes_15m)}) | 4h({len(sinais_pendentes_4h)}) | Posições({len(posicoes_momentum)})")
+    return 60
+
+def podar_estado():
+    """Remove do estado em memória o que não é mais consultado, para que o uso de
+    memória não cresça com o tempo de execução. Retorna quantos itens saíram de cada estrutura."""
+    agora = relogio.agora()
+    inativos = [par for par, historico in historico_operacoes.items()
+                if not historico['operacoes'] or agora - historico['operacoes'][-1]['timestamp'] > RETENCAO_HISTORICO]
+    for par in inativos:
+        del historico_operacoes[par]
+    return {
+        'historico_operacoes': len(inativos),
+        'cache_resultados': cache_resultados.podar(RETENCAO_CACHES_MS),
+        'rastreadores_pivos': podar_rastreadores(RETENCAO_CACHES_MS),
+        'planejador_varredura': planejador_varredura.podar(),
+        'sombra': modo_sombra.podar(RETENCAO_CACHES_MS),
+    }
+
+def estado_em_memoria():
+    return {
+        'sinais_pendentes_5m': len(sinais_pendentes_5m),
+        'sinais_pendentes_15m': len(sinais_pendentes_15m),
+        'sinais_pendentes_4h': len(sinais_pendentes_4h),
+        'posicoes_momentum': len(posicoes_momentum),
+        'historico_operacoes': sum(len(h['operacoes']) for h in historico_operacoes.values()),
+        'cache_resultados': len(cache_resultados),
+        'rastreadores_pivos': len(rastreadores_pivos),
+        'planejador_varredura': len(planejador_varredura.ultima_varredura),
+        'sombra': modo_sombra.itens(),
+        'disjuntor_simbolos': len(disjuntor_simbolos),
+    }
+
+async def acompanhar_equity(executor, bot, stream_precos, intervalo=None):
+    """Mantém a equity atualizada entre os ciclos.
+
+    Com o WebSocket ativo, cada tick já atualiza o motor (e pausa o robô) na thread
+    do stream; aqui só são feitas as assinaturas das novas posições. Sem WebSocket,
+    uma única chamada `get_tickers` a cada `intervalo` segundos atualiza todas as posições.
+    """
+    if intervalo is None:
+        intervalo = float(os.getenv('EQUITY_INTERVALO_S', '5'))
+    motor = executor.equity
+    while True:
+        try:
+            motor.sincronizar()
+            simbolos = motor.simbolos_abertos()
+            if stream_precos.ativo:
+                stream_precos.assinar(simbolos)
+            elif simbolos:
+                resposta = executor.session.get_tickers(category="linear")
+                if resposta['retCode'] == 0:
+                    motor.atualizar_tickers(resposta['result']['list'])
+            alerta = motor.consumir_alerta()
+            if alerta:
+                await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta)
         except Exception as e:
-            logger.error(f"Erro ao monitorar sinal {par} ({timeframe}): {e}")
+            logger.error(f"Erro ao acompanhar equity: {e}")
+        await relogio.dormir_async(intervalo)
+
+def registrar_gatilho_captura():
+    """SIGUSR1 liga a captura de spans/perfil para os próximos ciclos, sem reiniciar o container."""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, solicitar_captura)
+        logger.info("Captura de spans disponível via SIGUSR1 (docker kill -s USR1 trading_robot).")
+    except (NotImplementedError, AttributeError, RuntimeError) as e:
+        logger.debug(f"Sinal de captura indisponível nesta plataforma: {e}")
 
-async def main_loop():
+def registrar_gatilho_recarga():
+    """SIGHUP força a releitura do arquivo de parâmetros antes do próximo ciclo."""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, gerenciador_parametros.solicitar_recarga)
+        logger.info(f"Recarga de parâmetros via SIGHUP ou edição de {gerenciador_parametros.caminho}.")
+    except (NotImplementedError, AttributeError, RuntimeError) as e:
+        logger.debug(f"Sinal de recarga indisponível nesta plataforma: {e}")
+
+async def main_loop(executor=None, bot=None, max_ciclos=None, ao_fim_ciclo=None):
+    """Loop principal. `executor`/`bot` podem ser injetados (ex.: simulador),
+    `max_ciclos` limita a execução e `ao_fim_ciclo(ciclo)` é chamado após cada
+    ciclo (ex.: soak test); em produção todos ficam no padrão."""
     logger.info("🚀 Inicializando loop principal com timeframes escalonados - APENAS BYBIT...")
+    # Em tempo virtual, o relógio espera os ciclos (inclusive o aquecimento) terminarem
+    relogio.participar()
     
-    executor = BybitExecutor()
-    bot = telegram.Bot(token=settings.telegram_token)
+    producao = executor is None
+    if producao:
+        executor = BybitExecutor()
+        iniciar_servidor_metricas()
+    if bot is None:
+        bot = telegram.Bot(token=settings.telegram_token)
+    
+    # Equity com PnL não realizado: WebSocket de preços só em produção
+    executor.equity.conectar_gestor(gestor_drawdown)
+    stream_precos = StreamPrecos(executor.equity, ativar=producao)
+    tarefa_equity = asyncio.create_task(acompanhar_equity(executor, bot, stream_precos))
+    vigia = VigiaLoop(limiar=float(os.getenv('LOOP_BLOQUEIO_LIMIAR_S', '1.0')))
+    tarefa_vigia = asyncio.create_task(vigia.executar())
+    monitor_memoria = MonitorMemoria(intervalo_s=float(os.getenv('MEMORIA_INTERVALO_S', '300')),
+                                     tracemalloc_ativo=os.getenv('MEMORIA_TRACEMALLOC', 'false').lower() == 'true')
+    registrar_gatilho_captura()
+    registrar_gatilho_recarga()
+
+    # Risco por operação recarregável: vale para o dimensionamento e para o orçamento de risco
+    def aplicar_risco(parametros):
+        executor.risk_per_trade = parametros.risk_per_trade_percent / 100
+        pipeline_ordens.risco_por_operacao = parametros.risk_per_trade_percent
+    gerenciador_parametros.ouvintes.append(aplicar_risco)
+    gerenciador_parametros.verificar()
+    if os.getenv('TRACE_CAPTURE_ON_START', 'false').lower() == 'true':
+        solicitar_captura()
+    
+    # O primeiro ciclo já começa com saldo, posições, instrumentos e pivôs carregados
+    aquecimento = await aquecer(executor, plano_dados, gerenciador_parametros.atual, settings.warmup_deadline)
     
     # Enviar mensagem de inicialização
     await enviar_alerta_telegram(bot, settings.telegram_chat_id, 
-        "🤖 *BOT INICIADO - BYBIT ONLY*\nSistema de timeframes escalonados ativo\n5m (TP Fixo 5%) → 15m (TP Dinâmico) → 4h (TP Dinâmico)")
+        "🤖 *BOT INICIADO - BYBIT ONLY*\nSistema de timeframes escalonados ativo\n5m (TP Fixo 5%) → 15m (TP Dinâmico) → 4h (TP Dinâmico)\n"
+        f"Aquecimento: {aquecimento['duracao_s']:.1f}s ({aquecimento['series']} séries de klines)")
     
-    while True:
+    ciclos = 0
+    while max_ciclos is None or ciclos < max_ciclos:
+        ciclos += 1
+        # Novos parâmetros só entram aqui, entre ciclos; sinais, posições e caches são mantidos
+        mudancas = gerenciador_parametros.verificar()
+        if mudancas:
+            resumo_mudancas = '\n'.join(f"{nome}: {antes} → {depois}" for nome, (antes, depois) in mudancas.items())
+            await enviar_alerta_telegram(bot, settings.telegram_chat_id, f"⚙️ *PARÂMETROS RECARREGADOS*\n{resumo_mudancas}")
+        iniciar_ciclo()
         try:
-            # Verificar saldo e drawdown
-            try:
-                saldo_atual = executor.get_margin_balance()
-                if saldo_atual:
-                    alerta_drawdown = gestor_drawdown.atualizar_saldo(saldo_atual)
-                    if alerta_drawdown:
-                        await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta_drawdown)
-            except Exception as e:
-                logger.debug(f"Erro ao verificar saldo: {e}")
-            
-            if not gestor_drawdown.pode_operar():
-                logger.warning("Bot pausado pelo gestor de drawdown.")
-                await asyncio.sleep(300)  # Aguardar 5 minutos
-                continue
-            
-            # Obter posições abertas
-            posicoes_abertas = executor.get_open_positions()
-            
-            # Monitorar TP dinâmico (apenas para 15m e 4h)
-            await monitorar_tp_dinamico(executor, bot)
-            
-            # Monitorar sinais pendentes em todos os timeframes
-            await monitorar_sinais_timeframe(executor, bot, 
-                sinais_pendentes_5m, '5m', posicoes_abertas)
-            await monitorar_sinais_timeframe(executor, bot, 
-                sinais_pendentes_15m, '15m', posicoes_abertas)
-            await monitorar_sinais_timeframe(executor, bot, 
-                sinais_pendentes_4h, '4h', posicoes_abertas)
-            
-            # Buscar novos candidatos (apenas para 5m - início do ciclo)
-            try:
-                novos_sinais_momentum = analisar_momentum_pullback(executor.session, rsi_limite=30, valorizacao_minima_percent=3.0)
-                for sinal in novos_sinais_momentum:
-                    par = sinal['par']
-                    if (par not in sinais_pendentes_5m and 
-                        par not in sinais_pendentes_15m and 
-                        par not in sinais_pendentes_4h and 
-                        par not in posicoes_abertas):
-                        
-                        sinais_pendentes_5m[par] = {
-                            'timestamp': datetime.now(),
-                            'strategy_name': 'Momentum_Crossover_5m',
-                            'timeframe': '5m'
-                        }
-                        logger.info(f"🔍 NOVO CANDIDATO: {par} sobrevendido em 5m. Aguardando crossover.")
-                        
-            except Exception as e:
-                logger.error(f"Erro ao buscar candidatos Momentum: {e}")
-            
-            # Executar estratégia Fibonacci (independente dos timeframes escalonados)
-            try:
-                novos_sinais_fibonacci = analisar_fibonacci(executor.session, num_pares_liquidez=100, timeframes=['60', '240'], confianca_minima=8)
-                for sinal in novos_sinais_fibonacci:
-                    par = sinal['par']
-                    if par not in posicoes_abertas:
-                        resultado_ordem = executor.place_order(sinal)
-                        if resultado_ordem and "✅" in resultado_ordem:
-                            cabecalho = f"*[Estratégia: {sinal['strategy_name']}]*\n"
-                            if sinal.get('confianca'): 
-                                cabecalho += f"Confiança: *{sinal['confianca']}*\n"
-                            if sinal.get('sl_mode'): 
-                                cabecalho += f"Método SL/TP: *{sinal['sl_mode']}*\n"
-                            alerta_final = cabecalho + resultado_ordem
-                            await enviar_alerta_telegram(bot, settings.telegram_chat_id, alerta_final)
-                            
-            except Exception as e:
-                logger.error(f"Erro ao executar estratégia Fibonacci: {e}")
-            
-            logger.info(f"📊 Status: 5m({len(sinais_pendentes_5m)}) | 15m({len(sinais_pendentes_15m)}) | 4h({len(sinais_pendentes_4h)}) | Posições({len(posicoes_momentum)})")
-            await asyncio.sleep(60)
-            
+            with span('ciclo'):
+                espera = await executar_ciclo(executor, bot)
         except Exception as e:
             logger.error(f"Erro no loop principal: {e}")
-            await asyncio.sleep(60)
+            espera = 60
+        finalizar_ciclo()
+        if monitor_memoria.devido():
+            removidos = podar_estado()
+            logger.debug(f"Estado podado: {removidos}")
+            monitor_memoria.coletar(estado_em_memoria())
+        if ao_fim_ciclo is not None:
+            ao_fim_ciclo(ciclos)
+        await relogio.dormir_async(espera)
+    
+    tarefa_equity.cancel()
+    tarefa_vigia.cancel()
+    pool_calculo.encerrar()
 
 if __name__ == "__main__":
     try:
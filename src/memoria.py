@@ -0,0 +1,65 @@
+# src/memoria.py (Versão 1.0 - Relatório Periódico de Memória)
+
+import os
+import resource
+import tracemalloc
+
+from src import relogio
+from src.utils import logger
+from src.metricas import memoria_rss, memoria_python, itens_estado
+
+def rss_bytes():
+    """RSS atual do processo. Sem /proc (ex.: macOS), usa o pico do getrusage."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class MonitorMemoria:
+    """Exporta RSS e tamanho das estruturas de estado a cada `intervalo_s`.
+
+    Com `tracemalloc_ativo` (MEMORIA_TRACEMALLOC=true) também exporta a memória
+    alocada pelo Python e registra no log as `top` linhas de código que mais
+    cresceram desde o relatório anterior. O tracemalloc custa CPU, por isso fica
+    desligado por padrão.
+    """
+
+    def __init__(self, intervalo_s=300, tracemalloc_ativo=False, top=10):
+        self.intervalo_s = intervalo_s
+        self.tracemalloc_ativo = tracemalloc_ativo
+        self.top = top
+        self.ultimo_relatorio = None
+        self._snapshot_anterior = None
+        if tracemalloc_ativo and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+
+    def devido(self):
+        return self.ultimo_relatorio is None or relogio.timestamp() - self.ultimo_relatorio >= self.intervalo_s
+
+    def coletar(self, estruturas):
+        """`estruturas` mapeia nome -> número de itens. Retorna o relatório emitido."""
+        self.ultimo_relatorio = relogio.timestamp()
+        rss = rss_bytes()
+        memoria_rss.set(rss)
+        relatorio = {'rss_mb': round(rss / 2**20, 1)}
+        for nome, itens in estruturas.items():
+            itens_estado.labels(estrutura=nome).set(itens)
+
+        if self.tracemalloc_ativo:
+            atual, pico = tracemalloc.get_traced_memory()
+            memoria_python.set(atual)
+            relatorio['python_mb'] = round(atual / 2**20, 1)
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            ])
+            if self._snapshot_anterior is not None:
+                for diferenca in snapshot.compare_to(self._snapshot_anterior, 'lineno')[:self.top]:
+                    if diferenca.size_diff > 0:
+                        logger.debug(f"Crescimento de memória: {diferenca}")
+            self._snapshot_anterior = snapshot
+
+        logger.info(f"Memória: {relatorio} | Estado: {estruturas}",
+                    extra={'evento': 'relatorio_memoria', **relatorio, 'estado': estruturas})
+        return relatorio
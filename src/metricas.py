@@ -0,0 +1,94 @@
+# src/metricas.py (Versão 1.0 - Métricas Prometheus do Robô)
+
+import os
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from src.utils import logger
+
+# Duração de cada etapa rastreada (ver src/rastreamento.py)
+span_duracao = Histogram(
+    'robo_span_duracao_segundos',
+    'Duração das etapas rastreadas do robô',
+    ['span'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+# Equity (saldo + PnL não realizado) e drawdown a partir do pico (ver src/equity.py)
+equity_usdt = Gauge('robo_equity_usdt', 'Equity da conta incluindo PnL não realizado')
+drawdown_atual = Gauge('robo_drawdown_ratio', 'Drawdown atual da equity em relação ao pico')
+
+# Ledger de execuções (ver src/registro_execucoes.py)
+latencia_execucao = Histogram(
+    'robo_latencia_candle_execucao_segundos',
+    'Tempo do fechamento do candle analisado até a execução confirmada',
+    ['estrategia', 'timeframe'],
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800, 3600)
+)
+slippage_execucao = Histogram(
+    'robo_slippage_bps',
+    'Diferença entre preço executado e preço do sinal, em pontos-base',
+    ['estrategia', 'timeframe'],
+    buckets=(-50, -20, -10, -5, -2, 0, 2, 5, 10, 20, 50, 100, 200)
+)
+
+# Atraso do event loop e bloqueios detectados (ver src/vigia_loop.py)
+atraso_loop = Histogram(
+    'robo_event_loop_atraso_segundos',
+    'Atraso do event loop em relação ao despertar agendado',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+bloqueios_loop = Counter(
+    'robo_event_loop_bloqueios_total',
+    'Bloqueios do event loop acima do limiar, pela função do robô responsável',
+    ['funcao']
+)
+
+# Prazo dos ciclos (ver src/orcamento_ciclo.py)
+estouros_ciclo = Counter('robo_ciclo_estouros_total', 'Ciclos que terminaram após o prazo')
+etapas_truncadas = Counter(
+    'robo_etapas_truncadas_total',
+    'Etapas interrompidas por falta de prazo no ciclo',
+    ['etapa']
+)
+
+# Memória do processo e tamanho do estado em memória (ver src/memoria.py)
+memoria_rss = Gauge('robo_memoria_rss_bytes', 'Memória residente (RSS) do processo')
+memoria_python = Gauge('robo_memoria_python_bytes', 'Memória alocada pelo Python segundo o tracemalloc')
+itens_estado = Gauge('robo_estado_itens', 'Itens em cada estrutura de estado em memória', ['estrutura'])
+
+# Cache de resultados das estratégias (ver src/cache_resultados.py)
+consultas_cache_estrategias = Counter(
+    'robo_cache_estrategias_total',
+    'Consultas ao cache de resultados das estratégias',
+    ['estrategia', 'resultado']
+)
+
+# Estratégias em modo sombra (ver src/sombra.py)
+sombra_cpu = Gauge('robo_sombra_cpu_segundos', 'CPU gasta pela versão sombra no último ciclo', ['versao'])
+sombra_memoria_pico = Gauge('robo_sombra_memoria_pico_bytes', 'Pico de memória alocada pela versão sombra no último ciclo', ['versao'])
+sombra_sinais = Counter('robo_sombra_sinais_total', 'Sinais hipotéticos emitidos pela versão sombra', ['versao'])
+
+# Disjuntores por símbolo (ver src/disjuntor.py)
+simbolos_disjuntor = Gauge('robo_disjuntor_simbolos', 'Símbolos com o disjuntor aberto ou em teste', ['estado'])
+pulos_disjuntor = Counter('robo_disjuntor_pulos_total', 'Consultas de símbolos puladas por disjuntor aberto')
+
+# Ordens sem resposta da corretora: encontradas pelo orderLinkId ou reenviadas (ver src/bybit_executor.py)
+reenvios_ordem = Counter('robo_ordens_reenvio_total', 'Envios de ordem sem resposta da corretora, por desfecho', ['resultado'])
+
+# Duração do aquecimento na inicialização (ver src/aquecimento.py)
+duracao_aquecimento = Gauge('robo_aquecimento_segundos', 'Duração do aquecimento do estado na inicialização')
+
+# Operações fechadas sincronizadas da Bybit (ver src/sincronizacao_pnl.py)
+operacoes_fechadas = Counter(
+    'robo_operacoes_fechadas_total',
+    'Operações fechadas gravadas no diário de trades',
+    ['estrategia', 'resultado']
+)
+
+def iniciar_servidor_metricas():
+    """Expõe /metrics para o Prometheus na porta METRICS_PORT (padrão 8000)."""
+    porta = int(os.getenv('METRICS_PORT', '8000'))
+    try:
+        start_http_server(porta)
+        logger.info(f"Servidor de métricas Prometheus ativo na porta {porta}")
+    except OSError as e:
+        logger.error(f"Falha ao iniciar servidor de métricas na porta {porta}: {e}")
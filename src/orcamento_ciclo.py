@@ -0,0 +1,69 @@
+# src/orcamento_ciclo.py (Versão 1.0 - Prazo por Ciclo com Etapas Priorizadas)
+
+from contextlib import contextmanager
+
+from src import relogio
+from src.utils import logger
+from src.rastreamento import span
+from src.metricas import estouros_ciclo, etapas_truncadas
+
+class OrcamentoCiclo:
+    """Prazo de um ciclo do robô (no relógio do robô, para valer também na simulação).
+
+    As etapas rodam em ordem de prioridade: monitores de posição/TP sempre até o
+    fim; checagens de crossover só são truncadas com o prazo já vencido; varreduras
+    de novos candidatos param assim que o prazo (ou a fatia que receberam) acaba, e
+    o que ficou pendente é retomado no ciclo seguinte.
+    """
+
+    def __init__(self, prazo_s, pai=None):
+        self.prazo_s = prazo_s
+        self.inicio = relogio.timestamp()
+        self.pai = pai
+        self.duracoes = {}
+        self.truncadas = {}
+
+    def decorrido(self):
+        return relogio.timestamp() - self.inicio
+
+    def restante(self):
+        return self.prazo_s - self.decorrido()
+
+    def esgotado(self):
+        return self.restante() <= 0 or (self.pai is not None and self.pai.esgotado())
+
+    def fatia(self, fracao):
+        """Sub-prazo com `fracao` do tempo restante, para que uma etapa não consuma o das seguintes."""
+        return OrcamentoCiclo(max(self.restante(), 0.0) * fracao, pai=self)
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = relogio.timestamp()
+        try:
+            with span(nome):
+                yield
+        finally:
+            self.duracoes[nome] = relogio.timestamp() - inicio
+
+    def truncar(self, etapa, pendentes):
+        """Registra que `etapa` parou com `pendentes` itens para o próximo ciclo."""
+        if self.pai is not None:
+            self.pai.truncar(etapa, pendentes)
+            return
+        self.truncadas[etapa] = self.truncadas.get(etapa, 0) + pendentes
+        etapas_truncadas.labels(etapa=etapa).inc()
+        logger.warning(f"Prazo do ciclo esgotado: {etapa} interrompida com {pendentes} itens pendentes",
+                       extra={'evento': 'etapa_truncada', 'etapa': etapa, 'pendentes': pendentes})
+
+    def encerrar(self):
+        """Reporta estouro do prazo. Retorna a duração do ciclo."""
+        duracao = self.decorrido()
+        if duracao > self.prazo_s:
+            estouros_ciclo.inc()
+            maiores = sorted(self.duracoes.items(), key=lambda item: item[1], reverse=True)[:3]
+            detalhes = ', '.join(f"{nome}={segundos:.1f}s" for nome, segundos in maiores)
+            logger.warning(f"Ciclo estourou o prazo: {duracao:.1f}s de {self.prazo_s:.0f}s ({detalhes})",
+                           extra={'evento': 'ciclo_estourado', 'duracao_s': round(duracao, 3),
+                                  'etapas': {nome: round(s, 3) for nome, s in self.duracoes.items()},
+                                  'truncadas': self.truncadas})
+        return duracao
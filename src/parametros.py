@@ -0,0 +1,138 @@
+# src/parametros.py (Versão 1.0 - Parâmetros de Estratégia Recarregáveis em Execução)
+#
+# Os parâmetros ficam em config/parametros.json (PARAMETROS_ARQUIVO). O arquivo é
+# verificado entre um ciclo e outro (ou imediatamente após SIGHUP); uma versão
+# válida substitui a anterior de uma vez só, sem reiniciar o processo. Uma versão
+# inválida é recusada e a anterior continua valendo.
+
+import os
+import json
+
+from src.utils import logger
+
+TIMEFRAMES_FIBONACCI_VALIDOS = ('15', '30', '60', '120', '240', '360', '720', 'D')
+
+# nome: (valor padrão, tipo, mínimo, máximo)
+ESQUEMA = {
+    'rsi_limite': (30.0, float, 5.0, 50.0),
+    'valorizacao_minima_percent': (3.0, float, 0.0, 100.0),
+    'rsi_tp_dinamico': (70.0, float, 50.0, 95.0),
+    'tp_fixo_5m_percent': (5.0, float, 0.1, 50.0),
+    'sl_fixo_5m_percent': (2.5, float, 0.1, 50.0),
+    'sl_atr_multiplicador': (2.0, float, 0.1, 10.0),
+    'num_pares_liquidez': (100, int, 1, 500),
+    'confianca_minima': (8, int, 1, 10),
+    'extensao_tp_fibonacci': (0.618, float, 0.1, 3.0),
+    'risk_per_trade_percent': (5.0, float, 0.1, 100.0),
+    'timeframes_fibonacci': (['60', '240'], list, 1, len(TIMEFRAMES_FIBONACCI_VALIDOS)),
+}
+
+class Parametros:
+    """Conjunto imutável de parâmetros. Substituído por inteiro a cada recarga."""
+
+    __slots__ = tuple(ESQUEMA)
+
+    def __init__(self, valores):
+        for nome in ESQUEMA:
+            object.__setattr__(self, nome, valores[nome])
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Parametros é imutável; use GerenciadorParametros.recarregar()")
+
+    def como_dict(self):
+        return {nome: getattr(self, nome) for nome in ESQUEMA}
+
+def validar(dados, base):
+    """Combina `dados` sobre `base` (dict) e valida. Retorna (valores, erros)."""
+    valores = dict(base)
+    erros = []
+    for nome, valor in dados.items():
+        if nome not in ESQUEMA:
+            erros.append(f"parâmetro desconhecido: {nome}")
+            continue
+        _, tipo, minimo, maximo = ESQUEMA[nome]
+        if tipo is list:
+            if (not isinstance(valor, list) or not minimo <= len(valor) <= maximo
+                    or any(str(tf) not in TIMEFRAMES_FIBONACCI_VALIDOS for tf in valor)):
+                erros.append(f"{nome} deve ser uma lista de {TIMEFRAMES_FIBONACCI_VALIDOS}")
+                continue
+            valores[nome] = [str(tf) for tf in valor]
+            continue
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) or (tipo is int and valor != int(valor)):
+            erros.append(f"{nome} deve ser {tipo.__name__}, recebido {valor!r}")
+            continue
+        if not minimo <= valor <= maximo:
+            erros.append(f"{nome}={valor} fora do intervalo [{minimo}, {maximo}]")
+            continue
+        valores[nome] = tipo(valor)
+    if not erros and valores['rsi_tp_dinamico'] <= valores['rsi_limite']:
+        erros.append("rsi_tp_dinamico deve ser maior que rsi_limite")
+    return valores, erros
+
+class GerenciadorParametros:
+    """Mantém os parâmetros atuais e os recarrega do arquivo quando ele muda.
+
+    `atual` só é trocado em `verificar()`, chamado pelo loop principal entre
+    ciclos, então um ciclo sempre enxerga um único conjunto de parâmetros.
+    """
+
+    def __init__(self, caminho=None, padroes=None):
+        self.caminho = caminho or os.getenv('PARAMETROS_ARQUIVO', 'config/parametros.json')
+        self.padroes = {nome: espec[0] for nome, espec in ESQUEMA.items()}
+        self.padroes.update(padroes or {})
+        self.atual = Parametros(self.padroes)
+        self._mtime = None
+        self._forcar = False
+        self.ouvintes = []
+
+    def solicitar_recarga(self):
+        """Para uso em handler de sinal: a recarga acontece no próximo `verificar()`."""
+        self._forcar = True
+
+    def _mtime_arquivo(self):
+        try:
+            return os.stat(self.caminho).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def verificar(self):
+        """Recarrega se o arquivo mudou ou se houve SIGHUP. Retorna o dict de
+        mudanças aplicadas ({nome: (antes, depois)}) ou None."""
+        mtime = self._mtime_arquivo()
+        if not self._forcar and mtime == self._mtime:
+            return None
+        self._forcar = False
+        self._mtime = mtime
+        return self.recarregar()
+
+    def recarregar(self):
+        if self._mtime_arquivo() is None:
+            dados = {}
+        else:
+            try:
+                with open(self.caminho) as f:
+                    dados = json.load(f)
+                if not isinstance(dados, dict):
+                    raise ValueError("o arquivo deve conter um objeto JSON")
+            except (OSError, ValueError) as e:
+                logger.error(f"Parâmetros não recarregados: {self.caminho} inválido ({e}). Mantendo os atuais.",
+                             extra={'evento': 'parametros_recusados'})
+                return None
+
+        # Chaves ausentes no arquivo voltam ao padrão
+        valores, erros = validar(dados, self.padroes)
+        if erros:
+            logger.error(f"Parâmetros não recarregados: {'; '.join(erros)}. Mantendo os atuais.",
+                         extra={'evento': 'parametros_recusados', 'erros': erros})
+            return None
+
+        anteriores = self.atual.como_dict()
+        mudancas = {nome: (anteriores[nome], valor) for nome, valor in valores.items() if anteriores[nome] != valor}
+        if not mudancas:
+            return None
+        self.atual = Parametros(valores)
+        for ouvinte in self.ouvintes:
+            ouvinte(self.atual)
+        logger.warning(f"Parâmetros recarregados: {mudancas}",
+                       extra={'evento': 'parametros_recarregados', 'mudancas': {n: v[1] for n, v in mudancas.items()}})
+        return mudancas
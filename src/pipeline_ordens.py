@@ -0,0 +1,93 @@
+# src/pipeline_ordens.py (Versão 1.0 - Envio Concorrente de Ordens com Trava por Par)
+
+import asyncio
+import contextvars
+import functools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import logger
+from src.rastreamento import span
+
+class PipelineOrdens:
+    """Envia ordens de pares diferentes em paralelo.
+
+    `BybitExecutor.place_order` é síncrono (várias chamadas REST + espera de 2 s),
+    então cada envio roda num pool de threads. Regras:
+      - uma trava por par impede duas ordens simultâneas no mesmo símbolo;
+      - um semáforo global limita as ordens em voo (`max_simultaneas`);
+      - a verificação de risco (robô pausado, posição existente, orçamento de risco
+        total) e a reserva do orçamento acontecem atomicamente, sob uma trava única.
+    """
+
+    def __init__(self, gestor, risco_por_operacao, max_risco_total, max_simultaneas=4):
+        self.gestor = gestor
+        self.risco_por_operacao = risco_por_operacao
+        self.max_risco_total = max_risco_total
+        self.max_simultaneas = max_simultaneas
+        self.em_voo = set()
+        self._pool = ThreadPoolExecutor(max_workers=max_simultaneas, thread_name_prefix='ordens')
+        # Primitivas asyncio são criadas dentro do loop em execução
+        self._semaforo = None
+        self._trava_risco = None
+        self._travas_par = None
+
+    def _preparar(self):
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_simultaneas)
+            self._trava_risco = asyncio.Lock()
+            self._travas_par = defaultdict(asyncio.Lock)
+
+    def _reservar(self, par, posicoes_abertas):
+        """Verifica e reserva o orçamento de risco. Deve ser chamado sob `_trava_risco`."""
+        if not self.gestor.pode_operar():
+            return "❌ ERRO: Bot pausado pelo gestor de drawdown."
+        if par in posicoes_abertas or par in self.em_voo:
+            return f"❌ ERRO: Já existe posição ou ordem em andamento para {par}."
+        risco_comprometido = (len(set(posicoes_abertas)) + len(self.em_voo) + 1) * self.risco_por_operacao
+        if risco_comprometido > self.max_risco_total:
+            return f"❌ ERRO: Orçamento de risco esgotado ({risco_comprometido - self.risco_por_operacao:.1f}% em uso de {self.max_risco_total:.1f}%)."
+        self.em_voo.add(par)
+        return None
+
+    async def _submeter(self, executor, sinal, posicoes_abertas):
+        par = sinal['par']
+        async with self._travas_par[par]:
+            async with self._trava_risco:
+                recusa = self._reservar(par, posicoes_abertas)
+            if recusa:
+                logger.warning(f"Ordem para {par} não enviada: {recusa}")
+                return recusa
+            try:
+                async with self._semaforo:
+                    loop = asyncio.get_running_loop()
+                    contexto = contextvars.copy_context()
+                    with span('ordem_concorrente'):
+                        resultado = await loop.run_in_executor(
+                            self._pool, functools.partial(contexto.run, executor.place_order, sinal))
+                if resultado and "✅" in resultado:
+                    posicoes_abertas.append(par)
+                return resultado
+            finally:
+                self.em_voo.discard(par)
+
+    async def executar(self, executor, sinais, posicoes_abertas):
+        """Envia os `sinais` concorrentemente. Retorna [(sinal, resultado)] na ordem recebida.
+
+        `posicoes_abertas` (lista) recebe os pares executados com sucesso, para que
+        verificações seguintes no mesmo ciclo já os considerem.
+        """
+        if not sinais:
+            return []
+        self._preparar()
+        resultados = await asyncio.gather(
+            *(self._submeter(executor, sinal, posicoes_abertas) for sinal in sinais),
+            return_exceptions=True
+        )
+        saida = []
+        for sinal, resultado in zip(sinais, resultados):
+            if isinstance(resultado, Exception):
+                logger.error(f"Erro ao enviar ordem para {sinal['par']}: {resultado}")
+                resultado = f"❌ ERRO na execução: {resultado}"
+            saida.append((sinal, resultado))
+        return saida
@@ -0,0 +1,165 @@
+# src/pivos.py (Versão 1.3 - Rastreador Incremental de Pivôs com Memória Limitada)
+
+from collections import deque
+from src import relogio
+from src.utils import logger
+
+def janela_historico(interval):
+    """Candles da janela longa que a varredura Fibonacci busca (240 = 4h, 60 = 1h)."""
+    return 300 if interval == '240' else 200
+
+class RastreadorPivos:
+    """Mantém topos e fundos de um par/intervalo de forma incremental.
+
+    Segue as mesmas regras de `encontrar_topos_fundos` sobre a janela de
+    `janela_candles` candles que a varredura buscaria: um candle é pivô quando sua
+    mínima (ou máxima) é o extremo da janela de `periodo` candles de cada lado,
+    duplicatas de (tipo, preço) são descartadas e a sequência final alterna entre
+    topo e fundo. Os candidatos que saem da janela deixam de contar, inclusive para
+    as duplicatas. Apenas candles fechados são consumidos, de modo que um pivô só é
+    confirmado após `periodo` candles fechados à sua direita.
+    """
+
+    def __init__(self, periodo=10, janela_candles=200):
+        self.periodo = periodo
+        self.janela = deque(maxlen=2 * periodo + 1)  # (timestamp, high, low)
+        self.janela_candles = janela_candles
+        # Candidatos (timestamp, tipo, preço) ainda dentro da janela, em ordem cronológica
+        self.candidatos = deque()
+        self.pivos = []
+        self.ultimo_timestamp = None
+        self.intervalo_ms = None
+        self.versao = 0  # Incrementa a cada mudança nos pivôs
+
+    def reset(self):
+        self.janela.clear()
+        self.candidatos.clear()
+        self.pivos = []
+        self.ultimo_timestamp = None
+        self.intervalo_ms = None
+        self.versao = 0
+
+    @property
+    def aquecido(self):
+        return self.ultimo_timestamp is not None
+
+    def precisa_historico(self, limit_curto):
+        """Indica se uma janela de `limit_curto` candles não cobre os candles
+        novos desde a última atualização (rastreador frio ou parado há muito tempo)."""
+        if not self.aquecido or not self.intervalo_ms:
+            return True
+        candles_novos = (relogio.timestamp() * 1000 - self.ultimo_timestamp) / self.intervalo_ms
+        return candles_novos >= limit_curto - 2
+
+    def adicionar_candle(self, timestamp, high, low):
+        """Consome um candle fechado. Custo O(periodo), mais O(candidatos na janela)
+        quando a lista de candidatos muda."""
+        if self.ultimo_timestamp is not None and timestamp <= self.ultimo_timestamp:
+            return False
+        if self.ultimo_timestamp is not None and self.intervalo_ms is None:
+            self.intervalo_ms = timestamp - self.ultimo_timestamp
+        self.ultimo_timestamp = timestamp
+        self.janela.append((timestamp, high, low))
+
+        if len(self.janela) < self.janela.maxlen:
+            return False
+
+        # O candidato é o candle central, que agora tem `periodo` candles à direita
+        ts_centro, high_centro, low_centro = self.janela[self.periodo]
+        mudou = self._expirar_candidatos()
+
+        if low_centro == min(c[2] for c in self.janela):
+            self.candidatos.append((ts_centro, 'fundo', low_centro))
+            mudou = True
+        if high_centro == max(c[1] for c in self.janela):
+            self.candidatos.append((ts_centro, 'topo', high_centro))
+            mudou = True
+
+        return self._recalcular() if mudou else False
+
+    def _expirar_candidatos(self):
+        # Mesma janela que `encontrar_topos_fundos` receberia agora: os candles fechados
+        # de uma busca de `janela_candles` (o último está em formação), dos quais só os
+        # que têm `periodo` candles à esquerda podem ser pivôs
+        limite = self.ultimo_timestamp - (self.janela_candles - 2 - self.periodo) * self.intervalo_ms
+        expirou = False
+        while self.candidatos and self.candidatos[0][0] < limite:
+            self.candidatos.popleft()
+            expirou = True
+        return expirou
+
+    def _recalcular(self):
+        """Refaz duplicatas e alternância sobre os candidatos da janela. Retorna True
+        se surgiu pivô novo."""
+        vistos = set()
+        pivos = []
+        tipo_anterior = None
+        for timestamp, tipo, preco in self.candidatos:
+            if (tipo, preco) in vistos:
+                continue
+            vistos.add((tipo, preco))
+            if tipo != tipo_anterior:
+                pivos.append({'tipo': tipo, 'preco': preco, 'timestamp': timestamp})
+            tipo_anterior = tipo
+        novo_pivo = bool(pivos) and (not self.pivos or pivos[-1] != self.pivos[-1])
+        if pivos != self.pivos:
+            self.versao += 1
+        self.pivos = pivos
+        return novo_pivo
+
+    def atualizar(self, df):
+        """Consome os candles fechados de `df` ainda não vistos.
+
+        O último candle de `df` é o candle em formação e é ignorado. Se houver um
+        buraco entre o último candle consumido e o primeiro candle recebido, o
+        rastreador é reiniciado a partir de `df`. Retorna True se surgiu pivô novo.
+        """
+        if len(df) < 2:
+            return False
+        return self.atualizar_arrays(df['timestamp'].values[:-1], df['high'].values[:-1], df['low'].values[:-1])
+
+    def atualizar_arrays(self, timestamps, highs, lows):
+        """Como `atualizar`, mas recebe apenas os candles fechados, em arrays."""
+        if len(timestamps) == 0:
+            return False
+
+        if self.aquecido and self.intervalo_ms:
+            proximo_esperado = self.ultimo_timestamp + self.intervalo_ms
+            if timestamps[0] > proximo_esperado:
+                logger.debug("Buraco na série de candles detectado. Reiniciando rastreador de pivôs.")
+                self.reset()
+
+        novo_pivo = False
+        for ts, high, low in zip(timestamps, highs, lows):
+            novo_pivo |= self.adicionar_candle(int(ts), float(high), float(low))
+        return novo_pivo
+
+    def ultimos(self, n=2):
+        """Retorna os `n` pivôs mais recentes, do mais antigo para o mais novo."""
+        if len(self.pivos) < n:
+            return []
+        return self.pivos[-n:]
+
+# Um rastreador por (símbolo, intervalo)
+rastreadores_pivos = {}
+
+def obter_rastreador(symbol, interval, periodo=10, rastreadores=None):
+    """`rastreadores` permite um conjunto separado do global (ex.: estratégias em modo sombra)."""
+    rastreadores = rastreadores_pivos if rastreadores is None else rastreadores
+    chave = (symbol, interval)
+    rastreador = rastreadores.get(chave)
+    if rastreador is None or rastreador.periodo != periodo:
+        rastreador = RastreadorPivos(periodo, janela_candles=janela_historico(interval))
+        rastreadores[chave] = rastreador
+    return rastreador
+
+def podar_rastreadores(idade_max_ms, rastreadores=None):
+    """Remove rastreadores sem candle novo há mais de `idade_max_ms` (pares que
+    saíram do top de liquidez ou foram deslistados). Retorna quantos saíram."""
+    rastreadores = rastreadores_pivos if rastreadores is None else rastreadores
+    limite = relogio.timestamp() * 1000 - idade_max_ms
+    parados = [chave for chave, rastreador in rastreadores.items()
+               if rastreador.ultimo_timestamp is None or rastreador.ultimo_timestamp < limite]
+    for chave in parados:
+        del rastreadores[chave]
+    return len(parados)
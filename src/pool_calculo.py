@@ -0,0 +1,80 @@
+# src/pool_calculo.py (Versão 1.0 - Cálculo das Estratégias em Pool de Processos)
+#
+# Indicadores, pivôs e contagem de toques são CPU puro e, no event loop, atrasam o
+# monitoramento de TP/SL. Aqui eles rodam em processos separados: as estratégias
+# enviam lotes de arrays compactos para funções puras e recebem registros de volta;
+# o event loop só aplica os resultados (pontuações, caches, logs).
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.utils import logger
+from src.rastreamento import span
+
+class PoolCalculo:
+    """Distribui `funcao(lote, *argumentos)` por `workers` processos.
+
+    `funcao` deve ser uma função de módulo (serializável por referência) que
+    recebe uma lista de itens e retorna uma lista de resultados do mesmo tamanho.
+    Com `workers=0`, os lotes rodam no próprio processo, em sequência.
+    """
+
+    def __init__(self, workers=2, lotes_por_worker=4):
+        self.workers = workers
+        self.lotes_por_worker = lotes_por_worker
+        self._pool = None
+
+    def _obter_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def encerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def dividir(self, itens):
+        """Lotes contíguos, vários por worker, para que o prazo do ciclo corte pouco trabalho de cada vez."""
+        if not itens:
+            return []
+        tamanho = max(1, -(-len(itens) // (max(self.workers, 1) * self.lotes_por_worker)))
+        return [itens[i:i + tamanho] for i in range(0, len(itens), tamanho)]
+
+    async def mapear(self, nome, funcao, itens, *argumentos, orcamento=None):
+        """Retorna uma lista alinhada com `itens`; None onde o item não foi
+        calculado (prazo do ciclo esgotado ou falha do worker)."""
+        lotes = self.dividir(itens)
+        resultados = []
+        with span(f'calculo_{nome}'):
+            if self.workers == 0:
+                for lote in lotes:
+                    if orcamento is not None and orcamento.esgotado():
+                        resultados.extend([None] * len(lote))
+                        continue
+                    resultados.extend(funcao(lote, *argumentos))
+                return resultados
+
+            loop = asyncio.get_running_loop()
+            pool = self._obter_pool()
+            tarefas = [loop.run_in_executor(pool, funcao, lote, *argumentos) for lote in lotes]
+            if tarefas:
+                prazo = max(orcamento.restante(), 0.0) if orcamento is not None else None
+                _, pendentes = await asyncio.wait(tarefas, timeout=prazo)
+                for tarefa in pendentes:
+                    tarefa.cancel()
+            for lote, tarefa in zip(lotes, tarefas):
+                if tarefa.cancelled() or not tarefa.done():
+                    resultados.extend([None] * len(lote))
+                    continue
+                erro = tarefa.exception()
+                if erro is not None:
+                    logger.error(f"Falha no cálculo {nome} em processo separado: {erro!r}")
+                    if isinstance(erro, BrokenProcessPool):
+                        # Um worker morreu (ex.: OOM); o pool é recriado no próximo ciclo
+                        self._pool = None
+                    resultados.extend([None] * len(lote))
+                    continue
+                resultados.extend(tarefa.result())
+        return resultados
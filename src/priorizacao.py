@@ -0,0 +1,111 @@
+# src/priorizacao.py (Versão 1.0 - Priorização Adaptativa de Varredura)
+
+from src import relogio
+from src.utils import logger
+from src.limitador import LimitadorTaxa
+
+def pontuacao_rsi(rsi, rsi_limite=30, faixa=40):
+    """1.0 com RSI no limite (ou abaixo), caindo linearmente até 0.0 em `rsi_limite + faixa`."""
+    return min(max(1.0 - (rsi - rsi_limite) / faixa, 0.0), 1.0)
+
+def pontuacao_golden_zone(preco, nivel_618, nivel_500, faixa=0.5):
+    """1.0 dentro da Golden Zone; cai com a distância medida em múltiplos da
+    largura da pernada (topo - fundo), chegando a 0.0 em `faixa`."""
+    if nivel_618 <= preco <= nivel_500:
+        return 1.0
+    diferenca = (nivel_500 - nivel_618) / (0.618 - 0.5)
+    distancia = min(abs(preco - nivel_618), abs(preco - nivel_500)) / diferenca
+    return min(max(1.0 - distancia / faixa, 0.0), 1.0)
+
+class PlanejadorVarredura:
+    """Decide quais pares varrer em cada ciclo, dentro de um orçamento de requisições.
+
+    Cada chave (ex.: ('fibonacci', 'BTCUSDT', '240')) tem uma pontuação de 0 (frio)
+    a 1 (quente, perto de disparar). Chaves quentes são revarridas todo ciclo; as
+    frias a cada até `max_intervalo` ciclos. Chaves nunca varridas entram como
+    quentes. Quando o orçamento por minuto acaba, as chaves restantes ficam para o
+    ciclo seguinte, já com atraso maior.
+    """
+
+    def __init__(self, requisicoes_por_minuto=300, max_intervalo=6, limiar_quente=0.7):
+        self.max_intervalo = max_intervalo
+        self.limiar_quente = limiar_quente
+        self.orcamento = LimitadorTaxa(requisicoes_por_minuto / 60.0, rajada=requisicoes_por_minuto,
+                                       tempo=relogio.timestamp)
+        self.pontuacoes = {}
+        self.zonas = {}
+        self.ultima_varredura = {}
+        self.rodadas = {}
+
+    def pontuar(self, chave, pontuacao):
+        self.pontuacoes[chave] = pontuacao
+
+    def registrar_zona(self, chave, nivel_618, nivel_500):
+        """Guarda a Golden Zone da chave para repontuá-la a cada ciclo só com o preço do ticker."""
+        self.zonas[chave] = (nivel_618, nivel_500)
+
+    def descartar_zona(self, chave):
+        self.zonas.pop(chave, None)
+
+    def devolver(self, chaves):
+        """Chaves selecionadas mas não varridas (ex.: prazo do ciclo esgotado) voltam
+        como atrasadas ao máximo, para serem as primeiras da próxima rodada."""
+        for chave in chaves:
+            rodada = self.ultima_varredura.pop(chave, None)
+            if rodada is not None:
+                self.ultima_varredura[chave] = rodada - self.max_intervalo
+
+    def podar(self, rodadas_max=None):
+        """Esquece chaves não selecionadas nas últimas `rodadas_max` rodadas (padrão:
+        10x `max_intervalo`), ex.: pares que deixaram de ser candidatos."""
+        rodadas_max = rodadas_max or 10 * self.max_intervalo
+        antigas = [chave for chave, rodada in self.ultima_varredura.items()
+                   if self.rodadas.get(chave[0], 0) - rodada > rodadas_max]
+        for chave in antigas:
+            self.ultima_varredura.pop(chave, None)
+            self.pontuacoes.pop(chave, None)
+            self.zonas.pop(chave, None)
+        return len(antigas)
+
+    def pontuacao(self, chave, preco=None):
+        if preco is not None and chave in self.zonas:
+            return max(self.pontuacoes.get(chave, 0.0), pontuacao_golden_zone(preco, *self.zonas[chave]))
+        return self.pontuacoes.get(chave, 1.0)
+
+    def intervalo(self, pontuacao):
+        if pontuacao >= self.limiar_quente:
+            return 1
+        return 1 + round((1.0 - pontuacao) * (self.max_intervalo - 1))
+
+    def selecionar(self, nome, chaves, precos=None, custo=1):
+        """Retorna as chaves a varrer nesta rodada de `nome`, da mais para a menos prioritária.
+
+        `precos` (opcional) mapeia chave -> último preço, usado para repontuar chaves
+        com Golden Zone conhecida sem nenhuma requisição extra.
+        """
+        precos = precos or {}
+        rodada = self.rodadas.get(nome, 0) + 1
+        self.rodadas[nome] = rodada
+
+        devidas = []
+        for chave in chaves:
+            pontuacao = self.pontuacao(chave, precos.get(chave))
+            ultima = self.ultima_varredura.get(chave)
+            atraso = self.max_intervalo if ultima is None else rodada - ultima
+            if atraso >= self.intervalo(pontuacao):
+                devidas.append((pontuacao, atraso, chave))
+        devidas.sort(key=lambda item: (item[0], item[1]), reverse=True)
+
+        selecionadas = []
+        for pontuacao, _, chave in devidas:
+            if not self.orcamento.tentar(custo):
+                break
+            self.ultima_varredura[chave] = rodada
+            selecionadas.append(chave)
+
+        quentes = sum(1 for pontuacao, _, _ in devidas if pontuacao >= self.limiar_quente)
+        logger.info(f"Planejador {nome}: varrendo {len(selecionadas)}/{len(chaves)} "
+                    f"({quentes} quentes, {len(devidas) - len(selecionadas)} adiados pelo orçamento)",
+                    extra={'evento': f'planejamento_{nome}', 'varridos': len(selecionadas),
+                           'total': len(chaves), 'quentes': quentes})
+        return selecionadas
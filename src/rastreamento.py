@@ -0,0 +1,125 @@
+# src/rastreamento.py (Versão 1.0 - Spans por Etapa + Captura sob Demanda)
+
+import os
+import time
+import cProfile
+import functools
+import asyncio
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.utils import logger
+from src.metricas import span_duracao
+
+DIRETORIO_CAPTURAS = 'logs/traces'
+
+# Span ativo no contexto atual (propagado automaticamente para tasks asyncio)
+_span_atual = contextvars.ContextVar('span_atual', default=None)
+
+class _Span:
+    __slots__ = ('nome', 'caminho', 'inicio', 'tempo_filhos')
+
+    def __init__(self, nome, pai):
+        self.nome = nome
+        self.caminho = f"{pai.caminho};{nome}" if pai else nome
+        self.inicio = time.perf_counter()
+        self.tempo_filhos = 0.0
+
+class _Captura:
+    """Estado da captura sob demanda: spans agregados em formato 'folded' e,
+    opcionalmente, um perfil cProfile dos próximos N ciclos."""
+
+    def __init__(self):
+        self.ciclos_restantes = 0
+        self.pilhas = defaultdict(float)  # caminho -> tempo próprio (s)
+        self.perfil = None
+
+    @property
+    def ativa(self):
+        return self.ciclos_restantes > 0
+
+captura = _Captura()
+
+@contextmanager
+def span(nome):
+    """Mede uma etapa. Spans aninhados formam o caminho 'pai;filho'."""
+    pai = _span_atual.get()
+    atual = _Span(nome, pai)
+    token = _span_atual.set(atual)
+    try:
+        yield atual
+    finally:
+        duracao = time.perf_counter() - atual.inicio
+        _span_atual.reset(token)
+        if pai is not None:
+            pai.tempo_filhos += duracao
+        span_duracao.labels(span=nome).observe(duracao)
+        if captura.ativa:
+            captura.pilhas[atual.caminho] += max(duracao - atual.tempo_filhos, 0.0)
+
+def rastrear(nome=None):
+    """Decorator que envolve uma função (síncrona ou async) em um span."""
+    def decorator(func):
+        nome_span = nome or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper_async(*args, **kwargs):
+                with span(nome_span):
+                    return await func(*args, **kwargs)
+            return wrapper_async
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(nome_span):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def solicitar_captura(ciclos=None):
+    """Liga a captura para os próximos `ciclos` ciclos (padrão: TRACE_CAPTURE_CYCLES ou 5)."""
+    if ciclos is None:
+        ciclos = int(os.getenv('TRACE_CAPTURE_CYCLES', '5'))
+    if captura.ativa:
+        logger.info("Captura de spans já em andamento. Solicitação ignorada.")
+        return
+    captura.ciclos_restantes = ciclos
+    captura.pilhas.clear()
+    if os.getenv('TRACE_CPROFILE', 'true').lower() == 'true':
+        captura.perfil = cProfile.Profile()
+    logger.warning(f"📈 Captura de spans ativada para os próximos {ciclos} ciclos.")
+
+def iniciar_ciclo():
+    if captura.ativa and captura.perfil is not None:
+        captura.perfil.enable()
+
+def finalizar_ciclo():
+    """Deve ser chamada ao fim de cada ciclo do loop principal."""
+    if not captura.ativa:
+        return
+    if captura.perfil is not None:
+        captura.perfil.disable()
+    captura.ciclos_restantes -= 1
+    if captura.ciclos_restantes == 0:
+        _gravar_captura()
+
+def _gravar_captura():
+    os.makedirs(DIRETORIO_CAPTURAS, exist_ok=True)
+    sufixo = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+
+    # Formato 'folded' (caminho;de;spans microssegundos), aceito por flamegraph.pl e speedscope
+    arquivo_spans = os.path.join(DIRETORIO_CAPTURAS, f'spans_{sufixo}.folded')
+    with open(arquivo_spans, 'w') as f:
+        for caminho, segundos in sorted(captura.pilhas.items()):
+            f.write(f"{caminho} {int(segundos * 1_000_000)}\n")
+    logger.warning(f"📈 Captura de spans gravada em {arquivo_spans}")
+
+    if captura.perfil is not None:
+        arquivo_perfil = os.path.join(DIRETORIO_CAPTURAS, f'perfil_{sufixo}.prof')
+        captura.perfil.dump_stats(arquivo_perfil)
+        captura.perfil = None
+        logger.warning(f"📈 Perfil cProfile gravado em {arquivo_perfil}")
+
+    captura.pilhas.clear()
@@ -0,0 +1,93 @@
+# src/registro_execucoes.py (Versão 1.0 - Ledger de Latência Sinal→Execução e Slippage)
+#
+# Cada ordem executada grava um registro binário de tamanho fixo (append-only) com os
+# marcos de tempo de cada etapa e os preços de sinal/execução. Para ver os percentis:
+#   python -m src.registro_execucoes [logs/execucoes.bin]
+
+import os
+import sys
+import math
+import struct
+import threading
+import numpy as np
+
+from src.metricas import latencia_execucao, slippage_execucao
+
+ARQUIVO_LEDGER = 'logs/execucoes.bin'
+
+# Ordem dos marcos de tempo (epoch em segundos; NaN quando a etapa não ocorreu)
+ETAPAS = ('fechamento_candle', 'sinal_detectado', 'ordem_enviada', 'ordem_confirmada',
+          'execucao_confirmada', 'tp_sl_enviados')
+
+_FORMATO = '<16s32s4s' + 'd' * len(ETAPAS) + 'ddd'
+_TAMANHO = struct.calcsize(_FORMATO)
+DTYPE_REGISTRO = np.dtype(
+    [('par', 'S16'), ('estrategia', 'S32'), ('timeframe', 'S4')]
+    + [(etapa, '<f8') for etapa in ETAPAS]
+    + [('preco_sinal', '<f8'), ('preco_execucao', '<f8'), ('quantidade', '<f8')]
+)
+assert DTYPE_REGISTRO.itemsize == _TAMANHO
+
+_trava = threading.Lock()
+
+def registrar_execucao(sinal, marcos, preco_execucao, quantidade, caminho=ARQUIVO_LEDGER):
+    """Acrescenta um registro ao ledger e atualiza as métricas de latência/slippage."""
+    marcos = {etapa: valor for etapa, valor in marcos.items() if valor is not None}
+    valores = [float(marcos.get(etapa, math.nan)) for etapa in ETAPAS]
+    preco_sinal = float(sinal['preco_atual'])
+    preco_execucao = float(preco_execucao) if preco_execucao else math.nan
+    estrategia = sinal.get('strategy_name', 'N/A')
+    timeframe = str(sinal.get('timeframe', ''))
+    registro = struct.pack(
+        _FORMATO,
+        sinal['par'].encode()[:16], estrategia.encode()[:32], timeframe.encode()[:4],
+        *valores, preco_sinal, preco_execucao, float(quantidade)
+    )
+    with _trava:
+        with open(caminho, 'ab') as f:
+            f.write(registro)
+
+    inicio = marcos.get('fechamento_candle', marcos.get('sinal_detectado'))
+    fim = marcos.get('execucao_confirmada')
+    if inicio is not None and fim is not None:
+        latencia_execucao.labels(estrategia=estrategia, timeframe=timeframe).observe(fim - inicio)
+    if not math.isnan(preco_execucao) and preco_sinal > 0:
+        slippage_bps = (preco_execucao - preco_sinal) / preco_sinal * 10000
+        slippage_execucao.labels(estrategia=estrategia, timeframe=timeframe).observe(slippage_bps)
+
+def carregar_ledger(caminho=ARQUIVO_LEDGER):
+    """Lê o ledger inteiro como array estruturado NumPy (sem cópia via memmap)."""
+    if not os.path.exists(caminho) or os.path.getsize(caminho) < _TAMANHO:
+        return np.zeros(0, dtype=DTYPE_REGISTRO)
+    registros = os.path.getsize(caminho) // _TAMANHO
+    return np.memmap(caminho, dtype=DTYPE_REGISTRO, mode='r', shape=(registros,))
+
+def resumir_ledger(registros, percentis=(50, 90, 99)):
+    """Agrega latências (s) e slippage (bps) por (estratégia, timeframe)."""
+    resumo = {}
+    if not len(registros):
+        return resumo
+    chaves = set(zip(registros['estrategia'].tolist(), registros['timeframe'].tolist()))
+    for estrategia, timeframe in sorted(chaves):
+        grupo = registros[(registros['estrategia'] == estrategia) & (registros['timeframe'] == timeframe)]
+        metricas = {
+            'candle_ate_execucao_s': grupo['execucao_confirmada'] - grupo['fechamento_candle'],
+            'sinal_ate_execucao_s': grupo['execucao_confirmada'] - grupo['sinal_detectado'],
+            'envio_ate_confirmacao_s': grupo['ordem_confirmada'] - grupo['ordem_enviada'],
+            'execucao_ate_tp_sl_s': grupo['tp_sl_enviados'] - grupo['execucao_confirmada'],
+            'slippage_bps': (grupo['preco_execucao'] - grupo['preco_sinal']) / grupo['preco_sinal'] * 10000,
+        }
+        linha = {'operacoes': len(grupo)}
+        for nome, valores in metricas.items():
+            valores = valores[~np.isnan(valores)]
+            for p in percentis:
+                linha[f'{nome}_p{p}'] = round(float(np.percentile(valores, p)), 4) if len(valores) else None
+        resumo[(estrategia.decode(), timeframe.decode())] = linha
+    return resumo
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_LEDGER
+    for (estrategia, timeframe), linha in resumir_ledger(carregar_ledger(caminho)).items():
+        print(f"{estrategia} [{timeframe or '-'}]")
+        for chave, valor in linha.items():
+            print(f"  {chave}: {valor}")
@@ -0,0 +1,141 @@
+# src/relogio.py (Versão 1.2 - Relógio Substituível para Simulação)
+
+import time
+import weakref
+import threading
+import asyncio
+from datetime import datetime
+
+class Relogio:
+    """Relógio de parede real. Todo código do robô consulta o tempo e dorme por aqui,
+    o que permite ao simulador (src/simulador.py) acelerar a execução."""
+
+    def timestamp(self):
+        return time.time()
+
+    def agora(self):
+        return datetime.now()
+
+    def dormir(self, segundos):
+        time.sleep(segundos)
+
+    async def dormir_async(self, segundos):
+        await asyncio.sleep(segundos)
+
+    def participar(self, tarefa=None):
+        pass
+
+class RelogioAcelerado(Relogio):
+    """Relógio simulado que começa em `inicio` (epoch em segundos).
+
+    Com `velocidade` numérica, o tempo simulado corre `velocidade` vezes mais rápido
+    que o real (inclusive durante o processamento). Com `velocidade=None`, o tempo
+    só avança pelas esperas (`dormir`), que retornam imediatamente: o modo mais
+    rápido para rodar semanas simuladas em poucos minutos.
+
+    Em tempo virtual, o relógio só avança quando todas as tasks que participam dele
+    (as que já chamaram `dormir_async` ou foram registradas com `participar`) estão
+    dormindo. Uma task ativa, mesmo que só aguardando uma thread ou um processo,
+    segura o tempo.
+
+    O `dormir` síncrono roda nas threads de ordens, várias ao mesmo tempo. Cada
+    thread espera o tempo virtual chegar ao seu despertar; só a de menor despertar
+    o avança, então esperas simultâneas não se somam.
+    """
+
+    def __init__(self, inicio, velocidade=None):
+        self.velocidade = velocidade
+        self._inicio_simulado = inicio
+        self._inicio_real = time.perf_counter()
+        self._avanco = 0.0
+        self._trava = threading.Lock()
+        self._esperas = {}  # espera de thread -> instante simulado em que acorda
+        self._despertares = {}  # task -> instante simulado em que acorda
+        self._participantes = weakref.WeakSet()
+
+    def timestamp(self):
+        if self.velocidade is None:
+            return self._inicio_simulado + self._avanco
+        return self._inicio_simulado + (time.perf_counter() - self._inicio_real) * self.velocidade
+
+    def agora(self):
+        return datetime.fromtimestamp(self.timestamp())
+
+    def dormir(self, segundos):
+        if self.velocidade is not None:
+            time.sleep(segundos / self.velocidade)
+            return
+        espera = object()
+        with self._trava:
+            alvo = self.timestamp() + segundos
+            self._esperas[espera] = alvo
+        try:
+            while True:
+                # Dá às threads que dormem junto a chance de registrar o seu despertar
+                time.sleep(0.001)
+                with self._trava:
+                    if self.timestamp() >= alvo:
+                        return
+                    if alvo <= min(self._esperas.values()):
+                        self._avanco = max(self._avanco, alvo - self._inicio_simulado)
+                        return
+        finally:
+            with self._trava:
+                del self._esperas[espera]
+
+    async def dormir_async(self, segundos):
+        if self.velocidade is not None:
+            await asyncio.sleep(segundos / self.velocidade)
+            return
+        # Tempo virtual: com todas as participantes adormecidas, a de menor despertar
+        # avança o relógio e segue; as demais continuam cedendo o loop até sua vez.
+        tarefa = asyncio.current_task()
+        self._participantes.add(tarefa)
+        alvo = self.timestamp() + segundos
+        self._despertares[tarefa] = alvo
+        try:
+            while True:
+                await asyncio.sleep(0)
+                if not self._todas_dormindo():
+                    # Outra participante trabalha (ex.: aguarda o pool de threads): o tempo não anda
+                    await asyncio.sleep(0.001)
+                    continue
+                if alvo <= min(self._despertares.values()):
+                    self._avancar_ate(alvo)
+                    return
+        finally:
+            del self._despertares[tarefa]
+
+    def _avancar_ate(self, alvo):
+        # Nunca volta: uma thread pode ter levado o relógio além deste despertar
+        with self._trava:
+            self._avanco = max(self._avanco, alvo - self._inicio_simulado)
+
+    def participar(self, tarefa=None):
+        """Registra `tarefa` (padrão: a atual) antes do seu primeiro `dormir_async`,
+        para que seu trabalho inicial também segure o tempo virtual."""
+        self._participantes.add(tarefa or asyncio.current_task())
+
+    def _todas_dormindo(self):
+        return all(tarefa.done() or tarefa in self._despertares for tarefa in self._participantes)
+
+_relogio = Relogio()
+
+def instalar_relogio(relogio):
+    global _relogio
+    _relogio = relogio
+
+def timestamp():
+    return _relogio.timestamp()
+
+def agora():
+    return _relogio.agora()
+
+def dormir(segundos):
+    _relogio.dormir(segundos)
+
+async def dormir_async(segundos):
+    await _relogio.dormir_async(segundos)
+
+def participar(tarefa=None):
+    _relogio.participar(tarefa)
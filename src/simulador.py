@@ -0,0 +1,653 @@
+# src/simulador.py (Versão 1.0 - Exchange Simulada com Replay de Klines)
+#
+# Substituto local da sessão `pybit.unified_trading.HTTP`: reproduz klines gravadas
+# em velocidade configurável, simula execuções a mercado, TPs limit reduce-only e
+# SLs StopMarket contra as máximas/mínimas reproduzidas e mantém o saldo da carteira.
+#
+# Uso:
+#   python -m src.simulador gravar --pares BTCUSDT,ETHUSDT --dias 30 --dados dados/replay
+#   python -m src.simulador executar --dados dados/replay --velocidade 100
+#   python -m src.simulador executar --dados dados/replay --dias-simulados 14   (sem esperas reais)
+
+import os
+import sys
+import time
+import uuid
+import functools
+import threading
+import asyncio
+import argparse
+import resource
+import numpy as np
+import pandas as pd
+
+from src import relogio
+from src.utils import logger
+
+MINUTOS_POR_INTERVALO = {
+    '1': 1, '3': 3, '5': 5, '15': 15, '30': 30, '60': 60, '120': 120,
+    '240': 240, '360': 360, '720': 720, 'D': 1440
+}
+COLUNAS_KLINE = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+MS_24H = 24 * 60 * 60 * 1000
+
+def _agora_ms():
+    return int(relogio.timestamp() * 1000)
+
+def _resposta(result):
+    return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'retExtInfo': {}, 'time': _agora_ms()}
+
+def _erro(codigo, mensagem):
+    return {'retCode': codigo, 'retMsg': mensagem, 'result': {}, 'retExtInfo': {}, 'time': _agora_ms()}
+
+def _sincronizado(metodo):
+    """Serializa as chamadas à sessão (o PipelineOrdens envia ordens de várias threads)."""
+    @functools.wraps(metodo)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return metodo(self, *args, **kwargs)
+    return wrapper
+
+class SerieKlines:
+    """Candles base de um símbolo em colunas NumPy, em ordem crescente."""
+
+    def __init__(self, timestamp, open, high, low, close, volume):
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        # Somas acumuladas para volume/turnover de 24h em O(1)
+        self.volume_acumulado = np.concatenate(([0.0], np.cumsum(self.volume)))
+        self.turnover_acumulado = np.concatenate(([0.0], np.cumsum(self.volume * self.close)))
+
+    @classmethod
+    def de_dataframe(cls, df):
+        df = df.sort_values('timestamp')
+        return cls(*(df[coluna].values for coluna in COLUNAS_KLINE))
+
+    def __len__(self):
+        return len(self.timestamp)
+
+class SessaoSimulada:
+    """Implementa os métodos da sessão pybit usados por `BybitExecutor` e pelas estratégias.
+
+    Só candles base já fechados no relógio simulado são visíveis, então não há
+    olhar para o futuro: o preço atual é o fechamento do último candle base fechado.
+    """
+
+    def __init__(self, series, intervalo_base='1', saldo_inicial=1000.0,
+                 taxa_taker=0.00055, taxa_maker=0.0002, slippage_bps=2.0, alavancagem_padrao=10):
+        self.series = series
+        self.intervalo_base = intervalo_base
+        self.base_ms = MINUTOS_POR_INTERVALO[intervalo_base] * 60 * 1000
+        self.saldo = float(saldo_inicial)
+        self.taxa_taker = taxa_taker
+        self.taxa_maker = taxa_maker
+        self.slippage = slippage_bps / 10000
+        self.alavancagem_padrao = alavancagem_padrao
+        self.alavancagens = {}
+        self.posicoes = {}         # symbol -> {'size', 'avgPrice', 'cumRealisedPnl', 'createdTime'}
+        self.ordens_abertas = {}   # orderId -> ordem em repouso (TP/SL/limit)
+        self.ordens = {}           # orderId -> toda ordem já recebida
+        self.links_usados = set()
+        self.execucoes = []
+        self.pnl_fechado = []
+        self._processado = {}      # symbol -> último índice base já casado contra ordens
+        self.chamadas = 0
+        self._lock = threading.RLock()
+
+    # --- Tempo e preços ---
+
+    def _indice(self, symbol, agora_ms=None):
+        """Índice do último candle base fechado no relógio simulado (-1 se nenhum)."""
+        serie = self.series[symbol]
+        if agora_ms is None:
+            agora_ms = _agora_ms()
+        return int(np.searchsorted(serie.timestamp, agora_ms - self.base_ms, side='right')) - 1
+
+    def preco_atual(self, symbol):
+        indice = self._indice(symbol)
+        return float(self.series[symbol].close[indice]) if indice >= 0 else None
+
+    def inicio_dados(self):
+        return min(int(s.timestamp[0]) for s in self.series.values())
+
+    def fim_dados(self):
+        return max(int(s.timestamp[-1]) for s in self.series.values()) + self.base_ms
+
+    # --- Dados de mercado ---
+
+    @_sincronizado
+    def get_tickers(self, category="linear", symbol=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        simbolos = [symbol] if symbol else list(self.series)
+        lista = []
+        for sym in simbolos:
+            if sym not in self.series:
+                continue
+            serie = self.series[sym]
+            indice = self._indice(sym)
+            if indice < 0:
+                continue
+            inicio_24h = int(np.searchsorted(serie.timestamp, serie.timestamp[indice] + self.base_ms - MS_24H, side='left'))
+            ultimo = serie.close[indice]
+            anterior = serie.open[inicio_24h]
+            lista.append({
+                'symbol': sym,
+                'lastPrice': str(ultimo),
+                'markPrice': str(ultimo),
+                'bid1Price': str(ultimo),
+                'ask1Price': str(ultimo),
+                'prevPrice24h': str(anterior),
+                'price24hPcnt': str(round(ultimo / anterior - 1, 6) if anterior else 0),
+                'highPrice24h': str(serie.high[inicio_24h:indice + 1].max()),
+                'lowPrice24h': str(serie.low[inicio_24h:indice + 1].min()),
+                'volume24h': str(serie.volume_acumulado[indice + 1] - serie.volume_acumulado[inicio_24h]),
+                'turnover24h': str(serie.turnover_acumulado[indice + 1] - serie.turnover_acumulado[inicio_24h]),
+            })
+        return _resposta({'category': category, 'list': lista})
+
+    @_sincronizado
+    def get_instruments_info(self, category="linear", symbol=None, **kwargs):
+        self.chamadas += 1
+        simbolos = [symbol] if symbol else list(self.series)
+        lista = [{
+            'symbol': sym,
+            'status': 'Trading',
+            'launchTime': str(int(self.series[sym].timestamp[0])),
+            'lotSizeFilter': {'qtyStep': '0.001', 'minOrderQty': '0.001'},
+            'priceFilter': {'tickSize': '0.0001'},
+        } for sym in simbolos if sym in self.series]
+        return _resposta({'category': category, 'list': lista, 'nextPageCursor': ''})
+
+    @_sincronizado
+    def get_kline(self, category="linear", symbol=None, interval='5', limit=200, start=None, end=None, **kwargs):
+        self.chamadas += 1
+        if symbol not in self.series:
+            return _erro(10001, f"params error: symbol invalid {symbol}")
+        minutos = MINUTOS_POR_INTERVALO.get(str(interval))
+        base_minutos = MINUTOS_POR_INTERVALO[self.intervalo_base]
+        if minutos is None or minutos % base_minutos:
+            return _erro(10001, f"params error: interval {interval} incompatível com a base {self.intervalo_base}")
+
+        serie = self.series[symbol]
+        intervalo_ms = minutos * 60 * 1000
+        limite = min(int(limit), 1000)
+
+        fim = self._indice(symbol)
+        if end is not None:
+            fim = min(fim, int(np.searchsorted(serie.timestamp, int(end), side='right')) - 1)
+        if fim < 0:
+            return _resposta({'category': category, 'symbol': symbol, 'list': []})
+
+        balde_fim = serie.timestamp[fim] // intervalo_ms * intervalo_ms
+        balde_inicio = balde_fim - (limite - 1) * intervalo_ms
+        if start is not None:
+            balde_inicio = max(balde_inicio, int(start) // intervalo_ms * intervalo_ms)
+        inicio = int(np.searchsorted(serie.timestamp, balde_inicio, side='left'))
+        if inicio > fim:
+            return _resposta({'category': category, 'symbol': symbol, 'list': []})
+
+        fatia = slice(inicio, fim + 1)
+        baldes = serie.timestamp[fatia] // intervalo_ms * intervalo_ms
+        inicios = np.flatnonzero(np.r_[True, baldes[1:] != baldes[:-1]])
+        finais = np.r_[inicios[1:] - 1, len(baldes) - 1]
+        volume = np.add.reduceat(serie.volume[fatia], inicios)
+        close = serie.close[fatia][finais]
+        colunas = (
+            baldes[inicios],
+            serie.open[fatia][inicios],
+            np.maximum.reduceat(serie.high[fatia], inicios),
+            np.minimum.reduceat(serie.low[fatia], inicios),
+            close,
+            volume,
+            np.add.reduceat(serie.volume[fatia] * serie.close[fatia], inicios),
+        )
+        # Bybit retorna do candle mais novo para o mais antigo, com valores em texto
+        lista = [[str(valor) for valor in linha] for linha in zip(*(c[::-1] for c in colunas))]
+        return _resposta({'category': category, 'symbol': symbol, 'list': lista})
+
+    # --- Conta ---
+
+    def _pnl_nao_realizado(self):
+        total = 0.0
+        for symbol, posicao in self.posicoes.items():
+            preco = self.preco_atual(symbol)
+            if preco is not None:
+                total += (preco - posicao['avgPrice']) * posicao['size']
+        return total
+
+    def _margem_usada(self):
+        return sum(p['size'] * p['avgPrice'] / self.alavancagens.get(s, self.alavancagem_padrao)
+                   for s, p in self.posicoes.items())
+
+    @_sincronizado
+    def get_wallet_balance(self, accountType="UNIFIED", coin=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        pnl_aberto = self._pnl_nao_realizado()
+        equity = self.saldo + pnl_aberto
+        disponivel = max(self.saldo - self._margem_usada(), 0.0)
+        return _resposta({'list': [{
+            'accountType': accountType,
+            'totalEquity': str(equity),
+            'totalWalletBalance': str(self.saldo),
+            'totalAvailableBalance': str(disponivel),
+            'coin': [{
+                'coin': 'USDT',
+                'walletBalance': str(self.saldo),
+                'equity': str(equity),
+                'unrealisedPnl': str(pnl_aberto),
+                'availableToWithdraw': str(disponivel),
+            }]
+        }]})
+
+    def _posicao_formatada(self, symbol):
+        posicao = self.posicoes.get(symbol)
+        if not posicao:
+            return {'symbol': symbol, 'side': '', 'size': '0', 'avgPrice': '0', 'markPrice': '0',
+                    'unrealisedPnl': '0', 'positionValue': '0', 'cumRealisedPnl': '0',
+                    'leverage': str(self.alavancagens.get(symbol, self.alavancagem_padrao))}
+        preco = self.preco_atual(symbol)
+        return {
+            'symbol': symbol,
+            'side': 'Buy',
+            'size': str(posicao['size']),
+            'avgPrice': str(posicao['avgPrice']),
+            'markPrice': str(preco),
+            'unrealisedPnl': str((preco - posicao['avgPrice']) * posicao['size']),
+            'positionValue': str(posicao['size'] * posicao['avgPrice']),
+            'cumRealisedPnl': str(posicao['cumRealisedPnl']),
+            'leverage': str(self.alavancagens.get(symbol, self.alavancagem_padrao)),
+            'createdTime': str(posicao['createdTime']),
+        }
+
+    @_sincronizado
+    def get_positions(self, category="linear", symbol=None, settleCoin=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        simbolos = [symbol] if symbol else list(self.posicoes)
+        return _resposta({'category': category, 'list': [self._posicao_formatada(s) for s in simbolos]})
+
+    @_sincronizado
+    def set_leverage(self, category="linear", symbol=None, buyLeverage=None, sellLeverage=None, **kwargs):
+        self.chamadas += 1
+        self.alavancagens[symbol] = float(buyLeverage)
+        return _resposta({})
+
+    # --- Ordens ---
+
+    @_sincronizado
+    def place_order(self, category="linear", symbol=None, side=None, orderType=None, qty=None,
+                    price=None, triggerPrice=None, stopPrice=None, timeInForce=None,
+                    reduceOnly=False, orderLinkId=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        if symbol not in self.series or self.preco_atual(symbol) is None:
+            return _erro(10001, f"params error: symbol invalid {symbol}")
+        if orderLinkId and orderLinkId in self.links_usados:
+            return _erro(110072, "OrderLinkedID is duplicate")
+
+        quantidade = float(qty)
+        if quantidade <= 0:
+            return _erro(10001, "params error: qty invalid")
+        if side == 'Sell' and not reduceOnly:
+            return _erro(10001, "simulador suporta apenas posições compradas (Sell exige reduceOnly)")
+        if reduceOnly and symbol not in self.posicoes:
+            return _erro(110017, "current position is zero, cannot fix reduce-only order qty")
+
+        ordem = {
+            'orderId': str(uuid.uuid4()),
+            'orderLinkId': orderLinkId or '',
+            'symbol': symbol,
+            'side': side,
+            'orderType': orderType,
+            'qty': quantidade,
+            'price': float(price) if price is not None else 0.0,
+            'triggerPrice': float(triggerPrice or stopPrice or 0.0),
+            'reduceOnly': bool(reduceOnly),
+            'timeInForce': timeInForce,
+            'orderStatus': 'New',
+            'createdTime': _agora_ms(),
+        }
+
+        if orderType == 'Market' and not ordem['triggerPrice']:
+            preco = self.preco_atual(symbol) * (1 + self.slippage if side == 'Buy' else 1 - self.slippage)
+            if side == 'Buy' and not self._margem_suficiente(symbol, quantidade, preco):
+                return _erro(110007, "ab not enough for new order")
+            self._aceitar(ordem)
+            self._executar(ordem, preco, self.taxa_taker)
+        else:
+            if orderType == 'StopMarket' or ordem['triggerPrice']:
+                ordem['orderStatus'] = 'Untriggered'
+            self._aceitar(ordem)
+            self.ordens_abertas[ordem['orderId']] = ordem
+            self._processado[symbol] = self._indice(symbol)
+
+        return _resposta({'orderId': ordem['orderId'], 'orderLinkId': ordem['orderLinkId']})
+
+    @_sincronizado
+    def get_open_orders(self, category="linear", symbol=None, orderId=None, orderLinkId=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        lista = []
+        for ordem in self.ordens_abertas.values():
+            if symbol and ordem['symbol'] != symbol:
+                continue
+            if orderId and ordem['orderId'] != orderId:
+                continue
+            if orderLinkId and ordem['orderLinkId'] != orderLinkId:
+                continue
+            lista.append(self._ordem_formatada(ordem))
+        return _resposta({'category': category, 'list': lista})
+
+    @_sincronizado
+    def get_order_history(self, category="linear", symbol=None, orderId=None, orderLinkId=None, limit=50, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        lista = []
+        for ordem in reversed(list(self.ordens.values())):
+            if symbol and ordem['symbol'] != symbol:
+                continue
+            if orderId and ordem['orderId'] != orderId:
+                continue
+            if orderLinkId and ordem['orderLinkId'] != orderLinkId:
+                continue
+            lista.append(self._ordem_formatada(ordem))
+            if len(lista) >= int(limit):
+                break
+        return _resposta({'category': category, 'list': lista})
+
+    def _pagina(self, registros, campo_tempo, startTime, endTime, limit, cursor):
+        """Mais recentes primeiro, paginados por `nextPageCursor` como na Bybit."""
+        inicio = int(startTime) if startTime is not None else 0
+        fim = int(endTime) if endTime is not None else _agora_ms()
+        filtrados = [r for r in reversed(registros) if inicio <= int(r[campo_tempo]) <= fim]
+        deslocamento = int(cursor) if cursor else 0
+        limite = int(limit)
+        proximo = deslocamento + limite
+        return {'category': 'linear', 'list': filtrados[deslocamento:proximo],
+                'nextPageCursor': str(proximo) if proximo < len(filtrados) else ''}
+
+    @_sincronizado
+    def get_closed_pnl(self, category="linear", symbol=None, startTime=None, endTime=None, limit=50, cursor=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        registros = [r for r in self.pnl_fechado if symbol is None or r['symbol'] == symbol]
+        return _resposta(self._pagina(registros, 'createdTime', startTime, endTime, limit, cursor))
+
+    @_sincronizado
+    def get_executions(self, category="linear", symbol=None, startTime=None, endTime=None, limit=50, cursor=None, **kwargs):
+        self.chamadas += 1
+        self._casar_ordens()
+        registros = [r for r in self.execucoes if symbol is None or r['symbol'] == symbol]
+        return _resposta(self._pagina(registros, 'execTime', startTime, endTime, limit, cursor))
+
+    @_sincronizado
+    def cancel_all_orders(self, category="linear", symbol=None, **kwargs):
+        self.chamadas += 1
+        canceladas = [o for o in self.ordens_abertas.values() if symbol is None or o['symbol'] == symbol]
+        for ordem in canceladas:
+            self._cancelar(ordem)
+        return _resposta({'list': [{'orderId': o['orderId'], 'orderLinkId': o['orderLinkId']} for o in canceladas]})
+
+    def _aceitar(self, ordem):
+        # Só ordens aceitas consomem o orderLinkId (uma recusa pode ser reenviada com o mesmo ID)
+        self.ordens[ordem['orderId']] = ordem
+        if ordem['orderLinkId']:
+            self.links_usados.add(ordem['orderLinkId'])
+
+    def _ordem_formatada(self, ordem):
+        formatada = dict(ordem)
+        for campo in ('qty', 'price', 'triggerPrice'):
+            formatada[campo] = str(ordem[campo])
+        formatada['avgPrice'] = str(ordem.get('avgPrice', 0))
+        return formatada
+
+    def _cancelar(self, ordem):
+        ordem['orderStatus'] = 'Cancelled'
+        self.ordens_abertas.pop(ordem['orderId'], None)
+
+    def _margem_suficiente(self, symbol, quantidade, preco):
+        alavancagem = self.alavancagens.get(symbol, self.alavancagem_padrao)
+        return quantidade * preco / alavancagem <= self.saldo - self._margem_usada()
+
+    def _executar(self, ordem, preco, taxa):
+        symbol, quantidade = ordem['symbol'], ordem['qty']
+        posicao = self.posicoes.get(symbol)
+        taxa_paga = quantidade * preco * taxa
+        pnl = 0.0
+        # Na Bybit, uma ordem condicional disparada executa como Market com stopOrderType preenchido
+        tipo_ordem = 'Market' if ordem['triggerPrice'] else ordem['orderType']
+        tipo_stop = 'Stop' if ordem['triggerPrice'] else ''
+
+        if ordem['side'] == 'Buy':
+            if posicao is None:
+                posicao = self.posicoes[symbol] = {'size': 0.0, 'avgPrice': 0.0, 'cumRealisedPnl': 0.0,
+                                                   'createdTime': _agora_ms()}
+            novo_tamanho = posicao['size'] + quantidade
+            posicao['avgPrice'] = (posicao['avgPrice'] * posicao['size'] + preco * quantidade) / novo_tamanho
+            posicao['size'] = novo_tamanho
+        else:
+            quantidade = min(quantidade, posicao['size'])
+            taxa_paga = quantidade * preco * taxa
+            pnl = (preco - posicao['avgPrice']) * quantidade
+            self.pnl_fechado.append({
+                'symbol': symbol,
+                'orderId': ordem['orderId'],
+                'side': 'Sell',
+                'qty': str(quantidade),
+                'orderType': tipo_ordem,
+                'avgEntryPrice': str(posicao['avgPrice']),
+                'avgExitPrice': str(preco),
+                'closedSize': str(quantidade),
+                'closedPnl': str(pnl - taxa_paga),
+                'createdTime': str(_agora_ms()),
+                'updatedTime': str(_agora_ms()),
+            })
+            posicao['size'] -= quantidade
+            posicao['cumRealisedPnl'] += pnl - taxa_paga
+
+        self.saldo += pnl - taxa_paga
+        ordem['orderStatus'] = 'Filled'
+        ordem['avgPrice'] = preco
+        self.ordens_abertas.pop(ordem['orderId'], None)
+        self.execucoes.append({
+            'symbol': symbol, 'orderId': ordem['orderId'], 'orderLinkId': ordem['orderLinkId'],
+            'side': ordem['side'], 'execPrice': str(preco), 'execQty': str(quantidade),
+            'execFee': str(taxa_paga), 'execTime': str(_agora_ms()),
+            'orderType': tipo_ordem, 'stopOrderType': tipo_stop,
+        })
+
+        if posicao['size'] <= 1e-12:
+            del self.posicoes[symbol]
+            # Ordens reduce-only remanescentes perdem o sentido com a posição zerada
+            for restante in [o for o in self.ordens_abertas.values() if o['symbol'] == symbol and o['reduceOnly']]:
+                self._cancelar(restante)
+
+    def _casar_ordens(self):
+        """Casa as ordens em repouso contra os candles base fechados desde a última chamada."""
+        for symbol in {o['symbol'] for o in self.ordens_abertas.values()}:
+            serie = self.series[symbol]
+            atual = self._indice(symbol)
+            inicio = self._processado.get(symbol, atual) + 1
+            while inicio <= atual:
+                evento = self._primeiro_disparo(symbol, serie, inicio, atual)
+                if evento is None:
+                    break
+                indice, ordem, preco, taxa = evento
+                self._executar(ordem, preco, taxa)
+                inicio = indice  # A ordem executada saiu do livro; reavalia o mesmo candle
+                if not any(o['symbol'] == symbol for o in self.ordens_abertas.values()):
+                    break
+            self._processado[symbol] = atual
+
+    def _primeiro_disparo(self, symbol, serie, inicio, fim):
+        """Encontra a primeira ordem de `symbol` atingida entre os candles `inicio`..`fim`.
+
+        Em empate no mesmo candle, o stop é executado antes do limit (hipótese conservadora).
+        """
+        high = serie.high[inicio:fim + 1]
+        low = serie.low[inicio:fim + 1]
+        melhor = None
+        for ordem in [o for o in self.ordens_abertas.values() if o['symbol'] == symbol]:
+            if ordem['triggerPrice']:
+                gatilho = ordem['triggerPrice']
+                atingidos = np.flatnonzero(low <= gatilho) if ordem['side'] == 'Sell' else np.flatnonzero(high >= gatilho)
+                prioridade = 0
+            else:
+                gatilho = ordem['price']
+                atingidos = np.flatnonzero(high >= gatilho) if ordem['side'] == 'Sell' else np.flatnonzero(low <= gatilho)
+                prioridade = 1
+            if not len(atingidos):
+                continue
+            indice = inicio + int(atingidos[0])
+            if melhor is None or (indice, prioridade) < (melhor[0], melhor[4]):
+                if prioridade == 0:
+                    # Stop a mercado: gap além do gatilho executa na abertura do candle
+                    abertura = serie.open[indice]
+                    preco = min(gatilho, abertura) if ordem['side'] == 'Sell' else max(gatilho, abertura)
+                    taxa = self.taxa_taker
+                else:
+                    preco, taxa = gatilho, self.taxa_maker
+                melhor = (indice, ordem, preco, taxa, prioridade)
+        return melhor[:4] if melhor else None
+
+class BotSimulado:
+    """Substitui o `telegram.Bot`: as mensagens vão apenas para o log."""
+
+    def __init__(self):
+        self.mensagens = []
+
+    async def send_message(self, chat_id=None, text='', **kwargs):
+        self.mensagens.append(text)
+        logger.info(f"[Telegram simulado] {text[:200]}")
+
+def carregar_series(diretorio):
+    """Lê `<SYMBOL>.csv` (timestamp em ms, open, high, low, close, volume) de `diretorio`."""
+    series = {}
+    for arquivo in sorted(os.listdir(diretorio)):
+        if arquivo.endswith('.csv'):
+            df = pd.read_csv(os.path.join(diretorio, arquivo), usecols=COLUNAS_KLINE)
+            series[arquivo[:-4]] = SerieKlines.de_dataframe(df)
+    return series
+
+def gravar_klines(session, pares, interval, dias, diretorio):
+    """Grava `dias` de klines de cada par em CSV, paginando `get_kline` para trás."""
+    os.makedirs(diretorio, exist_ok=True)
+    intervalo_ms = MINUTOS_POR_INTERVALO[interval] * 60 * 1000
+    inicio = int(time.time() * 1000) - dias * MS_24H
+    for par in pares:
+        linhas, fim = [], None
+        while True:
+            parametros = {'category': 'linear', 'symbol': par, 'interval': interval, 'limit': 1000}
+            if fim is not None:
+                parametros['end'] = fim
+            resposta = session.get_kline(**parametros)
+            pagina = resposta['result']['list'] if resposta['retCode'] == 0 else []
+            if not pagina:
+                break
+            linhas.extend(pagina)
+            mais_antigo = int(pagina[-1][0])
+            if mais_antigo <= inicio:
+                break
+            fim = mais_antigo - intervalo_ms
+            time.sleep(0.1)
+        df = pd.DataFrame([linha[:6] for linha in linhas], columns=COLUNAS_KLINE).astype(float)
+        df['timestamp'] = df['timestamp'].astype('int64')
+        df = df[df['timestamp'] >= inicio].drop_duplicates('timestamp').sort_values('timestamp')
+        df.to_csv(os.path.join(diretorio, f"{par}.csv"), index=False)
+        logger.info(f"Gravados {len(df)} candles de {par} ({interval}) em {diretorio}")
+
+def _preparar_ambiente_simulado():
+    """src.config exige credenciais; no simulador elas nunca são usadas."""
+    for variavel in ('TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID', 'BYBIT_API_KEY', 'BYBIT_API_SECRET'):
+        os.environ.setdefault(variavel, 'simulado')
+    # A exchange simulada não tem limite de requisições; com relógio virtual, o
+    # limitador do plano de dados (tempo real) só atrasaria a simulação
+    os.environ.setdefault('DATA_REQUESTS_PER_SECOND', '100000')
+    # O cursor de PnL de uma simulação não vale para a conta real (nem para outra simulação)
+    os.environ.setdefault('PNL_CURSOR_ARQUIVO', '')
+
+def executar_simulacao(diretorio, intervalo_base='1', velocidade=None, dias_simulados=None,
+                       aquecimento_dias=10, saldo_inicial=1000.0, max_ciclos=None, series=None, ao_fim_ciclo=None):
+    """Roda o `main_loop` real contra a SessaoSimulada e retorna um relatório.
+
+    `series` ({symbol: SerieKlines}) dispensa a leitura de `diretorio`; `ao_fim_ciclo`
+    é repassado ao `main_loop`.
+    """
+    _preparar_ambiente_simulado()
+    from src.main import main_loop
+    from src.bybit_executor import BybitExecutor
+
+    if series is None:
+        series = carregar_series(diretorio)
+    sessao = SessaoSimulada(series, intervalo_base=intervalo_base, saldo_inicial=saldo_inicial)
+    inicio_ms = sessao.inicio_dados() + aquecimento_dias * MS_24H
+    fim_ms = sessao.fim_dados()
+    if dias_simulados is not None:
+        fim_ms = min(fim_ms, inicio_ms + int(dias_simulados * MS_24H))
+    if max_ciclos is None:
+        max_ciclos = max(int((fim_ms - inicio_ms) / 60000), 1)
+
+    relogio_simulado = relogio.RelogioAcelerado(inicio_ms / 1000, velocidade)
+    relogio.instalar_relogio(relogio_simulado)
+    bot = BotSimulado()
+    inicio_real = time.perf_counter()
+    try:
+        asyncio.run(main_loop(executor=BybitExecutor(session=sessao), bot=bot, max_ciclos=max_ciclos,
+                              ao_fim_ciclo=ao_fim_ciclo))
+    finally:
+        relogio.instalar_relogio(relogio.Relogio())
+
+    duracao_real = time.perf_counter() - inicio_real
+    dias = (relogio_simulado.timestamp() * 1000 - inicio_ms) / MS_24H
+    return {
+        'ciclos': max_ciclos,
+        'dias_simulados': round(dias, 2),
+        'duracao_real_s': round(duracao_real, 1),
+        'ciclos_por_segundo': round(max_ciclos / duracao_real, 2) if duracao_real else None,
+        'saldo_inicial': saldo_inicial,
+        'saldo_final': round(sessao.saldo, 2),
+        'operacoes_fechadas': len(sessao.pnl_fechado),
+        'posicoes_abertas': len(sessao.posicoes),
+        'chamadas_api': sessao.chamadas,
+        'mensagens_telegram': len(bot.mensagens),
+        'rss_pico_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exchange simulada para paper trading e soak tests")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    gravar = sub.add_parser('gravar', help="Grava klines reais para replay")
+    gravar.add_argument('--pares', required=True, help="Lista separada por vírgula (ex.: BTCUSDT,ETHUSDT)")
+    gravar.add_argument('--intervalo', default='1')
+    gravar.add_argument('--dias', type=int, default=30)
+    gravar.add_argument('--dados', default='dados/replay')
+
+    executar = sub.add_parser('executar', help="Roda o robô contra o replay")
+    executar.add_argument('--dados', default='dados/replay')
+    executar.add_argument('--intervalo', default='1', help="Intervalo base dos CSVs gravados")
+    executar.add_argument('--velocidade', type=float, default=None,
+                          help="Multiplicador do tempo real (ex.: 100). Omitido: sem esperas reais")
+    executar.add_argument('--dias-simulados', type=float, default=None)
+    executar.add_argument('--aquecimento-dias', type=float, default=10)
+    executar.add_argument('--saldo', type=float, default=1000.0)
+    executar.add_argument('--ciclos', type=int, default=None)
+
+    args = parser.parse_args(argv)
+    if args.comando == 'gravar':
+        from pybit.unified_trading import HTTP
+        gravar_klines(HTTP(testnet=False), args.pares.split(','), args.intervalo, args.dias, args.dados)
+        return
+
+    relatorio = executar_simulacao(args.dados, args.intervalo, args.velocidade, args.dias_simulados,
+                                   args.aquecimento_dias, args.saldo, args.ciclos)
+    logger.info(f"📊 Relatório da simulação: {relatorio}", extra={'evento': 'relatorio_simulacao', **relatorio})
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,202 @@
+# src/sincronizacao_pnl.py (Versão 1.0 - Sincronização Incremental de PnL Realizado)
+#
+# A cada ciclo busca na Bybit apenas os fechamentos (closed PnL) e execuções novos
+# desde o cursor salvo em PNL_CURSOR_ARQUIVO (padrão logs/cursor_pnl.json), paginando
+# por `nextPageCursor`. Cada operação fechada (TP, SL ou fechamento a mercado) é gravada
+# uma única vez no diário de trades (logs/trade_history.csv) e informada ao GestorDrawdown.
+
+import os
+import json
+from collections import OrderedDict
+
+from src import relogio
+from src.utils import logger, log_trade, trade_log_file
+from src.metricas import operacoes_fechadas
+
+MS_24H = 24 * 60 * 60 * 1000
+# A API aceita no máximo 7 dias entre startTime e endTime
+JANELA_MAX_MS = 7 * MS_24H
+# Cada consulta recomeça um pouco antes do cursor; registros já vistos são ignorados
+SOBREPOSICAO_MS = 5 * 60 * 1000
+MAX_TIPOS_ORDEM = 2000
+
+def _chave(registro):
+    return f"{registro['orderId']}:{registro['createdTime']}"
+
+def motivo_fechamento(tipo_ordem, tipo_stop):
+    """Classifica a ordem que fechou a posição a partir da execução correspondente."""
+    if tipo_stop in ('StopLoss', 'Stop', 'TrailingStop'):
+        return 'stop_loss'
+    if tipo_stop == 'TakeProfit' or tipo_ordem == 'Limit':
+        return 'take_profit'
+    if tipo_ordem == 'Market':
+        return 'fechamento_mercado'
+    return 'desconhecido'
+
+class SincronizadorPnl:
+    """Sincroniza o PnL realizado com um cursor persistido.
+
+    Para gravar cada operação exatamente uma vez mesmo com o processo morrendo no
+    meio, a linha é marcada como pendente no cursor antes de ir para o diário; ao
+    recarregar, uma pendência que já está na última linha do diário não é repetida.
+    """
+
+    def __init__(self, gestor, caminho=None, retroativo_horas=None):
+        self.gestor = gestor
+        self.caminho = os.getenv('PNL_CURSOR_ARQUIVO', 'logs/cursor_pnl.json') if caminho is None else caminho
+        self.retroativo_ms = int(float(os.getenv('PNL_SYNC_BACKFILL_HOURS', '24') if retroativo_horas is None
+                                       else retroativo_horas) * 60 * 60 * 1000)
+        self.estado = None
+        self.tipos_ordem = OrderedDict()  # orderId -> (orderType, stopOrderType), das execuções
+        self.aberturas = {}               # par -> estratégia que abriu a posição
+        self._alertas = []
+
+    # --- Cursor ---
+
+    def _carregar(self):
+        agora_ms = int(relogio.timestamp() * 1000)
+        inicio = agora_ms - self.retroativo_ms
+        self.estado = {'pnl_ms': inicio, 'execucoes_ms': inicio, 'vistos': {}, 'aberturas': {}, 'pendente': None}
+        if self.caminho and os.path.exists(self.caminho):
+            try:
+                with open(self.caminho) as f:
+                    self.estado.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Cursor de PnL ilegível ({e}); sincronizando a partir de {self.retroativo_ms // 3600000}h atrás.")
+        self.aberturas = self.estado['aberturas']
+        pendente = self.estado['pendente']
+        if pendente is not None:
+            # O processo parou entre marcar a pendência e confirmá-la
+            if not self._ultima_linha_do_diario(pendente['linha']):
+                log_trade(dict(pendente['linha']))
+            self._confirmar(pendente['chave'], pendente['criado_ms'])
+            self._registrar_resultado(pendente['linha']['result'])
+
+    def _salvar(self):
+        if not self.caminho:
+            return
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w') as f:
+            json.dump(self.estado, f)
+        os.replace(temporario, self.caminho)
+
+    def _ultima_linha_do_diario(self, linha):
+        try:
+            with open(trade_log_file) as f:
+                ultima = f.read().rstrip('\n').rsplit('\n', 1)[-1].split(',')
+        except OSError:
+            return False
+        # Colunas: timestamp_utc, strategy, pair, direction, entry_price, size_usdt, pnl_usdt, result, exit_price, close_reason
+        return len(ultima) >= 10 and ultima[2] == linha['pair'] and ultima[6] == str(linha['pnl_usdt']) \
+            and ultima[8] == str(linha['exit_price'])
+
+    def _confirmar(self, chave, criado_ms):
+        self.estado['vistos'][chave] = criado_ms
+        self.estado['pnl_ms'] = max(self.estado['pnl_ms'], criado_ms)
+        self.estado['pendente'] = None
+        self._podar_vistos()
+        self._salvar()
+
+    def _podar_vistos(self):
+        # Só importam os registros que a próxima consulta (com sobreposição) ainda traz
+        limite = self.estado['pnl_ms'] - SOBREPOSICAO_MS
+        self.estado['vistos'] = {c: ms for c, ms in self.estado['vistos'].items() if ms >= limite}
+
+    # --- API ---
+
+    def _paginar(self, metodo, inicio_ms, fim_ms):
+        """Todos os itens de `metodo` entre `inicio_ms` e `fim_ms`, em janelas de até 7 dias."""
+        itens = []
+        while inicio_ms < fim_ms:
+            fim_janela = min(inicio_ms + JANELA_MAX_MS, fim_ms)
+            cursor = None
+            while True:
+                parametros = {'category': 'linear', 'startTime': inicio_ms, 'endTime': fim_janela, 'limit': 100}
+                if cursor:
+                    parametros['cursor'] = cursor
+                resposta = metodo(**parametros)
+                if resposta['retCode'] != 0:
+                    raise RuntimeError(f"retCode {resposta['retCode']}: {resposta['retMsg']}")
+                itens.extend(resposta['result']['list'])
+                cursor = resposta['result'].get('nextPageCursor')
+                if not cursor:
+                    break
+            inicio_ms = fim_janela
+        return itens
+
+    def _atualizar_execucoes(self, session, agora_ms):
+        inicio = self.estado['execucoes_ms'] - SOBREPOSICAO_MS
+        for execucao in self._paginar(session.get_executions, inicio, agora_ms):
+            self.tipos_ordem[execucao['orderId']] = (execucao.get('orderType', ''), execucao.get('stopOrderType', ''))
+            self.tipos_ordem.move_to_end(execucao['orderId'])
+            self.estado['execucoes_ms'] = max(self.estado['execucoes_ms'], int(execucao['execTime']))
+        while len(self.tipos_ordem) > MAX_TIPOS_ORDEM:
+            self.tipos_ordem.popitem(last=False)
+
+    def _linha_diario(self, registro):
+        pnl = float(registro['closedPnl'])
+        entrada = float(registro['avgEntryPrice'])
+        tipo_ordem, tipo_stop = self.tipos_ordem.get(registro['orderId'], (registro.get('orderType', ''), ''))
+        return {
+            'strategy': self.aberturas.pop(registro['symbol'], 'N/A'),
+            'pair': registro['symbol'],
+            # O lado do registro é o da ordem de fechamento
+            'direction': 'Long' if registro['side'] == 'Sell' else 'Short',
+            'entry_price': entrada,
+            'size_usdt': round(float(registro['closedSize']) * entrada, 2),
+            'pnl_usdt': round(pnl, 4),
+            'result': 'perda' if pnl < 0 else 'ganho',
+            'exit_price': float(registro['avgExitPrice']),
+            'close_reason': motivo_fechamento(tipo_ordem, tipo_stop),
+        }
+
+    def _registrar_resultado(self, resultado):
+        alerta = self.gestor.registrar_operacao(resultado)
+        if alerta:
+            self._alertas.append(alerta)
+
+    def registrar_abertura(self, par, estrategia):
+        """Lembra a estratégia que abriu `par`, para atribuí-la ao fechamento."""
+        if self.estado is None:
+            self._carregar()
+        self.aberturas[par] = estrategia
+        self._salvar()
+
+    def sincronizar(self, session):
+        """Grava as operações fechadas desde o cursor. Retorna os alertas do gestor de drawdown."""
+        if self.estado is None:
+            self._carregar()
+        agora_ms = int(relogio.timestamp() * 1000)
+        try:
+            self._atualizar_execucoes(session, agora_ms)
+            registros = self._paginar(session.get_closed_pnl, self.estado['pnl_ms'] - SOBREPOSICAO_MS, agora_ms)
+        except Exception as e:
+            logger.warning(f"Sincronização de PnL adiada para o próximo ciclo: {e}")
+            alertas, self._alertas = self._alertas, []
+            return alertas
+
+        novos = {}
+        for registro in registros:
+            chave = _chave(registro)
+            if chave not in self.estado['vistos']:
+                novos[chave] = registro
+        for chave, registro in sorted(novos.items(), key=lambda item: int(item[1]['createdTime'])):
+            linha = self._linha_diario(registro)
+            criado_ms = int(registro['createdTime'])
+            self.estado['pendente'] = {'chave': chave, 'criado_ms': criado_ms, 'linha': linha}
+            self._salvar()
+            log_trade(dict(linha))
+            self._confirmar(chave, criado_ms)
+            operacoes_fechadas.labels(estrategia=linha['strategy'], resultado=linha['result']).inc()
+            logger.info(f"Operação fechada: {linha['pair']} {linha['close_reason']} PnL {linha['pnl_usdt']:+.4f} USDT",
+                        extra={'evento': 'operacao_fechada', **linha})
+            self._registrar_resultado(linha['result'])
+
+        # Sem operações novas os cursores também andam: a próxima consulta cobre só o
+        # intervalo desde agora, com a sobreposição, e não o histórico desde o último trade
+        self.estado['pnl_ms'] = max(self.estado['pnl_ms'], agora_ms - SOBREPOSICAO_MS)
+        self.estado['execucoes_ms'] = max(self.estado['execucoes_ms'], agora_ms - SOBREPOSICAO_MS)
+        self._podar_vistos()
+        self._salvar()
+        alertas, self._alertas = self._alertas, []
+        return alertas
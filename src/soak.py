@@ -0,0 +1,137 @@
+# src/soak.py (Versão 1.1 - Soak Test de Memória contra a Exchange Simulada)
+#
+# Roda o `main_loop` real por milhares de ciclos simulados (relógio virtual, sem
+# esperas reais) contra séries sintéticas e verifica que a memória alocada pelo
+# robô fica estável depois do aquecimento. Sai com código 1 se crescer além da
+# tolerância.
+#   python -m src.soak --pares 30 --ciclos 3000 --tolerancia-mb 2
+
+import gc
+import sys
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from src.memoria import rss_bytes
+from src.simulador import SerieKlines, executar_simulacao, MINUTOS_POR_INTERVALO, MS_24H
+from src.utils import logger
+
+# Os pivôs de 4h do Fibonacci precisam de 300 candles (50 dias) antes do primeiro ciclo
+AQUECIMENTO_DIAS = 55
+
+def gerar_series(n_pares, dias, intervalo_base='5', semente=42):
+    """Passeio aleatório com volatilidade variável, para haver candidatos de Momentum e Fibonacci."""
+    gerador = np.random.default_rng(semente)
+    intervalo_ms = MINUTOS_POR_INTERVALO[intervalo_base] * 60 * 1000
+    candles = int(dias * MS_24H / intervalo_ms)
+    timestamp = 1_600_000_000_000 + np.arange(candles, dtype=np.int64) * intervalo_ms
+    series = {}
+    for i in range(n_pares):
+        volatilidade = 0.002 * np.exp(np.cumsum(gerador.normal(0, 0.02, candles)).clip(-1, 1))
+        close = 10.0 * np.exp(np.cumsum(gerador.normal(0, 1, candles) * volatilidade))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        amplitude = np.abs(gerador.normal(0, 1, candles)) * volatilidade * close
+        series[f"SOAK{i}USDT"] = SerieKlines(
+            timestamp, open_, np.maximum(open_, close) + amplitude, np.minimum(open_, close) - amplitude,
+            close, gerador.uniform(1e3, 1e5, candles))
+    return series
+
+class AmostradorMemoria:
+    """Callback de fim de ciclo: a cada `a_cada` ciclos mede a memória do robô e
+    quanto ele trabalhou (chaves varridas pelo planejador desde a amostra anterior,
+    rastreadores de pivôs e entradas do cache de resultados).
+
+    Alocações feitas dentro do próprio simulador (histórico de ordens e execuções
+    da exchange falsa) são excluídas, pois crescem por definição.
+    """
+
+    def __init__(self, a_cada=100):
+        self.a_cada = a_cada
+        self.amostras = []  # (ciclo, bytes rastreados, rss, atividade)
+        self._filtros = [tracemalloc.Filter(False, '*simulador.py'), tracemalloc.Filter(False, tracemalloc.__file__)]
+        self._varredura = {}
+
+    def _atividade(self):
+        # executar_simulacao já importou src.main
+        from src.main import estado_em_memoria, planejador_varredura
+        estado = estado_em_memoria()
+        varredura = dict(planejador_varredura.ultima_varredura)
+        varridas = sum(1 for chave, rodada in varredura.items() if self._varredura.get(chave) != rodada)
+        self._varredura = varredura
+        return {'varridas': varridas, 'rastreadores_pivos': estado['rastreadores_pivos'],
+                'cache_resultados': estado['cache_resultados']}
+
+    def __call__(self, ciclo):
+        if ciclo % self.a_cada:
+            return
+        atividade = self._atividade()
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filtros)
+        rastreado = sum(estatistica.size for estatistica in snapshot.statistics('filename'))
+        self.amostras.append((ciclo, rastreado, rss_bytes(), atividade))
+        logger.info(f"Soak ciclo {ciclo}: {rastreado / 2**20:.2f} MB rastreados, RSS {self.amostras[-1][2] / 2**20:.1f} MB, "
+                    f"{atividade['varridas']} chaves varridas, {atividade['rastreadores_pivos']} rastreadores")
+
+def avaliar(amostras, fracao_aquecimento, tolerancia_mb):
+    """Compara as amostras após o aquecimento. Retorna (aprovado, relatório).
+
+    Memória estável só vale se as estratégias de fato rodaram: sem varreduras após
+    o aquecimento (ou sem pivôs/cache), o soak reprova."""
+    estaveis = amostras[int(len(amostras) * fracao_aquecimento):]
+    if len(estaveis) < 3:
+        return False, {'erro': 'amostras insuficientes após o aquecimento'}
+    ciclos = np.array([a[0] for a in estaveis], dtype=np.float64)
+    rastreado = np.array([a[1] for a in estaveis], dtype=np.float64) / 2**20
+    rss = np.array([a[2] for a in estaveis], dtype=np.float64) / 2**20
+    inclinacao = float(np.polyfit(ciclos, rastreado, 1)[0] * 1000)
+    crescimento = float(rastreado[-1] - rastreado[0])
+    relatorio = {
+        'amostras': len(estaveis),
+        'rastreado_inicial_mb': round(float(rastreado[0]), 2),
+        'rastreado_final_mb': round(float(rastreado[-1]), 2),
+        'crescimento_mb': round(crescimento, 2),
+        'inclinacao_mb_por_1000_ciclos': round(inclinacao, 3),
+        'rss_inicial_mb': round(float(rss[0]), 1),
+        'rss_final_mb': round(float(rss[-1]), 1),
+        'chaves_varridas': sum(a[3]['varridas'] for a in estaveis),
+        'rastreadores_pivos': estaveis[-1][3]['rastreadores_pivos'],
+        'cache_resultados': estaveis[-1][3]['cache_resultados'],
+    }
+    ativo = relatorio['chaves_varridas'] > 0 and relatorio['rastreadores_pivos'] > 0 and relatorio['cache_resultados'] > 0
+    if not ativo:
+        relatorio['erro'] = 'estratégias não varreram nenhum par após o aquecimento'
+    return bool(ativo and crescimento <= tolerancia_mb), relatorio
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test de memória do robô contra a exchange simulada")
+    parser.add_argument('--pares', type=int, default=30)
+    parser.add_argument('--ciclos', type=int, default=3000)
+    parser.add_argument('--amostra-cada', type=int, default=100)
+    parser.add_argument('--aquecimento', type=float, default=0.25, help="Fração inicial das amostras ignorada")
+    parser.add_argument('--tolerancia-mb', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    # Cada ciclo avança ~1 min simulado; sobra margem para esperas maiores (robô pausado)
+    dias = AQUECIMENTO_DIAS + args.ciclos * 5 / (24 * 60) + 1
+    series = gerar_series(args.pares, dias)
+    amostrador = AmostradorMemoria(args.amostra_cada)
+
+    tracemalloc.start(1)
+    try:
+        simulacao = executar_simulacao(None, intervalo_base='5', aquecimento_dias=AQUECIMENTO_DIAS,
+                                       max_ciclos=args.ciclos, series=series, ao_fim_ciclo=amostrador)
+    finally:
+        tracemalloc.stop()
+
+    aprovado, relatorio = avaliar(amostrador.amostras, args.aquecimento, args.tolerancia_mb)
+    if simulacao['dias_simulados'] > dias - AQUECIMENTO_DIAS:
+        # O relógio passou do fim das séries: os últimos ciclos rodaram sem dados novos
+        aprovado = False
+        relatorio['erro'] = f"simulação cobriu {simulacao['dias_simulados']} dias, além das séries geradas"
+    logger.info(f"Soak {'APROVADO' if aprovado else 'REPROVADO'}: {relatorio} | Simulação: {simulacao}",
+                extra={'evento': 'resultado_soak', 'aprovado': aprovado, **relatorio})
+    return 0 if aprovado else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
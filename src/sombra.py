@@ -0,0 +1,217 @@
+# src/sombra.py (Versão 1.0 - Estratégias Candidatas em Modo Sombra)
+#
+# Versões candidatas de uma estratégia rodam sobre o mesmo instantâneo de mercado
+# do ciclo, sem enviar ordens. Os sinais hipotéticos vão para logs/sombra.csv ao
+# lado dos sinais reais do mesmo ciclo, e o custo de cada versão (CPU, tempo e pico
+# de memória) é medido para saber se ela caberia no prazo do ciclo.
+#
+# As versões ficam em SOMBRA_ARQUIVO (padrão config/sombra.json), ex.:
+#   [{"nome": "fib_conf6", "estrategia": "fibonacci", "parametros": {"confianca_minima": 6}},
+#    {"nome": "fib_v2", "estrategia": "fibonacci", "funcao": "src.estrategias_v2:analisar_fibonacci"}]
+# `funcao` ("modulo:nome") deve aceitar os mesmos argumentos da versão real.
+
+import os
+import csv
+import copy
+import json
+import time
+import logging
+import importlib
+import contextvars
+import tracemalloc
+from datetime import datetime
+
+from src.utils import logger
+from src.pivos import rastreadores_pivos, podar_rastreadores
+from src.pool_calculo import PoolCalculo
+from src.cache_resultados import CacheResultados
+from src.metricas import sombra_cpu, sombra_memoria_pico, sombra_sinais
+
+FUNCOES_REAIS = {
+    'momentum': 'src.estrategias:analisar_momentum_pullback',
+    'fibonacci': 'src.estrategias:analisar_fibonacci',
+}
+
+arquivo_sinais = 'logs/sombra.csv'
+cabecalho_sinais = ['timestamp_utc', 'versao', 'estrategia', 'pair', 'timeframe', 'price',
+                    'stop_loss', 'take_profit', 'matches_live']
+
+# Versão sombra em execução no contexto atual (None fora do modo sombra)
+versao_em_execucao = contextvars.ContextVar('versao_sombra', default=None)
+
+class FiltroSombra(logging.Filter):
+    """Marca os logs emitidos por uma versão sombra, para que eventos como
+    `sinal_fibonacci` não se misturem aos da versão real nos painéis."""
+
+    def filter(self, record):
+        versao = versao_em_execucao.get()
+        if versao is not None:
+            record.msg = f"[sombra {versao}] {record.msg}"
+            if hasattr(record, 'evento'):
+                record.evento = f"sombra_{record.evento}"
+        return True
+
+logger.addFilter(FiltroSombra())
+
+def _chave_sinal(sinal):
+    return (sinal['par'], sinal.get('timeframe'))
+
+def _gravar_sinais(versao, estrategia, sinais, reais=None):
+    """Uma linha por sinal em logs/sombra.csv; `reais` (chaves dos sinais reais) preenche `matches_live`."""
+    agora = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    with open(arquivo_sinais, 'a', newline='') as f:
+        writer = csv.writer(f)
+        for sinal in sinais:
+            writer.writerow([agora, versao, estrategia, sinal['par'], sinal.get('timeframe', ''),
+                             sinal.get('preco_atual', ''), sinal.get('stop_loss', ''), sinal.get('take_profit', ''),
+                             '' if reais is None else _chave_sinal(sinal) in reais])
+
+def _importar(caminho):
+    modulo, nome = caminho.split(':')
+    return getattr(importlib.import_module(modulo), nome)
+
+class VersaoSombra:
+    """Uma versão candidata, com cache e rastreadores de pivôs próprios para não
+    interferir no estado da versão real."""
+
+    def __init__(self, nome, estrategia, funcao, parametros=None):
+        self.nome = nome
+        self.estrategia = estrategia
+        self.funcao = funcao
+        self.parametros = parametros or {}
+        self.cache = CacheResultados()
+        self.rastreadores = {}
+
+def carregar_versoes(caminho):
+    """Lê as versões de `caminho`. Arquivo ausente desliga o modo sombra."""
+    if not os.path.exists(caminho):
+        return []
+    try:
+        with open(caminho) as f:
+            definicoes = json.load(f)
+        versoes = []
+        for definicao in definicoes:
+            estrategia = definicao['estrategia']
+            if estrategia not in FUNCOES_REAIS:
+                raise ValueError(f"estratégia desconhecida: {estrategia}")
+            funcao = _importar(definicao.get('funcao', FUNCOES_REAIS[estrategia]))
+            versoes.append(VersaoSombra(definicao['nome'], estrategia, funcao, definicao.get('parametros')))
+        return versoes
+    except (OSError, ValueError, KeyError, TypeError, ImportError, AttributeError) as e:
+        logger.error(f"Modo sombra desligado: {caminho} inválido ({e})", extra={'evento': 'sombra_invalida'})
+        return []
+
+class ModoSombra:
+    """Roda as versões candidatas depois das etapas reais do ciclo.
+
+    O cálculo acontece no próprio processo (sem pool) para que CPU e memória
+    medidas sejam só da versão. Se o prazo do ciclo já acabou, as versões
+    restantes ficam para o próximo ciclo.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or os.getenv('SOMBRA_ARQUIVO', 'config/sombra.json')
+        self.versoes = carregar_versoes(self.caminho)
+        self._pool = PoolCalculo(workers=0)
+        self._proxima = 0
+        if self.versoes:
+            logger.info(f"Modo sombra ativo: {[versao.nome for versao in self.versoes]}")
+            if not os.path.exists(arquivo_sinais):
+                with open(arquivo_sinais, 'w', newline='') as f:
+                    csv.writer(f).writerow(cabecalho_sinais)
+
+    @property
+    def ativo(self):
+        return bool(self.versoes)
+
+    def _preparar(self, versao, instantaneo):
+        # Pivôs partem do estado real; daí em diante cada versão segue com os seus
+        if versao.estrategia != 'fibonacci':
+            return
+        for requisito in instantaneo.requisitos('fibonacci'):
+            chave = (requisito.symbol, requisito.interval)
+            if chave not in versao.rastreadores and chave in rastreadores_pivos:
+                versao.rastreadores[chave] = copy.deepcopy(rastreadores_pivos[chave])
+
+    async def _medir(self, versao, instantaneo, argumentos):
+        """Executa a versão e retorna (sinais, custo)."""
+        ja_rastreando = tracemalloc.is_tracing()
+        if not ja_rastreando:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memoria_antes, _ = tracemalloc.get_traced_memory()
+        cpu_inicio, inicio = time.process_time(), time.perf_counter()
+        marcador = versao_em_execucao.set(versao.nome)
+        try:
+            extras = {'rastreadores': versao.rastreadores} if versao.estrategia == 'fibonacci' else {}
+            sinais = await versao.funcao(None, planejador=None, orcamento=None, instantaneo=instantaneo,
+                                         pool=self._pool, cache=versao.cache, **extras,
+                                         **{**argumentos, **versao.parametros})
+        finally:
+            versao_em_execucao.reset(marcador)
+            custo = {
+                'cpu_s': round(time.process_time() - cpu_inicio, 4),
+                'duracao_s': round(time.perf_counter() - inicio, 4),
+                'memoria_pico_bytes': max(tracemalloc.get_traced_memory()[1] - memoria_antes, 0),
+            }
+            if not ja_rastreando:
+                tracemalloc.stop()
+        return sinais, custo
+
+    def _registrar(self, versao, sinais, sinais_reais, custo, prazo_s):
+        reais = {_chave_sinal(sinal) for sinal in sinais_reais}
+        hipoteticos = {_chave_sinal(sinal) for sinal in sinais}
+        _gravar_sinais(versao.nome, versao.estrategia, sinais, reais)
+
+        sombra_cpu.labels(versao=versao.nome).set(custo['cpu_s'])
+        sombra_memoria_pico.labels(versao=versao.nome).set(custo['memoria_pico_bytes'])
+        if sinais:
+            sombra_sinais.labels(versao=versao.nome).inc(len(sinais))
+        comparacao = {
+            'sinais': len(hipoteticos),
+            'em_comum': len(hipoteticos & reais),
+            'so_sombra': len(hipoteticos - reais),
+            'so_real': len(reais - hipoteticos),
+            'fracao_prazo': round(custo['duracao_s'] / prazo_s, 3) if prazo_s else None,
+        }
+        logger.info(f"Sombra {versao.nome}: {comparacao['sinais']} sinais ({comparacao['em_comum']} em comum com a real, "
+                    f"{comparacao['so_sombra']} só na sombra, {comparacao['so_real']} só na real) | "
+                    f"CPU {custo['cpu_s']:.3f}s, pico {custo['memoria_pico_bytes'] / 2**20:.1f} MB",
+                    extra={'evento': 'comparacao_sombra', 'versao': versao.nome, 'estrategia': versao.estrategia,
+                           **comparacao, **custo})
+
+    async def executar(self, instantaneo, sinais_reais, argumentos, orcamento=None):
+        """`sinais_reais` e `argumentos` (os mesmos passados à versão real) são
+        dicts por estratégia ('momentum', 'fibonacci')."""
+        if not self.versoes:
+            return
+        instantaneo = instantaneo.somente_leitura()
+        prazo_s = orcamento.prazo_s if orcamento is not None else None
+        for estrategia, sinais in sinais_reais.items():
+            _gravar_sinais('real', estrategia, sinais)
+
+        # Rodízio: com o prazo curto, cada ciclo começa pela versão que ficou de fora no anterior
+        for deslocamento in range(len(self.versoes)):
+            if orcamento is not None and orcamento.esgotado():
+                orcamento.truncar('sombra', len(self.versoes) - deslocamento)
+                break
+            versao = self.versoes[(self._proxima + deslocamento) % len(self.versoes)]
+            try:
+                self._preparar(versao, instantaneo)
+                sinais, custo = await self._medir(versao, instantaneo, argumentos[versao.estrategia])
+                self._registrar(versao, sinais, sinais_reais.get(versao.estrategia, []), custo, prazo_s)
+            except Exception as e:
+                logger.error(f"Erro na versão sombra {versao.nome}: {e}", exc_info=True)
+        else:
+            deslocamento = len(self.versoes)
+        self._proxima = (self._proxima + deslocamento) % len(self.versoes)
+
+    def podar(self, idade_max_ms):
+        removidos = 0
+        for versao in self.versoes:
+            removidos += versao.cache.podar(idade_max_ms)
+            removidos += podar_rastreadores(idade_max_ms, versao.rastreadores)
+        return removidos
+
+    def itens(self):
+        return sum(len(versao.cache) + len(versao.rastreadores) for versao in self.versoes)
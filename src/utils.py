@@ -1,29 +1,103 @@
-# src/utils.py (Versão 1.0)
+# src/utils.py (Versão 2.0 - Logging Assíncrono via Fila + JSON Estruturado)
 
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import sys
 import csv
+import json
+import queue
+import atexit
 from datetime import datetime
 
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON para o Promtail/Loki indexar sem regex.
+
+    Campos passados via `extra=` (ex.: `extra={'par': 'BTCUSDT', 'evento': 'sinal'}`)
+    viram chaves de primeiro nível.
+    """
+    CAMPOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        dados = {
+            'ts': datetime.utcfromtimestamp(record.created).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
+            'level': record.levelname,
+            'msg': record.getMessage(),
+        }
+        for chave, valor in record.__dict__.items():
+            if chave not in self.CAMPOS_PADRAO and not chave.startswith('_'):
+                dados[chave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+class FilaHandler(QueueHandler):
+    """QueueHandler que preserva o traceback em `exc_text` para os formatters do listener."""
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 # --- Configuração do Logger Principal (Erros e Informações) ---
 log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 log_file = 'logs/error.log'
 
-# Handler para rotacionar o arquivo de log quando ele atinge 5MB
+# Handler para rotacionar o arquivo de log quando ele atinge 5MB (uma linha JSON por registro)
 file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=2)
-file_handler.setFormatter(log_formatter)
+file_handler.setFormatter(JsonFormatter())
 
 # Handler para imprimir logs no console (saída do Docker)
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(log_formatter)
 
+# A escrita em disco/stdout acontece numa thread separada; o loop de eventos só enfileira
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+
 # Obter o logger principal
 logger = logging.getLogger('robot_logger')
 logger.setLevel(logging.INFO)
 if not logger.handlers:
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(FilaHandler(log_queue))
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+class ResumoVarredura:
+    """Agrega as linhas por símbolo de uma varredura em um único log de resumo.
+
+    Cada símbolo é registrado em DEBUG (descartado sem custo de I/O no nível INFO)
+    e, ao final, `emitir` grava uma única linha com contagem e os destaques.
+    """
+
+    def __init__(self, nome, campo_ordenacao, destaques=5):
+        self.nome = nome
+        self.campo_ordenacao = campo_ordenacao
+        self.destaques = destaques
+        self.itens = []
+
+    def registrar(self, par, **valores):
+        valores = {k: v for k, v in valores.items() if v == v}  # Descarta NaN (JSON inválido)
+        self.itens.append((par, valores))
+        if logger.isEnabledFor(logging.DEBUG):
+            detalhes = ', '.join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in valores.items())
+            logger.debug(f"🔍 {par}: {detalhes}", extra={'evento': self.nome, 'par': par, **valores})
+
+    def emitir(self, **extras):
+        if not self.itens:
+            return
+        ordenados = sorted(self.itens, key=lambda item: item[1].get(self.campo_ordenacao, float('inf')))
+        top = [{'par': par, **valores} for par, valores in ordenados[:self.destaques]]
+        resumo_texto = ', '.join(f"{item['par']}={item.get(self.campo_ordenacao, float('nan')):.2f}" for item in top)
+        logger.info(
+            f"📋 Resumo {self.nome}: {len(self.itens)} pares analisados | menores {self.campo_ordenacao}: {resumo_texto}",
+            extra={'evento': f'resumo_{self.nome}', 'analisados': len(self.itens), 'destaques': top, **extras}
+        )
+        self.itens = []
 
 # --- Configuração do Logger de Trades (CSV) ---
 trade_log_file = 'logs/trade_history.csv'
@@ -0,0 +1,79 @@
+# src/vigia_loop.py (Versão 1.0 - Vigia de Atraso/Bloqueio do Event Loop)
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+
+from src.utils import logger
+from src.metricas import atraso_loop, bloqueios_loop
+
+_DIRETORIO_SRC = os.path.dirname(os.path.abspath(__file__))
+
+def _responsavel(pilha):
+    """Função do robô mais interna na pilha (ex.: 'bybit_executor.place_order')."""
+    for quadro in reversed(pilha):
+        caminho = os.path.abspath(quadro.filename)
+        if caminho.startswith(_DIRETORIO_SRC) and not caminho.endswith('vigia_loop.py'):
+            modulo = os.path.splitext(os.path.basename(caminho))[0]
+            return f"{modulo}.{quadro.name}"
+    return pilha[-1].name if pilha else 'desconhecida'
+
+class VigiaLoop:
+    """Mede continuamente o atraso do event loop e identifica chamadas bloqueantes.
+
+    Uma task acorda a cada `intervalo` segundos e registra quanto atrasou. Uma
+    thread separada observa esse batimento: se o loop ficar mais de `limiar`
+    segundos sem bater, ela captura a pilha da thread do loop (a chamada que o
+    está bloqueando) e a registra no log, com a função do robô responsável.
+    """
+
+    def __init__(self, limiar=1.0, intervalo=0.1):
+        self.limiar = limiar
+        self.intervalo = intervalo
+        self._batida = time.monotonic()
+        self._thread_loop = None
+        self._bloqueio = None
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+
+    async def executar(self):
+        self._thread_loop = threading.get_ident()
+        self._batida = time.monotonic()
+        threading.Thread(target=self._vigiar, name='vigia_loop', daemon=True).start()
+        try:
+            while True:
+                inicio = time.monotonic()
+                await asyncio.sleep(self.intervalo)
+                agora = time.monotonic()
+                atraso_loop.observe(max(agora - inicio - self.intervalo, 0.0))
+                with self._trava:
+                    self._batida = agora
+                    bloqueio, self._bloqueio = self._bloqueio, None
+                if bloqueio is not None:
+                    duracao = agora - bloqueio['inicio']
+                    logger.warning(f"Event loop liberado após {duracao:.2f}s bloqueado em {bloqueio['funcao']}",
+                                   extra={'evento': 'loop_liberado', 'funcao': bloqueio['funcao'],
+                                          'duracao_s': round(duracao, 3)})
+        finally:
+            self._parar.set()
+
+    def _vigiar(self):
+        while not self._parar.wait(self.intervalo):
+            with self._trava:
+                parado = time.monotonic() - self._batida
+                if parado < self.limiar or self._bloqueio is not None:
+                    continue
+                quadro = sys._current_frames().get(self._thread_loop)
+                if quadro is None:
+                    continue
+                pilha = traceback.extract_stack(quadro)
+                funcao = _responsavel(pilha)
+                self._bloqueio = {'funcao': funcao, 'inicio': self._batida}
+            bloqueios_loop.labels(funcao=funcao).inc()
+            chamada = f"{os.path.basename(pilha[-1].filename)}:{pilha[-1].lineno} {pilha[-1].name}"
+            logger.warning(f"Event loop bloqueado há {parado:.2f}s em {funcao} (chamada atual: {chamada})",
+                           extra={'evento': 'loop_bloqueado', 'funcao': funcao,
+                                  'pilha': ''.join(traceback.format_list(pilha))})